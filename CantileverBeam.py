@@ -1,101 +1,153 @@
 from abaqus import*
 from abaqusConstants import*
+import PhaseTrace
 import regionToolset
 
-session.viewports['Viewport: 1'].setValues(displayedObject=None)
-
-mdb.models.changeKey(fromName='Model-1', toName='Cantilever Beam')
-cantileverModel = mdb.models['Cantilever Beam']
-
-import sketch
-import part
-#Rectangke() method is used to draw the rectangular cross section
-cantileverSketch = cantileverModel.ConstrainedSketch(name='Beam Cross Section', sheetSize=5)
-cantileverSketch.rectangle(point1=(0,0), point2=(25,20))
-#BaseSolidExtrude() is used to create a feature object
-cantileverPart = cantileverModel.Part(name='Beam', dimensionality=THREE_D, type=DEFORMABLE_BODY)
-cantileverPart.BaseSolidExtrude(sketch=cantileverSketch, depth=200)
-
-import material
-cantileverMaterial = cantileverModel.Material(name='Steel')
-cantileverMaterial.Density(table=((7.8E-9, ), ))
-cantileverMaterial.Elastic(table=((200E3,0.29), ))
-
-import section
-#Create a solid section using HomogeneousSolidSection() method
-cantileverSection = cantileverModel.HomogeneousSolidSection(name='Cantilever Section', material='Steel')
-#Identify all the cells of part and assign them to region.
-#The comma used here is to indicate that we are creating a Region object, which wuold be a sequence of cells
-#This sequence can be vertex objects, edge objects, node objects or face objects
-region_of_cantilever = (cantileverPart.cells,)
-cantileverPart.SectionAssignment(region=region_of_cantilever, sectionName='Cantilever Section')
-
-import assembly
-cantileverAssembly = cantileverModel.rootAssembly
-cantileverInstance = cantileverAssembly.Instance(name='Cantilever Instance', part=cantileverPart, dependent=ON)
-
-import step
-cantileverModel.StaticStep(name='Apply Pressure Load', previous='Initial', description='Load is applied now')
-
-#Definition of field output requests
-cantileverModel.fieldOutputRequests.changeKey(fromName='F-Output-1', toName='Required Field Outputs')
-cantileverModel.fieldOutputRequests['Required Field Outputs'].setValues(variables=('S','E','PEMAG','U','RF','CF'))
-
-#Apply pressure loads
-#First, indentify the face on which pressure load is applied
-#Use findAt() method
-point_on_topface_xcoord = 12.5
-point_on_topface_ycoord = 20
-point_on_topface_zcoord = 100
-point_top_face = (point_on_topface_xcoord, point_on_topface_ycoord, point_on_topface_zcoord)
-top_face = cantileverInstance.faces.findAt((point_top_face,))
-#Convert indentified face into region
-top_face_region = regionToolset.Region(side1Faces=top_face)
-
-cantileverModel.Pressure(name='Uniform Applied Pressure', createStepName='Apply Pressure Load', region=top_face_region, distributionType=UNIFORM, magnitude=0.5, amplitude=UNSET)
-
-#Apply boundary conditions
-point_on_fixedface_xcoord = 12.5
-point_on_fixedface_ycoord = 10
-point_on_fixedface_zcoord = 0
-point_on_fixed_face = (point_on_fixedface_xcoord, point_on_fixedface_ycoord, point_on_fixedface_zcoord)
-fixed_face = cantileverInstance.faces.findAt((point_on_fixed_face,))
-fixed_face_region = regionToolset.Region(faces=fixed_face)
-#Note that boundary conditions applied in the initial step
-cantileverModel.EncastreBC(name='Fix one end', createStepName='Initial', region=fixed_face_region)
-
-#Mesh creation
-import mesh
-
-element_type_for_mesh = mesh.ElemType(elemCode=C3D8R, elemLibrary=STANDARD, kinematicSplit=AVERAGE_STRAIN, secondOrderAccuracy=OFF, hourglassControl=DEFAULT, distortionControl=DEFAULT)
-#The region for meshing is selected from all the cells of the beam
-cantilever_interior_xcoord = 12.5
-cantilever_interior_ycoord = 10
-cantilever_interior_zcoord = 100
-cantileverCells = cantileverPart.cells
-requiredcantileverCells = cantileverCells.findAt((cantilever_interior_xcoord, cantilever_interior_ycoord, cantilever_interior_zcoord),)
-
-cantilever_mesh_region = (requiredcantileverCells,)
-#There is a comma at the end. This means that input for region is a sequence of cells
-#Once we have chosen mesh region, pre-defined element type is assigned which is followed by sedding part
-cantileverPart.setElementType(regions=cantilever_mesh_region, elemTypes=(element_type_for_mesh,))
-#You can reduce value of 'size' to generate finer mesh
-cantileverPart.seedPart(size=10, deviationFactor=0.1)
-cantileverPart.generateMesh()
-
-#Create job and running
-import job
-
-mdb.Job(name='CantileverJob', model='Cantilever Beam', type=ANALYSIS, explicitPrecision=SINGLE, nodalOutputPrecision=SINGLE, description='Simulating a cantilever beam', parallelizationMethodExplicit=DOMAIN, multiprocessingMode=DEFAULT, numDomains=1, userSubroutine='', numCpus=1, memory=50, memoryUnits=PERCENTAGE, scratch='', echoPrint=OFF, modelPrint=OFF, contactPrint=OFF, historyPrint=OFF)
-
-mdb.jobs['CantileverJob'].submit(consistencyChecking=OFF)
-mdb.jobs['CantileverJob'].waitForCompletion()
-
-#Post processing
-import visualization
-
-cantilever_viewport = session.Viewport(name='Cantilever Beam Results viewport')
-cantilever_odb_path = 'CantileverJob.odb'
-cantilever_odb_object = session.openOdb(name=cantilever_odb_path)
-cantilever_viewport.setValues(displayedObject=cantilever_odb_object)
-cantilever_viewport.odbDisplay.display.setValues(plotState=(UNDEFORMED,CONTOURS_ON_DEF,))
+#The model is built by buildCantileverModel() so that other scripts (see CantileverSweep.py) can build variants of it
+#Running this file as a script builds, runs and displays the original 25x20x200 beam
+#resultsFiles=True also writes U, RF, S and E to the .dat and .fil files (see DatFilReader.py)
+#matrices=True also writes the global stiffness and mass matrices to .mtx files (see MatrixExport.py)
+#numModes > 0 also extracts the first numModes natural frequencies of the unloaded model (see ModalSolver.py)
+def buildCantileverModel(modelName='Cantilever Beam', width=25, height=20, length=200, pressure=0.5, seedSize=10, resultsFiles=False, matrices=False, numModes=0):
+    import sketch
+    import part
+    import material
+    import section
+    import assembly
+    import step
+    import mesh
+    if modelName not in mdb.models.keys():
+        mdb.Model(name=modelName, modelType=STANDARD_EXPLICIT)
+    cantileverModel = mdb.models[modelName]
+
+    #Rectangke() method is used to draw the rectangular cross section
+    PhaseTrace.phase('sketch')
+    cantileverSketch = cantileverModel.ConstrainedSketch(name='Beam Cross Section', sheetSize=5)
+    cantileverSketch.rectangle(point1=(0,0), point2=(width,height))
+    #BaseSolidExtrude() is used to create a feature object
+    PhaseTrace.phase('part')
+    cantileverPart = cantileverModel.Part(name='Beam', dimensionality=THREE_D, type=DEFORMABLE_BODY)
+    cantileverPart.BaseSolidExtrude(sketch=cantileverSketch, depth=length)
+
+    PhaseTrace.phase('material')
+    cantileverMaterial = cantileverModel.Material(name='Steel')
+    cantileverMaterial.Density(table=((7.8E-9, ), ))
+    cantileverMaterial.Elastic(table=((200E3,0.29), ))
+
+    #Create a solid section using HomogeneousSolidSection() method
+    PhaseTrace.phase('section')
+    cantileverSection = cantileverModel.HomogeneousSolidSection(name='Cantilever Section', material='Steel')
+    #Identify all the cells of part and assign them to region.
+    #The comma used here is to indicate that we are creating a Region object, which wuold be a sequence of cells
+    #This sequence can be vertex objects, edge objects, node objects or face objects
+    region_of_cantilever = (cantileverPart.cells,)
+    cantileverPart.SectionAssignment(region=region_of_cantilever, sectionName='Cantilever Section')
+
+    PhaseTrace.phase('assembly')
+    cantileverAssembly = cantileverModel.rootAssembly
+    cantileverInstance = cantileverAssembly.Instance(name='Cantilever Instance', part=cantileverPart, dependent=ON)
+
+    PhaseTrace.phase('step')
+    cantileverModel.StaticStep(name='Apply Pressure Load', previous='Initial', description='Load is applied now')
+
+    #Definition of field output requests
+    cantileverModel.fieldOutputRequests.changeKey(fromName='F-Output-1', toName='Required Field Outputs')
+    cantileverModel.fieldOutputRequests['Required Field Outputs'].setValues(variables=('S','E','PEMAG','U','RF','CF'))
+    if numModes:
+        import ModalSolver
+        ModalSolver.requestFrequencyStep(modelName, numModes)
+
+    PhaseTrace.phase('load')
+    #Apply pressure loads
+    #First, indentify the face on which pressure load is applied
+    #Use findAt() method
+    point_top_face = (width/2.0, height, length/2.0)
+    top_face = cantileverInstance.faces.findAt((point_top_face,))
+    #Convert indentified face into region
+    top_face_region = regionToolset.Region(side1Faces=top_face)
+
+    cantileverModel.Pressure(name='Uniform Applied Pressure', createStepName='Apply Pressure Load', region=top_face_region, distributionType=UNIFORM, magnitude=pressure, amplitude=UNSET)
+
+    #Apply boundary conditions
+    point_on_fixed_face = (width/2.0, height/2.0, 0)
+    fixed_face = cantileverInstance.faces.findAt((point_on_fixed_face,))
+    fixed_face_region = regionToolset.Region(faces=fixed_face)
+    #Note that boundary conditions applied in the initial step
+    cantileverModel.EncastreBC(name='Fix one end', createStepName='Initial', region=fixed_face_region)
+
+    PhaseTrace.phase('mesh')
+    #Mesh creation
+    element_type_for_mesh = mesh.ElemType(elemCode=C3D8R, elemLibrary=STANDARD, kinematicSplit=AVERAGE_STRAIN, secondOrderAccuracy=OFF, hourglassControl=DEFAULT, distortionControl=DEFAULT)
+    #The region for meshing is selected from all the cells of the beam
+    cantileverCells = cantileverPart.cells
+    requiredcantileverCells = cantileverCells.findAt((width/2.0, height/2.0, length/2.0),)
+
+    cantilever_mesh_region = (requiredcantileverCells,)
+    #There is a comma at the end. This means that input for region is a sequence of cells
+    #Once we have chosen mesh region, pre-defined element type is assigned which is followed by sedding part
+    cantileverPart.setElementType(regions=cantilever_mesh_region, elemTypes=(element_type_for_mesh,))
+    #You can reduce value of 'size' to generate finer mesh
+    cantileverPart.seedPart(size=seedSize, deviationFactor=0.1)
+    cantileverPart.generateMesh()
+    PhaseTrace.counter('mesh', elements=len(cantileverPart.elements), nodes=len(cantileverPart.nodes))
+
+    if resultsFiles:
+        import DatFilReader
+        DatFilReader.requestResultsFiles(modelName, 'Apply Pressure Load')
+    if matrices:
+        import MatrixExport
+        MatrixExport.requestMatrixGeneration(modelName)
+    PhaseTrace.phase(None)
+    return cantileverModel
+
+
+#Create job. Only numCpus changes between the original script and the sweep jobs
+def createCantileverJob(jobName='CantileverJob', modelName='Cantilever Beam', numCpus=1):
+    import job
+    return mdb.Job(name=jobName, model=modelName, type=ANALYSIS, explicitPrecision=SINGLE, nodalOutputPrecision=SINGLE, description='Simulating a cantilever beam', parallelizationMethodExplicit=DOMAIN, multiprocessingMode=DEFAULT, numDomains=numCpus, userSubroutine='', numCpus=numCpus, memory=50, memoryUnits=PERCENTAGE, scratch='', echoPrint=OFF, modelPrint=OFF, contactPrint=OFF, historyPrint=OFF)
+
+
+#Read tip deflection and peak Mises stress from the last frame of the load step
+#The tip is the set of nodes with the largest z coordinate, the free end of the beam
+def extractCantileverResults(odbPath, stepName='Apply Pressure Load'):
+    from odbAccess import openOdb
+    cantilever_odb_object = openOdb(path=odbPath, readOnly=True)
+    last_frame = cantilever_odb_object.steps[stepName].frames[-1]
+    instance_nodes = {}
+    for instance in cantilever_odb_object.rootAssembly.instances.values():
+        for node in instance.nodes:
+            instance_nodes[(instance.name, node.label)] = node.coordinates
+    tip_zcoord = max([coordinates[2] for coordinates in instance_nodes.values()])
+    tolerance = 1E-6*max(abs(tip_zcoord), 1.0)
+    tip_deflection = 0.0
+    for value in last_frame.fieldOutputs['U'].values:
+        if abs(instance_nodes[(value.instance.name, value.nodeLabel)][2]-tip_zcoord) <= tolerance and abs(value.data[1]) > abs(tip_deflection):
+            tip_deflection = value.data[1]
+    peak_mises = max([value.mises for value in last_frame.fieldOutputs['S'].values])
+    cantilever_odb_object.close()
+    return {'tipDeflection': tip_deflection, 'peakMises': peak_mises}
+
+
+if __name__ == '__main__':
+    session.viewports['Viewport: 1'].setValues(displayedObject=None)
+
+    mdb.models.changeKey(fromName='Model-1', toName='Cantilever Beam')
+    cantileverModel = buildCantileverModel('Cantilever Beam')
+
+    #Create job and running
+    PhaseTrace.phase('job')
+    createCantileverJob('CantileverJob', 'Cantilever Beam')
+
+    mdb.jobs['CantileverJob'].submit(consistencyChecking=OFF)
+    mdb.jobs['CantileverJob'].waitForCompletion()
+
+    #Post processing
+    PhaseTrace.phase('visualization')
+    import visualization
+
+    cantilever_viewport = session.Viewport(name='Cantilever Beam Results viewport')
+    cantilever_odb_path = 'CantileverJob.odb'
+    cantilever_odb_object = session.openOdb(name=cantilever_odb_path)
+    cantilever_viewport.setValues(displayedObject=cantilever_odb_object)
+    cantilever_viewport.odbDisplay.display.setValues(plotState=(UNDEFORMED,CONTOURS_ON_DEF,))
+    PhaseTrace.write()
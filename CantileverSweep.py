@@ -0,0 +1,86 @@
+#Parametric sweep of the cantilever beam
+#Every point of the parameter grid gets its own model and job, named CantileverSweep_000, CantileverSweep_001, ...
+#The input decks are written from the kernel and solved by JobFarm.py, several jobs at a time,
+#and tip deflection and peak Mises stress of every point are collected into one table (CantileverSweep.csv)
+#Run inside CAE: abaqus cae noGUI=CantileverSweep.py
+#Run without Abaqus: PYTHONPATH=abaqusStub python CantileverSweep.py
+import os
+import time
+import itertools
+
+from abaqus import*
+from abaqusConstants import*
+
+import CantileverBeam
+import JobFarm
+
+#Each parameter of buildCantileverModel() can be swept, parameters left out keep their default value
+cantileverSweepGrid = {
+    'width': (20, 25, 30),
+    'height': (20,),
+    'length': (200,),
+    'pressure': (0.25, 0.5),
+    'seedSize': (10,),
+}
+
+
+#Cartesian product of the grid, in a reproducible order
+def expandGrid(grid):
+    names = sorted(grid.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+
+#With a ResultCache (see ResultCache.py), points whose deck was solved before are not solved again
+def runCantileverSweep(grid=cantileverSweepGrid, prefix='CantileverSweep', maxConcurrentJobs=None, numCpusPerJob=1, workingDirectory='.', keepModels=False, cache=None):
+    points = expandGrid(grid)
+    rows = []
+    farmJobs = []
+    cacheKeys = {}
+    buildStart = time.time()
+    for index, point in enumerate(points):
+        name = '%s_%03d' % (prefix, index)
+        CantileverBeam.buildCantileverModel(modelName=name, **point)
+        cantileverJob = CantileverBeam.createCantileverJob(jobName=name, modelName=name, numCpus=numCpusPerJob)
+        previousDirectory = os.getcwd()
+        os.chdir(workingDirectory)
+        try:
+            cantileverJob.writeInput(consistencyChecking=OFF)
+        finally:
+            os.chdir(previousDirectory)
+        #The deck holds everything the solver needs, drop the model so hundreds of points do not pile up in the mdb
+        if not keepModels:
+            del mdb.models[name]
+            del mdb.jobs[name]
+        row = dict(point)
+        row.update({'job': name, 'status': 'PENDING', 'tipDeflection': None, 'peakMises': None, 'wallTime': None})
+        rows.append(row)
+        if cache is not None:
+            cacheKeys[name] = cache.key(os.path.join(workingDirectory, name + '.inp'))
+            cachedResults = cache.get(cacheKeys[name])
+            if cachedResults is not None:
+                row.update(cachedResults)
+                row.update({'status': 'CACHED', 'wallTime': 0.0})
+                continue
+        farmJobs.append(JobFarm.FarmJob(name, numCpus=numCpusPerJob))
+    buildTime = time.time() - buildStart
+
+    rowsByJob = dict([(row['job'], row) for row in rows])
+    def collectResults(farmJob):
+        row = rowsByJob[farmJob.name]
+        row['status'] = farmJob.status
+        row['wallTime'] = farmJob.wallTime
+        if farmJob.status == 'COMPLETED':
+            results = CantileverBeam.extractCantileverResults(os.path.join(workingDirectory, farmJob.name + '.odb'))
+            row.update(results)
+            if cache is not None:
+                cache.put(cacheKeys[farmJob.name], results)
+    solveStart = time.time()
+    JobFarm.runJobFarm(farmJobs, maxConcurrentJobs=maxConcurrentJobs, workingDirectory=workingDirectory, onFinished=collectResults)
+    solveTime = time.time() - solveStart
+    print('Cantilever sweep: %d points, %d solved, %.2f s building decks, %.2f s solving' % (len(points), len(farmJobs), buildTime, solveTime))
+    return rows
+
+
+if __name__ == '__main__':
+    cantileverRows = runCantileverSweep()
+    JobFarm.writeResultTable(cantileverRows, 'CantileverSweep.csv')
@@ -0,0 +1,435 @@
+#Streaming readers for the printed tables (.dat) and the binary results file (.fil) of Abaqus/Standard
+#Both files are written by the solver itself, so results can be post-processed on machines without an
+#Abaqus license and without opening the output database. requestResultsFiles() adds the print and file
+#requests to a step of a model: the builders of CantileverBeam.py, ConnectingLug.py and OverheadHoist.py
+#take resultsFiles=True.
+#The files are read blockSize bytes at a time and the values are collected into preallocated arrays of
+#maxValues rows, yielded as ResultBlock objects, so memory stays constant whatever the size of the file.
+#The arrays of a block are reused for the next block of the same output: copy what has to be kept.
+#
+#    for block in readFil('CantileverJob.fil'):
+#        print(block.step, block.increment, block.variable, len(block), abs(block.values).max())
+#    labels, integrationPoints, stress = finalValues(readFil('CantileverJob.fil'), 'S')
+#Run: python DatFilReader.py CantileverJob.fil|CantileverJob.dat
+import re
+import sys
+
+import numpy as np
+
+defaultBlockSize = 2**22
+defaultMaxValues = 2**16
+
+#Record keys of the results file and the output they hold
+filVariables = {11: 'S', 21: 'E', 22: 'PE', 23: 'CE', 101: 'U', 102: 'V', 103: 'A', 104: 'RF', 106: 'CF', 107: 'COORD', 201: 'NT'}
+_nodalKeys = set([101, 102, 103, 104, 106, 107, 201])
+_elementHeaderKey = 1
+_incrementStartKey = 2000
+_incrementEndKey = 2001
+#Longest run of records written for one node or integration point
+_maxCycle = 64
+_locations = {0: 'INTEGRATION_POINT', 1: 'CENTROID', 2: 'ELEMENT_NODAL', 3: 'REBAR', 4: 'NODAL_AVERAGED', 5: 'WHOLE_ELEMENT'}
+
+_stepPattern = re.compile(r'S T E P\s+(\d+)')
+_incrementPattern = re.compile(r'INCREMENT\s+(\d+)\s+SUMMARY')
+_timePattern = re.compile(r'STEP TIME COMPLETED\s+([^\s,]+)\s*,\s*TOTAL TIME COMPLETED\s+(\S+)')
+_elementTypePattern = re.compile(r'ELEMENT TYPE (\S+)')
+_setPattern = re.compile(r'(?:ELEMENT|NODE) SET (\S+)')
+_fortranExponent = re.compile(r'(\d)([+-]\d+)$')
+
+
+class ResultBlock(object):
+    #Values of one output at up to maxValues nodes or integration points of one increment
+
+    def __init__(self, variable, position, columns, labels, integrationPoints, values, step, increment, stepTime, totalTime, elementType=None, setName=None):
+        self.variable = variable
+        self.position = position
+        self.columns = columns
+        self.labels = labels
+        self.integrationPoints = integrationPoints
+        self.values = values
+        self.step = step
+        self.increment = increment
+        self.stepTime = stepTime
+        self.totalTime = totalTime
+        self.elementType = elementType
+        self.setName = setName
+
+    def __len__(self):
+        return len(self.labels)
+
+    def column(self, name):
+        return self.values[:,self.columns.index(name)]
+
+
+class _Collector(object):
+    #Preallocated arrays the values of one output are collected into
+
+    def __init__(self, variable, position, columns, maxValues, elementType=None, setName=None):
+        self.variable = variable
+        self.position = position
+        self.columns = columns
+        self.elementType = elementType
+        self.setName = setName
+        self.labels = np.empty(maxValues, dtype=np.int64)
+        self.integrationPoints = np.zeros(maxValues, dtype=np.int32)
+        self.values = np.empty((maxValues, len(columns)), dtype=np.float64)
+        self.count = 0
+
+    def matches(self, position, columns, elementType=None, setName=None):
+        return (self.position, self.columns, self.elementType, self.setName) == (position, columns, elementType, setName)
+
+    def block(self, state):
+        count = self.count
+        self.count = 0
+        return ResultBlock(self.variable, self.position, self.columns, self.labels[:count], self.integrationPoints[:count],
+                           self.values[:count], *state, elementType=self.elementType, setName=self.setName)
+
+    #Add rows, yielding a block every time the arrays are full
+    def collect(self, state, labels, integrationPoints, values):
+        start = 0
+        while start < len(labels):
+            count = min(len(self.labels) - self.count, len(labels) - start)
+            end = self.count + count
+            self.labels[self.count:end] = labels[start:start+count]
+            if integrationPoints is not None:
+                self.integrationPoints[self.count:end] = integrationPoints[start:start+count]
+            self.values[self.count:end] = values[start:start+count]
+            self.count = end
+            start += count
+            if self.count == len(self.labels):
+                yield self.block(state)
+
+    def flush(self, state):
+        if self.count:
+            yield self.block(state)
+
+
+def _collector(collectors, variable, position, columns, maxValues, elementType=None, setName=None):
+    collector = collectors.get(variable)
+    if collector is None or not collector.matches(position, columns, elementType, setName):
+        collector = _Collector(variable, position, columns, maxValues, elementType, setName)
+    return collector
+
+
+#Component names of element output with ndi direct and nshr shear components
+def tensorColumns(variable, numDirect, numShear, numValues):
+    if numDirect + numShear != numValues:
+        return tuple(['%s%d' % (variable, index+1) for index in range(numValues)])
+    return tuple([variable + suffix for suffix in ('11', '22', '33')[:numDirect] + ('12', '13', '23')[:numShear]])
+
+
+#Payload of the Fortran records of a binary file, about blockSize bytes at a time
+def _filPayloads(path, blockSize):
+    filFile = open(path, 'rb')
+    marker = filFile.read(4)
+    recordSize = int(np.frombuffer(marker, dtype='<i4')[0]) if len(marker) == 4 else 0
+    if recordSize <= 0 or recordSize % 8:
+        filFile.close()
+        raise ValueError('%s is not a binary results file' % path)
+    filFile.seek(0)
+    stride = recordSize + 8
+    while True:
+        data = filFile.read(max(1, blockSize//stride)*stride)
+        if len(data) < stride:
+            break
+        records = np.frombuffer(data, dtype=np.uint8, count=len(data)//stride*stride).reshape(-1, stride)
+        if np.any(records[:,:4].copy().view('<i4') != recordSize):
+            filFile.close()
+            raise ValueError('%s has a corrupt record marker' % path)
+        yield records[:,4:4+recordSize].tobytes()
+    filFile.close()
+
+
+#ResultBlocks of every output of a binary results file (*Node File, *El File)
+#The records of consecutive nodes or integration points repeat with the same layout, so every run of
+#repeating records is converted at once from the word arrays
+def readFil(path, blockSize=defaultBlockSize, maxValues=defaultMaxValues):
+    state = (0, 0, 0.0, 0.0)
+    collectors = {}
+    header = None
+    pending = b''
+    payloads = _filPayloads(path, blockSize)
+    final = False
+    while not final:
+        payload = next(payloads, None)
+        final = payload is None
+        buffer = pending + (payload or b'')
+        numWords = len(buffer)//8
+        #Integers are read from the low half of their word, which is right for 4 and 8 byte integers
+        integers = np.frombuffer(buffer, dtype='<i4', count=2*numWords)[0::2]
+        floats = np.frombuffer(buffer, dtype='<f8', count=numWords)
+        position = 0
+        while position + 2 <= numWords:
+            length = int(integers[position])
+            if length == 0:
+                #Padding of the last block
+                final = True
+                position = numWords
+                break
+            if length < 2:
+                raise ValueError('%s has a corrupt record at word %d' % (path, position))
+            if position + length > numWords:
+                break
+            key = int(integers[position+1])
+            if key == _incrementStartKey or key == _incrementEndKey:
+                for collector in list(collectors.values()):
+                    for block in collector.flush(state):
+                        yield block
+                if key == _incrementStartKey:
+                    data = position + 2
+                    state = (int(integers[data+5]), int(integers[data+6]), float(floats[data+1]), float(floats[data]))
+                position += length
+                continue
+            if key != _elementHeaderKey and key not in filVariables:
+                position += length
+                continue
+
+            #Records written for one node or integration point: up to the next record with the same key
+            cycle = [(0, length, key)]
+            cycleLength = length
+            complete = False
+            while len(cycle) < _maxCycle:
+                start = position + cycleLength
+                if start + 2 > numWords or start + integers[start] > numWords:
+                    break
+                nextKey = int(integers[start+1])
+                if nextKey == key or (nextKey != _elementHeaderKey and nextKey not in filVariables):
+                    complete = True
+                    break
+                cycle.append((cycleLength, int(integers[start]), nextKey))
+                cycleLength += int(integers[start])
+            if not complete and not final and len(cycle) < _maxCycle:
+                break
+
+            #Number of times the cycle repeats with the same record lengths and keys
+            starts = position + cycleLength*np.arange(min((numWords - position)//cycleLength, maxValues))
+            match = np.ones(len(starts), dtype=bool)
+            for offset, recordLength, recordKey in cycle:
+                match &= (integers[starts+offset] == recordLength) & (integers[starts+offset+1] == recordKey)
+            repeats = len(match) if match.all() else int(np.argmin(match))
+            slab = slice(position, position + repeats*cycleLength)
+            cycleIntegers = integers[slab].reshape(repeats, cycleLength)
+            cycleFloats = floats[slab].reshape(repeats, cycleLength)
+            for offset, recordLength, recordKey in cycle:
+                data = offset + 2
+                if recordKey == _elementHeaderKey:
+                    header = (cycleIntegers[:,data], cycleIntegers[:,data+1], _locations.get(int(cycleIntegers[0,data+3]), 'INTEGRATION_POINT'),
+                              int(cycleIntegers[0,data+5]), int(cycleIntegers[0,data+6]))
+                    continue
+                variable = filVariables[recordKey]
+                if recordKey in _nodalKeys:
+                    labels = cycleIntegers[:,data]
+                    integrationPoints = None
+                    values = cycleFloats[:,data+1:offset+recordLength]
+                    columns = tensorColumns(variable, 0, 0, values.shape[1])
+                    location = 'NODAL'
+                elif header is not None:
+                    labels, integrationPoints, location, numDirect, numShear = header
+                    if len(labels) != repeats:
+                        labels = np.repeat(labels[-1:], repeats)
+                        integrationPoints = np.repeat(integrationPoints[-1:], repeats)
+                    values = cycleFloats[:,data:offset+recordLength]
+                    columns = tensorColumns(variable, numDirect, numShear, values.shape[1])
+                else:
+                    continue
+                collector = _collector(collectors, variable, location, columns, maxValues)
+                if collectors.get(variable) is not collector:
+                    if variable in collectors:
+                        for block in collectors[variable].flush(state):
+                            yield block
+                    collectors[variable] = collector
+                for block in collector.collect(state, labels, integrationPoints, values):
+                    yield block
+            if header is not None:
+                header = tuple([item[-1:] if isinstance(item, np.ndarray) else item for item in header])
+            position += repeats*cycleLength
+        pending = buffer[8*position:]
+    payloads.close()
+    for collector in collectors.values():
+        for block in collector.flush(state):
+            yield block
+
+
+def _lines(path, blockSize):
+    datFile = open(path, 'rb')
+    tail = b''
+    while True:
+        data = datFile.read(blockSize)
+        if not data:
+            break
+        lines = (tail + data).split(b'\n')
+        tail = lines.pop()
+        for line in lines:
+            yield line.decode('latin-1')
+    if tail:
+        yield tail.decode('latin-1')
+    datFile.close()
+
+
+def _toFloat(token):
+    try:
+        return float(token)
+    except ValueError:
+        #Fortran drops the E of three digit exponents: 1.234-100
+        return float(_fortranExponent.sub(r'\1E\2', token))
+
+
+def _isNumber(token):
+    try:
+        _toFloat(token)
+        return True
+    except ValueError:
+        return False
+
+
+def _tableValues(tokens, numColumns):
+    try:
+        return np.array(tokens, dtype=np.float64).reshape(-1, numColumns)
+    except ValueError:
+        return np.array([_toFloat(token) for token in tokens], dtype=np.float64).reshape(-1, numColumns)
+
+
+#Output variables of the columns of a printed table: U1 U2 RF1 RF2 -> 'U RF'
+def tableVariable(columns):
+    variables = []
+    for column in columns:
+        match = re.match('[A-Z]+', column)
+        name = match.group() if match else column
+        if name not in variables:
+            variables.append(name)
+    return ' '.join(variables)
+
+
+#ResultBlocks of the printed node and element tables of a .dat file (*Node Print, *El Print)
+def readDat(path, blockSize=defaultBlockSize, maxValues=defaultMaxValues):
+    step, increment, stepTime, totalTime = 0, 0, 0.0, 0.0
+    collectors = {}
+    nodeOutput = True
+    position = 'NODAL'
+    elementType = None
+    setName = None
+    collector = None
+    rowsStarted = False
+    tokens = []
+    for line in _lines(path, blockSize):
+        if collector is not None:
+            fields = line.split()
+            if fields and fields[0].isdigit():
+                rowsStarted = True
+                if len(fields) != numColumns:
+                    fields = [field for field in fields if _isNumber(field)]
+                if len(fields) == numColumns:
+                    tokens += fields
+                if len(tokens) >= maxValues*numColumns:
+                    rows = _tableValues(tokens, numColumns)
+                    tokens = []
+                    for block in collector.collect(state, rows[:,0], rows[:,1] if numIndex > 1 else None, rows[:,numIndex:]):
+                        yield block
+                continue
+            if not fields or not rowsStarted:
+                continue
+            #End of the table
+            if tokens:
+                rows = _tableValues(tokens, numColumns)
+                tokens = []
+                for block in collector.collect(state, rows[:,0], rows[:,1] if numIndex > 1 else None, rows[:,numIndex:]):
+                    yield block
+            for block in collector.flush(state):
+                yield block
+            collector = None
+        if 'FOOT-' in line:
+            fields = line.split()
+            numIndex = fields.index('FOOT-')
+            columns = tuple(fields[numIndex+1:])
+            numColumns = numIndex + len(columns)
+            variable = tableVariable(columns)
+            state = (step, increment, stepTime, totalTime)
+            collector = _collector(collectors, variable, position, columns, maxValues, elementType, setName)
+            collectors[variable] = collector
+            rowsStarted = False
+            continue
+        match = _stepPattern.search(line)
+        if match:
+            step = int(match.group(1))
+            increment, stepTime = 0, 0.0
+            continue
+        match = _incrementPattern.search(line)
+        if match:
+            increment = int(match.group(1))
+            continue
+        match = _timePattern.search(line)
+        if match:
+            stepTime, totalTime = _toFloat(match.group(1)), _toFloat(match.group(2))
+            continue
+        if 'E L E M E N T   O U T P U T' in line:
+            nodeOutput = False
+            position = 'INTEGRATION_POINT'
+            elementType = setName = None
+        elif 'N O D E   O U T P U T' in line:
+            nodeOutput = True
+            position = 'NODAL'
+            elementType = setName = None
+        elif 'THE FOLLOWING TABLE IS PRINTED' in line:
+            match = _elementTypePattern.search(line)
+            elementType = match.group(1) if match else None
+            match = _setPattern.search(line)
+            setName = match.group(1) if match else None
+            if not nodeOutput:
+                position = 'CENTROID' if 'CENTROID' in line else 'ELEMENT_NODAL' if 'AT THE NODES' in line else 'INTEGRATION_POINT'
+    if collector is not None:
+        if tokens:
+            rows = _tableValues(tokens, numColumns)
+            for block in collector.collect(state, rows[:,0], rows[:,1] if numIndex > 1 else None, rows[:,numIndex:]):
+                yield block
+        for block in collector.flush(state):
+            yield block
+
+
+def readResults(path, blockSize=defaultBlockSize, maxValues=defaultMaxValues):
+    if path.lower().endswith('.dat'):
+        return readDat(path, blockSize, maxValues)
+    return readFil(path, blockSize, maxValues)
+
+
+#Labels, integration points and values of variable in the last increment of the blocks, as copies
+def finalValues(blocks, variable):
+    parts = []
+    current = None
+    for block in blocks:
+        if variable not in block.variable.split():
+            continue
+        if (block.step, block.increment) != current:
+            current = (block.step, block.increment)
+            parts = []
+        columns = [index for index, column in enumerate(block.columns) if tableVariable((column,)) == variable]
+        parts.append((block.labels.copy(), block.integrationPoints.copy(), block.values[:,columns].copy()))
+    if not parts:
+        return None
+    return tuple([np.concatenate([part[index] for part in parts]) for index in range(3)])
+
+
+#Add *El Print/*Node Print (.dat) and *El File/*Node File (.fil) requests to a step of a model
+def requestResultsFiles(modelName, stepName, nodeVariables=('U', 'RF'), elementVariables=('S', 'E'), printed=True, resultsFile=True, frequency=1):
+    from abaqus import mdb
+    keywordBlock = mdb.models[modelName].keywordBlock
+    keywordBlock.synchVersions(storeNodesAndElements=False)
+    lines = []
+    for keyword, variables, enabled in (('*El Print', elementVariables, printed), ('*Node Print', nodeVariables, printed),
+                                        ('*El File', elementVariables, resultsFile), ('*Node File', nodeVariables, resultsFile)):
+        if enabled and variables:
+            lines += ['%s, frequency=%d' % (keyword, frequency), ', '.join(variables)]
+    inStep = False
+    for position, block in enumerate(keywordBlock.sieBlocks):
+        firstLine = block.split('\n')[0]
+        if firstLine.upper().startswith('*STEP') and ('name=%s,' % stepName in firstLine + ',' or 'name="%s"' % stepName in firstLine):
+            inStep = True
+        elif inStep and firstLine.upper().startswith('*END STEP'):
+            keywordBlock.insert(position-1, '\n'.join(lines))
+            return
+    raise ValueError('No step %s in the keywords of model %s' % (stepName, modelName))
+
+
+if __name__ == '__main__':
+    for resultBlock in readResults(sys.argv[1]):
+        print('Step %d increment %d (%g): %-8s %-18s %7d values  max |value| %.6e' % (resultBlock.step, resultBlock.increment, resultBlock.totalTime,
+              resultBlock.variable, resultBlock.position, len(resultBlock), np.abs(resultBlock.values).max() if len(resultBlock) else 0.0))
@@ -0,0 +1,291 @@
+#Map field outputs from one mesh onto another, to compare runs across seed sizes or code versions without contour plots
+#Target points are located in the source mesh with a KD-tree of the source element centroids: the nearest elements
+#are tried in turn, and the natural coordinates of the point in each are found by vectorized Newton iterations on
+#the element shape functions. Nodal outputs (U) are interpolated with the shape functions of the element,
+#integration point outputs (S, E) with the shape functions of the integration point lattice (2x2x2 for C3D8 and
+#C3D20R, 2x2 for S4 and S8R5, a constant for reduced integration C3D8R and S4R). Shell outputs are compared
+#section point by section point (S_SNEG, S_SPOS), not averaged through the thickness.
+#Points are processed chunkSize at a time, so memory stays bounded for millions of target points.
+#Points outside the source mesh take the value of the nearest point of the nearest element and are reported.
+#Solid hexahedra (8 and 20 nodes) and planar quadrilaterals (4 and 8 nodes, in the xy plane) are supported.
+#Compare two output databases: python FieldMapping.py CantileverJob.odb CantileverFine.odb [U S E]
+import sys
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+defaultVariables = ('U', 'S', 'E')
+
+#Natural coordinates of the nodes in Abaqus node order, keyed by VTK cell type (see VtuExporter.py)
+_hexCorners = [(-1,-1,-1), (1,-1,-1), (1,1,-1), (-1,1,-1), (-1,-1,1), (1,-1,1), (1,1,1), (-1,1,1)]
+_quadCorners = [(-1,-1), (1,-1), (1,1), (-1,1)]
+_elementNodes = {
+    12: (np.array(_hexCorners, dtype=np.float64), False),
+    25: (np.array(_hexCorners + [(0,-1,-1), (1,0,-1), (0,1,-1), (-1,0,-1), (0,-1,1), (1,0,1), (0,1,1), (-1,0,1),
+                                 (-1,-1,0), (1,-1,0), (1,1,0), (-1,1,0)], dtype=np.float64), True),
+    9: (np.array(_quadCorners, dtype=np.float64), False),
+    23: (np.array(_quadCorners + [(0,-1), (1,0), (0,1), (-1,0)], dtype=np.float64), True),
+}
+
+
+#Natural coordinates of the nodes of a VTK cell type and whether the element is quadratic
+def elementNodes(cellType):
+    if cellType not in _elementNodes:
+        raise ValueError('Field mapping supports 8 and 20 node hexahedra and 4 and 8 node quadrilaterals, not VTK cell type %d' % cellType)
+    return _elementNodes[cellType]
+
+
+#Integration points of a full Gauss lattice, numbered with the first natural coordinate varying fastest
+def _latticeSigns(dimension):
+    grid = np.indices((2,)*dimension).reshape(dimension, -1)[::-1].T
+    return 2.0*grid - 1.0
+
+
+#Serendipity shape functions and their natural derivatives at xi (points, dimension) for nodes at natural (nodes, dimension)
+#Every node is a product of one factor per coordinate: 1 + xi*xiNode, or 1 - xi^2 where the node is at 0;
+#the corner nodes of quadratic elements are multiplied by sum(xi*xiNode) - (dimension - 1)
+def shapeFunctions(xi, natural, quadratic):
+    dimension = natural.shape[1]
+    xi = xi[:,np.newaxis,:]
+    midside = natural == 0
+    factor = np.where(midside, 1.0 - xi*xi, 1.0 + xi*natural)
+    factorDerivative = np.where(midside, -2.0*xi, natural + 0.0*xi)
+    scale = 0.5**(dimension - midside.sum(axis=1))
+    #Product of the other factors of every coordinate, from running products before and after it
+    before = np.ones(factor.shape)
+    after = np.ones(factor.shape)
+    for axis in range(1, dimension):
+        before[:,:,axis] = before[:,:,axis-1]*factor[:,:,axis-1]
+        after[:,:,dimension-1-axis] = after[:,:,dimension-axis]*factor[:,:,dimension-axis]
+    shape = scale*before[:,:,-1]*factor[:,:,-1]
+    derivatives = scale[:,np.newaxis]*factorDerivative*before*after
+    if quadratic:
+        corner = ~midside.any(axis=1)
+        correction = (xi*natural).sum(axis=2) - (dimension - 1)
+        derivatives = np.where(corner[np.newaxis,:,np.newaxis], derivatives*correction[:,:,np.newaxis] + shape[:,:,np.newaxis]*natural, derivatives)
+        shape = np.where(corner, shape*correction, shape)
+    return shape, derivatives
+
+
+class FieldMesh(object):
+    #Nodes, connectivity (node indices) of one element type, and the fields of one frame on them
+
+    def __init__(self, points, elements, cellType, nodalFields=None, elementFields=None):
+        self.natural, self.quadratic = elementNodes(cellType)
+        self.dimension = self.natural.shape[1]
+        self.points = np.asarray(points, dtype=np.float64)[:,:self.dimension]
+        self.elements = np.asarray(elements, dtype=np.int64)
+        self.cellType = cellType
+        #nodalFields[name] is (nodes, components), elementFields[name] is (elements, integration points, components)
+        self.nodalFields = nodalFields or {}
+        self.elementFields = elementFields or {}
+        self.tree = None
+
+    def centroidTree(self):
+        if self.tree is None:
+            self.tree = cKDTree(self.points[self.elements].mean(axis=1))
+        return self.tree
+
+    #Global coordinates of the integration points of every element, (elements*integration points, dimension)
+    def integrationPointCoordinates(self, numIntegrationPoints):
+        lattice = _integrationLattice(self.dimension, numIntegrationPoints)
+        shape = shapeFunctions(lattice, self.natural, self.quadratic)[0]
+        coordinates = np.empty((len(self.elements), len(lattice), self.dimension))
+        for start in range(0, len(self.elements), 65536):
+            block = self.elements[start:start+65536]
+            coordinates[start:start+len(block)] = np.einsum('gk,ekd->egd', shape, self.points[block])
+        return coordinates.reshape(-1, self.dimension)
+
+
+def _integrationLattice(dimension, numIntegrationPoints):
+    if numIntegrationPoints == 1:
+        return np.zeros((1, dimension))
+    if numIntegrationPoints == 2**dimension:
+        return _latticeSigns(dimension)/np.sqrt(3.0)
+    raise ValueError('No integration point lattice with %d points in %d dimensions' % (numIntegrationPoints, dimension))
+
+
+#Natural coordinates of targets (points, dimension) in the given elements, by Newton iterations from the centre
+#Only the points still moving are iterated; xi is kept within [-2, 2] so points far outside an element stop early
+def naturalCoordinates(mesh, elements, targets, iterations=12, tolerance=1E-10):
+    coordinates = mesh.points[mesh.elements[elements]]
+    transposed = coordinates.transpose(0, 2, 1)
+    xi = np.zeros((len(elements), mesh.dimension))
+    active = np.arange(len(elements))
+    for iteration in range(iterations):
+        shape, derivatives = shapeFunctions(xi[active], mesh.natural, mesh.quadratic)
+        residual = targets[active] - np.matmul(shape[:,np.newaxis,:], coordinates[active])[:,0]
+        jacobian = np.matmul(transposed[active], derivatives)
+        #Degenerate elements (zero volume) leave their points where they are
+        singular = np.abs(np.linalg.det(jacobian)) <= 1E-300
+        jacobian[singular] = np.eye(mesh.dimension)
+        residual[singular] = 0.0
+        step = np.linalg.solve(jacobian, residual[:,:,np.newaxis])[:,:,0]
+        updated = np.clip(xi[active] + step, -2.0, 2.0)
+        moving = np.abs(updated - xi[active]).max(axis=1) > tolerance
+        xi[active] = updated
+        active = active[moving]
+        if not len(active):
+            break
+    return xi
+
+
+#Element and natural coordinates of every target point; outside is the distance of points not inside any element tried
+def locatePoints(mesh, targets, candidates=8, insideTolerance=1E-6):
+    targets = np.asarray(targets, dtype=np.float64)[:,:mesh.dimension]
+    nearest = mesh.centroidTree().query(targets, k=min(candidates, len(mesh.elements)), workers=-1)[1].reshape(len(targets), -1)
+    element = nearest[:,0].copy()
+    xi = np.zeros((len(targets), mesh.dimension))
+    bestExcess = np.full(len(targets), np.inf)
+    pending = np.arange(len(targets))
+    for rank in range(nearest.shape[1]):
+        if not len(pending):
+            break
+        tried = nearest[pending, rank]
+        triedXi = naturalCoordinates(mesh, tried, targets[pending])
+        excess = np.abs(triedXi).max(axis=1) - 1.0
+        better = excess < bestExcess[pending]
+        element[pending[better]] = tried[better]
+        xi[pending[better]] = triedXi[better]
+        bestExcess[pending[better]] = excess[better]
+        pending = pending[excess > insideTolerance]
+    #Points outside the mesh: the nearest point of the best element
+    outside = np.zeros(len(targets))
+    if len(pending):
+        xi[pending] = np.clip(xi[pending], -1.0, 1.0)
+        shape = shapeFunctions(xi[pending], mesh.natural, mesh.quadratic)[0]
+        projected = np.einsum('nk,nkd->nd', shape, mesh.points[mesh.elements[element[pending]]])
+        outside[pending] = np.linalg.norm(targets[pending] - projected, axis=1)
+    return element, xi, outside
+
+
+#Fields of a mesh holding the given variables: the variable itself, or one field per section point of shell
+#element outputs (S_SNEG, S_SPOS for S)
+def fieldNames(mesh, variables):
+    names = []
+    for variable in variables:
+        for name in list(mesh.nodalFields) + list(mesh.elementFields):
+            if (name == variable or name.startswith(variable + '_')) and name not in names:
+                names.append(name)
+    return names
+
+
+#Fields of source interpolated at target points, chunkSize points at a time
+#Returns {field: (points, components)} and the distance of every point outside the source mesh (0 inside)
+def mapFields(source, targets, variables=defaultVariables, chunkSize=16384, candidates=8):
+    targets = np.asarray(targets, dtype=np.float64)
+    mapped = {}
+    for variable in fieldNames(source, variables):
+        if variable in source.nodalFields:
+            mapped[variable] = np.empty((len(targets), source.nodalFields[variable].shape[1]))
+        elif variable in source.elementFields:
+            mapped[variable] = np.empty((len(targets), source.elementFields[variable].shape[2]))
+    outside = np.empty(len(targets))
+    for start in range(0, len(targets), chunkSize):
+        span = slice(start, min(start+chunkSize, len(targets)))
+        element, xi, outside[span] = locatePoints(source, targets[span], candidates)
+        nodeShape = None
+        for variable in mapped:
+            if variable in source.nodalFields:
+                if nodeShape is None:
+                    nodeShape = shapeFunctions(xi, source.natural, source.quadratic)[0]
+                values = source.nodalFields[variable][source.elements[element]]
+                mapped[variable][span] = np.matmul(nodeShape[:,np.newaxis,:], values)[:,0]
+            else:
+                values = source.elementFields[variable][element]
+                numIntegrationPoints = values.shape[1]
+                if numIntegrationPoints == 1:
+                    mapped[variable][span] = values[:,0]
+                else:
+                    #Shape functions of the integration point lattice, extrapolating beyond it towards the element faces
+                    lattice = _latticeSigns(source.dimension)
+                    if numIntegrationPoints != len(lattice):
+                        raise ValueError('No integration point lattice with %d points in %d dimensions' % (numIntegrationPoints, source.dimension))
+                    pointShape = shapeFunctions(xi*np.sqrt(3.0), lattice, False)[0]
+                    mapped[variable][span] = np.matmul(pointShape[:,np.newaxis,:], values)[:,0]
+    return mapped, outside
+
+
+#Differences target - source of every variable, at the target nodes (nodal outputs) and target integration points
+def compareFields(source, target, variables=defaultVariables, chunkSize=16384):
+    comparison = {}
+    for variable in fieldNames(target, variables):
+        if variable in target.nodalFields and variable in source.nodalFields:
+            points = target.points
+            targetValues = target.nodalFields[variable]
+        elif variable in target.elementFields and (variable in source.elementFields or variable in source.nodalFields):
+            targetValues = target.elementFields[variable]
+            points = target.integrationPointCoordinates(targetValues.shape[1])
+            targetValues = targetValues.reshape(-1, targetValues.shape[2])
+        else:
+            continue
+        mapped, outside = mapFields(source, points, (variable,), chunkSize)
+        difference = targetValues - mapped[variable]
+        comparison[variable] = dict(fieldNorms(difference, targetValues), difference=difference, outside=int((outside > 0).sum()))
+    return comparison
+
+
+def fieldNorms(difference, reference):
+    referenceNorm = np.sqrt((reference*reference).sum())
+    return {'maxAbs': float(np.abs(difference).max()) if difference.size else 0.0,
+            'rms': float(np.sqrt((difference*difference).mean())) if difference.size else 0.0,
+            'relativeL2': float(np.sqrt((difference*difference).sum())/referenceNorm) if referenceNorm > 0 else 0.0}
+
+
+#Mesh and fields of one frame of an output database, through the mesh reader of VtuExporter.py
+def readOdbFields(odbPath, stepName=None, frameIndex=-1, variables=defaultVariables):
+    from odbAccess import openOdb
+    from VtuExporter import OdbMesh, sectionPointName
+    odb = openOdb(path=odbPath, readOnly=True)
+    try:
+        mesh = OdbMesh(odb)
+        cellTypes = np.unique(mesh.cellTypes)
+        if len(cellTypes) != 1:
+            raise ValueError('%s mixes element types, field mapping needs one' % odbPath)
+        elements = mesh.connectivity.reshape(mesh.numCells, -1)
+        frame = odb.steps[stepName or odb.steps.keys()[-1]].frames[frameIndex]
+        nodalFields = {}
+        elementFields = {}
+        for variable in variables:
+            if variable not in frame.fieldOutputs.keys():
+                continue
+            blocks = [block for block in frame.fieldOutputs[variable].bulkDataBlocks if block.instance is not None]
+            if not blocks:
+                continue
+            numComponents = np.asarray(blocks[0].data).reshape(len(blocks[0].data), -1).shape[1]
+            if str(blocks[0].position) == 'NODAL':
+                values = np.zeros((mesh.numPoints, numComponents))
+                for block in blocks:
+                    values[mesh.nodeIndex[block.instance.name][block.nodeLabels]] = np.asarray(block.data).reshape(-1, numComponents)
+                nodalFields[variable] = values
+            elif str(blocks[0].position) == 'INTEGRATION_POINT':
+                numIntegrationPoints = max([int(np.max(block.integrationPoints)) for block in blocks])
+                #Shells repeat each integration point for every section point: one field per section point (S_SNEG,
+                #S_SPOS), averaging them would leave only the membrane part of a bent shell
+                sums = {}
+                counts = {}
+                for block in blocks:
+                    sectionName = sectionPointName(block.sectionPoint)
+                    name = variable if sectionName is None else '%s_%s' % (variable, sectionName)
+                    if name not in sums:
+                        sums[name] = np.zeros((mesh.numCells, numIntegrationPoints, numComponents))
+                        counts[name] = np.zeros((mesh.numCells, numIntegrationPoints))
+                    index = (mesh.elementIndex[block.instance.name][block.elementLabels], np.asarray(block.integrationPoints) - 1)
+                    np.add.at(sums[name], index, np.asarray(block.data).reshape(-1, numComponents))
+                    np.add.at(counts[name], index, 1.0)
+                for name in sums:
+                    elementFields[name] = sums[name]/np.maximum(counts[name], 1.0)[:,:,np.newaxis]
+    finally:
+        odb.close()
+    return FieldMesh(mesh.points, elements, int(cellTypes[0]), nodalFields, elementFields)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit('Usage: FieldMapping.py SOURCE.odb TARGET.odb [VARIABLE ...]')
+    mappingVariables = tuple(sys.argv[3:]) or defaultVariables
+    sourceMesh = readOdbFields(sys.argv[1], variables=mappingVariables)
+    targetMesh = readOdbFields(sys.argv[2], variables=mappingVariables)
+    for name, norms in sorted(compareFields(sourceMesh, targetMesh, mappingVariables).items()):
+        print('%-8s max |difference| %.6g  rms %.6g  relative L2 %.4g  points outside source %d' % (
+            name, norms['maxAbs'], norms['rms'], norms['relativeL2'], norms['outside']))
@@ -0,0 +1,165 @@
+#Spatial index for picking cells, faces, edges and vertices of a part or an instance
+#findAt() on a geometry sequence searches the whole sequence once per point. PickIndex reads the bounding
+#box of every entity once and then answers batched point and box queries with NumPy (and a SciPy KD-tree
+#over the box centres when SciPy is available). A point inside exactly one box is resolved by the index once
+#getClosest() confirms that it lies on that entity (one batched call, vertices need none); points inside several
+#boxes, or off their entity, are passed to the kernel findAt().
+#The index rebuilds itself when the number of entities changes, which every partition does,
+#and can be invalidated explicitly with invalidate().
+#
+#    conLugIndex = PickIndex(conLugPart)
+#    cells = conLugIndex.cells.findAt(((-0.0625,0,0.01), (-0.0625,0.02,0.01)))
+#    conLugPart.PartitionCellByDatumPlane(datumPlane=conLugPart.datums[3], cells=cells)
+#    cells = conLugIndex.cells.findAt(((-0.0625,0.02,0.01),))      #rebuilt after the partition
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+#Points per block when testing points against all boxes without a KD-tree
+_chunkSize = 1024
+
+
+class EntityIndex(object):
+
+    def __init__(self, owner, kind, tolerance=1E-6):
+        self.owner = owner
+        self.kind = kind
+        self.tolerance = tolerance
+        self.numBuilds = 0
+        self.numConfirmations = 0
+        self.numKernelFallbacks = 0
+        self.invalidate()
+
+    def invalidate(self):
+        self._count = None
+        self._low = None
+        self._high = None
+        self._tree = None
+
+    @property
+    def sequence(self):
+        return getattr(self.owner, self.kind)
+
+    def _boundingBox(self, sequence, index):
+        if self.kind == 'vertices':
+            point = sequence[index].pointOn[0]
+            return point, point
+        box = sequence[index:index+1].getBoundingBox()
+        return box['low'], box['high']
+
+    def _build(self):
+        sequence = self.sequence
+        count = len(sequence)
+        if count == self._count:
+            return sequence
+        low = np.zeros((count, 3))
+        high = np.zeros((count, 3))
+        for index in range(count):
+            low[index], high[index] = self._boundingBox(sequence, index)
+        self._low = low - self.tolerance
+        self._high = high + self.tolerance
+        self._tree = None
+        if cKDTree is not None and count:
+            self._tree = cKDTree(0.5*(self._low + self._high))
+            self._radius = 0.5*np.sqrt(((self._high - self._low)**2).sum(axis=1)).max()
+        self._count = count
+        self.numBuilds += 1
+        return sequence
+
+    #Entities whose bounding box contains each point, as a list of index arrays
+    def candidates(self, points):
+        self._build()
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        if self._count == 0:
+            return [np.zeros(0, dtype=np.int64) for point in points]
+        if self._tree is not None:
+            neighbours = self._tree.query_ball_point(points, self._radius)
+            result = []
+            for point, near in zip(points, neighbours):
+                near = np.asarray(near, dtype=np.int64)
+                inside = np.all((self._low[near] <= point) & (point <= self._high[near]), axis=1)
+                result.append(np.sort(near[inside]))
+            return result
+        result = []
+        for start in range(0, len(points), _chunkSize):
+            block = points[start:start+_chunkSize]
+            inside = np.all((self._low[None,:,:] <= block[:,None,:]) & (block[:,None,:] <= self._high[None,:,:]), axis=2)
+            result += [np.nonzero(row)[0] for row in inside]
+        return result
+
+    #Entity index at every point, None where the boxes cannot tell and the kernel has to be asked
+    def indicesAt(self, points):
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        indices = [int(near[0]) if len(near) == 1 else None for near in self.candidates(points)]
+        if self.kind != 'vertices':
+            self._confirm(points, indices)
+        return indices
+
+    #A point inside a single box may still be off the entity (beside a curved edge, in the hole of a face,
+    #outside a cell), where findAt() finds nothing. Hits whose closest entity is another one, or further
+    #than the tolerance, are left to the kernel
+    def _confirm(self, points, indices):
+        single = [position for position, index in enumerate(indices) if index is not None]
+        if not single:
+            return
+        self.numConfirmations += 1
+        closest = self.sequence.getClosest(coordinates=[tuple(points[position]) for position in single], searchTolerance=2*self.tolerance)
+        for key, position in enumerate(single):
+            entity, closestPoint = closest.get(key, (None, None))
+            if entity is None or entity.index != indices[position] or np.linalg.norm(np.subtract(closestPoint, points[position])) > self.tolerance:
+                indices[position] = None
+
+    def _sequenceOf(self, sequence, indices):
+        result = None
+        for index in indices:
+            item = sequence[index:index+1]
+            result = item if result is None else result + item
+        return result
+
+    #Same entities as sequence.findAt((p1,), (p2,), ...), in the order of the points and without duplicates.
+    #Consecutive points the index cannot resolve go to the kernel findAt() in one call
+    def findAt(self, points):
+        sequence = self._build()
+        points = [tuple(point) for point in points]
+        runs = []
+        for point, index in zip(points, self.indicesAt(points)):
+            if runs and runs[-1][0] == (index is None):
+                runs[-1][1].append(point if index is None else index)
+            else:
+                runs.append((index is None, [point if index is None else index]))
+        if len(runs) == 1 and runs[0][0]:
+            self.numKernelFallbacks += 1
+            return sequence.findAt(*[(point,) for point in runs[0][1]])
+        ordered = []
+        for kernel, items in runs:
+            if kernel:
+                self.numKernelFallbacks += 1
+                items = [entity.index for entity in sequence.findAt(*[(point,) for point in items])]
+            for index in items:
+                if index not in ordered:
+                    ordered.append(index)
+        return self._sequenceOf(sequence, ordered)
+
+    #Entities whose bounding box lies completely inside the box from low to high
+    def getByBoundingBox(self, low, high):
+        sequence = self._build()
+        inside = np.all((self._low + self.tolerance >= np.asarray(low) - self.tolerance) & (self._high - self.tolerance <= np.asarray(high) + self.tolerance), axis=1)
+        return self._sequenceOf(sequence, np.nonzero(inside)[0].tolist())
+
+
+class PickIndex(object):
+    #Indexes of the cells, faces, edges and vertices of one part or instance, each built on first use
+
+    def __init__(self, owner, tolerance=1E-6):
+        self.owner = owner
+        self.cells = EntityIndex(owner, 'cells', tolerance)
+        self.faces = EntityIndex(owner, 'faces', tolerance)
+        self.edges = EntityIndex(owner, 'edges', tolerance)
+        self.vertices = EntityIndex(owner, 'vertices', tolerance)
+
+    def invalidate(self):
+        for entityIndex in (self.cells, self.faces, self.edges, self.vertices):
+            entityIndex.invalidate()
@@ -0,0 +1,219 @@
+#Model description that writes an Abaqus input deck directly, without the CAE kernel
+#An InpModel holds parts (nodes, elements, element sets, sections), one instance per part,
+#assembly sets and surfaces, materials, initial boundary conditions and steps. deckText() formats it the same way every time:
+#fixed keyword order, shortest round-trip number format, no date or version stamps,
+#so two decks of the same model are byte identical and can be diffed, hashed and cached
+import numpy as np
+
+
+def formatNumber(value):
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return '%d' % value
+    return repr(float(value))
+
+
+def formatName(name):
+    return '"%s"' % name if (' ' in name or ',' in name) else name
+
+
+def dataLines(rows, perLine=16):
+    lines = []
+    for row in rows:
+        row = list(row)
+        for start in range(0, len(row), perLine):
+            lines.append(', '.join([formatNumber(value) for value in row[start:start+perLine]]))
+    return lines
+
+
+def labelLines(labels, perLine=16):
+    labels = [int(label) for label in labels]
+    return [', '.join(['%d' % label for label in labels[start:start+perLine]]) for start in range(0, len(labels), perLine)]
+
+
+class InpPart(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.nodes = np.zeros((0, 3))
+        self.elementBlocks = []
+        self.elementSets = []
+        self.sections = []
+
+    #Node labels are 1..N in the order of the coordinate array
+    def setNodes(self, coordinates):
+        self.nodes = np.asarray(coordinates, dtype=np.float64)
+
+    #connectivity holds node labels, element labels follow on from the previous block
+    def addElements(self, elementType, connectivity, elset=None):
+        connectivity = np.asarray(connectivity, dtype=np.int64)
+        first = 1 + sum([len(block[2]) for block in self.elementBlocks])
+        labels = np.arange(first, first+len(connectivity))
+        self.elementBlocks.append((elementType, labels, connectivity, elset))
+        return labels
+
+    #Part element sets are what sections are assigned to
+    def addElementSet(self, name, labels):
+        self.elementSets.append((name, np.unique(np.asarray(labels, dtype=np.int64))))
+
+    def addShellSection(self, elset, material, thickness, integrationPoints=5, offset=0.0):
+        self.sections.append(('*Shell Section, elset=%s, material=%s, offset=%s' % (formatName(elset), formatName(material), formatNumber(offset)),
+                              ['%s, %d' % (formatNumber(thickness), integrationPoints)]))
+
+    def addSolidSection(self, elset, material):
+        self.sections.append(('*Solid Section, elset=%s, material=%s' % (formatName(elset), formatName(material)), [',']))
+
+    def addTrussSection(self, elset, material, area):
+        self.sections.append(('*Solid Section, elset=%s, material=%s' % (formatName(elset), formatName(material)), ['%s,' % formatNumber(area)]))
+
+    def lines(self):
+        lines = ['*Part, name=%s' % formatName(self.name), '*Node']
+        for label, coordinates in enumerate(self.nodes.tolist()):
+            lines.append('%d, %s' % (label+1, ', '.join([formatNumber(value) for value in coordinates])))
+        for elementType, labels, connectivity, elset in self.elementBlocks:
+            lines.append('*Element, type=%s' % elementType + (', elset=%s' % formatName(elset) if elset else ''))
+            for label, nodes in zip(labels.tolist(), connectivity.tolist()):
+                lines.append('%d, %s' % (label, ', '.join(['%d' % node for node in nodes])))
+        for name, labels in self.elementSets:
+            lines.append('*Elset, elset=%s' % formatName(name))
+            lines += labelLines(labels)
+        for keywordLine, data in self.sections:
+            lines.append(keywordLine)
+            lines += data
+        lines.append('*End Part')
+        return lines
+
+
+class InpStep(object):
+
+    #procedure is the keyword line and data lines of the analysis procedure, e.g. ('*Static', ['1., 1., 1e-05, 1.'])
+    def __init__(self, name, procedure, description='', nlgeom=False):
+        self.name = name
+        self.procedure = procedure
+        self.description = description
+        self.nlgeom = nlgeom
+        self.boundaries = []
+        self.loads = []
+        self.outputs = []
+
+    def addBoundary(self, nodeSet, firstDof, lastDof=None, magnitude=None):
+        self.boundaries.append(boundaryLine(nodeSet, firstDof, lastDof, magnitude))
+
+    def addConcentratedForce(self, nodeSet, dof, magnitude):
+        self.loads.append(('*Cload', '%s, %d, %s' % (formatName(nodeSet), dof, formatNumber(magnitude))))
+
+    def addSurfacePressure(self, surface, magnitude):
+        self.loads.append(('*Dsload', '%s, P, %s' % (formatName(surface), formatNumber(magnitude))))
+
+    def addFieldOutput(self, nodeVariables=(), elementVariables=()):
+        self.outputs.append('*Output, field')
+        if nodeVariables:
+            self.outputs += ['*Node Output', ', '.join(nodeVariables)]
+        if elementVariables:
+            self.outputs += ['*Element Output, directions=YES', ', '.join(elementVariables) + ',']
+
+    def addHistoryOutput(self, variable='PRESELECT'):
+        self.outputs.append('*Output, history, variable=%s' % variable)
+
+    def lines(self):
+        lines = ['*Step, name=%s, nlgeom=%s' % (formatName(self.name), 'YES' if self.nlgeom else 'NO')]
+        if self.description:
+            lines.append(self.description)
+        lines.append(self.procedure[0])
+        lines += list(self.procedure[1])
+        if self.boundaries:
+            lines.append('*Boundary')
+            lines += self.boundaries
+        for keyword, line in self.loads:
+            lines += [keyword, line]
+        lines += self.outputs
+        lines.append('*End Step')
+        return lines
+
+
+def boundaryLine(nodeSet, firstDof, lastDof=None, magnitude=None):
+    if isinstance(firstDof, str):
+        return '%s, %s' % (formatName(nodeSet), firstDof)
+    line = '%s, %d, %d' % (formatName(nodeSet), firstDof, firstDof if lastDof is None else lastDof)
+    if magnitude is not None:
+        line += ', %s' % formatNumber(magnitude)
+    return line
+
+
+class InpModel(object):
+
+    def __init__(self, name, jobName):
+        self.name = name
+        self.jobName = jobName
+        self.parts = []
+        self.instanceNames = {}
+        self.assemblyLines = []
+        self.materials = []
+        self.boundaries = []
+        self.steps = []
+
+    def addPart(self, part, instanceName):
+        self.parts.append(part)
+        self.instanceNames[part.name] = instanceName
+        return part
+
+    #Assembly sets and surfaces refer to node and element labels of one part instance, as CAE writes them
+    def addNodeSet(self, name, partName, labels):
+        self.assemblyLines.append('*Nset, nset=%s, instance=%s' % (formatName(name), formatName(self.instanceNames[partName])))
+        self.assemblyLines += labelLines(np.unique(np.asarray(labels, dtype=np.int64)))
+
+    def addElementSet(self, name, partName, labels, internal=False):
+        self.assemblyLines.append('*Elset, elset=%s%s, instance=%s' % (formatName(name), ', internal' if internal else '', formatName(self.instanceNames[partName])))
+        self.assemblyLines += labelLines(np.unique(np.asarray(labels, dtype=np.int64)))
+
+    #faces maps a face identifier (SPOS, SNEG, S1, ...) to the element labels with that face on the surface
+    def addSurface(self, name, partName, faces):
+        faceLines = []
+        for face in sorted(faces):
+            elset = '_%s_%s' % (name.replace(' ', '_'), face)
+            self.addElementSet(elset, partName, faces[face], internal=True)
+            faceLines.append('%s, %s' % (elset, face))
+        self.assemblyLines.append('*Surface, type=ELEMENT, name=%s' % formatName(name))
+        self.assemblyLines += faceLines
+
+    #properties is a sequence of (keyword, table) such as ('Elastic', ((200E9, 0.29),))
+    def addMaterial(self, name, properties):
+        self.materials.append((name, tuple(properties)))
+
+    #Boundary condition of the initial step, firstDof is a dof number or a type such as ENCASTRE
+    def addBoundary(self, nodeSet, firstDof, lastDof=None):
+        self.boundaries.append(boundaryLine(nodeSet, firstDof, lastDof))
+
+    def addStep(self, step):
+        self.steps.append(step)
+        return step
+
+    def deckLines(self):
+        lines = ['*Heading', '** Job name: %s Model name: %s' % (self.jobName, self.name),
+                 '*Preprint, echo=NO, model=NO, history=NO, contact=NO', '**', '** PARTS', '**']
+        for part in self.parts:
+            lines += part.lines()
+        lines += ['**', '** ASSEMBLY', '**', '*Assembly, name=Assembly']
+        for part in self.parts:
+            lines += ['*Instance, name=%s, part=%s' % (formatName(self.instanceNames[part.name]), formatName(part.name)), '*End Instance']
+        lines += self.assemblyLines
+        lines += ['*End Assembly', '**', '** MATERIALS', '**']
+        for name, properties in self.materials:
+            lines.append('*Material, name=%s' % formatName(name))
+            for keyword, table in properties:
+                lines.append('*%s' % keyword)
+                lines += [line + (',' if len(row) == 1 else '') for line, row in zip(dataLines(table), table)]
+        if self.boundaries:
+            lines += ['**', '** BOUNDARY CONDITIONS', '**', '*Boundary'] + self.boundaries
+        for step in self.steps:
+            lines += ['**', '** STEP: %s' % step.name, '**'] + step.lines()
+        return lines
+
+    def deckText(self):
+        return '\n'.join(self.deckLines()) + '\n'
+
+    def writeInput(self, path=None):
+        path = path or self.jobName + '.inp'
+        deckFile = open(path, 'wb')
+        deckFile.write(self.deckText().encode('ascii'))
+        deckFile.close()
+        return path
@@ -0,0 +1,127 @@
+#Run many Abaqus input decks at once, each one as its own solver process
+#The kernel only writes input files (mdb.jobs[...].writeInput()), the farm launches
+#'abaqus job=NAME input=NAME.inp cpus=N interactive' for up to maxConcurrentJobs decks at a time
+#and hands every finished job to a callback, so results can be collected while other jobs are still running.
+#The solver command is taken from the ABAQUS_COMMAND environment variable (default 'abaqus'),
+#the stub kernel in abaqusStub points it to the fake solver.
+import os
+import json
+import time
+import shlex
+import subprocess
+import multiprocessing
+
+
+def abaqusCommand():
+    return shlex.split(os.environ.get('ABAQUS_COMMAND', 'abaqus'))
+
+
+#Use every core of the machine: as many jobs as fit with numCpusPerJob cores each
+def defaultConcurrentJobs(numCpusPerJob=1):
+    return max(1, multiprocessing.cpu_count()//max(1, numCpusPerJob))
+
+
+class FarmJob(object):
+
+    def __init__(self, name, numCpus=1, inputFile=None):
+        self.name = name
+        self.numCpus = numCpus
+        self.inputFile = inputFile or name + '.inp'
+        self.process = None
+        self.startTime = None
+        self.endTime = None
+        self.returnCode = None
+        self.status = 'PENDING'
+
+    def start(self, workingDirectory):
+        command = abaqusCommand() + ['job=%s' % self.name, 'input=%s' % self.inputFile, 'cpus=%d' % self.numCpus, 'interactive']
+        logFile = open(os.path.join(workingDirectory, self.name + '.log'), 'w')
+        self.process = subprocess.Popen(command, cwd=workingDirectory, stdout=logFile, stderr=subprocess.STDOUT)
+        logFile.close()
+        self.startTime = time.time()
+        self.status = 'RUNNING'
+
+    def poll(self):
+        if self.process is None or self.endTime is not None:
+            return self.endTime is not None
+        returnCode = self.process.poll()
+        if returnCode is None:
+            return False
+        self.returnCode = returnCode
+        self.endTime = time.time()
+        self.status = 'COMPLETED' if returnCode == 0 else 'ABORTED'
+        return True
+
+    def kill(self):
+        if self.process is not None and self.endTime is None:
+            self.process.kill()
+            self.process.wait()
+            self.endTime = time.time()
+            self.status = 'TERMINATED'
+
+    @property
+    def wallTime(self):
+        if self.startTime is None:
+            return 0.0
+        return (self.endTime or time.time()) - self.startTime
+
+
+#jobs is a sequence of FarmJob objects or job names (one cpu each)
+#onFinished(farmJob) is called once per job, in the order the jobs finish
+def runJobFarm(jobs, maxConcurrentJobs=None, workingDirectory='.', pollInterval=0.05, onFinished=None):
+    pending = [farmJob if isinstance(farmJob, FarmJob) else FarmJob(farmJob) for farmJob in jobs]
+    if maxConcurrentJobs is None:
+        maxConcurrentJobs = defaultConcurrentJobs(max([farmJob.numCpus for farmJob in pending] or [1]))
+    pending.reverse()
+    running = []
+    finished = []
+    try:
+        while pending or running:
+            while pending and len(running) < maxConcurrentJobs:
+                farmJob = pending.pop()
+                farmJob.start(workingDirectory)
+                running.append(farmJob)
+            for farmJob in list(running):
+                if farmJob.poll():
+                    running.remove(farmJob)
+                    finished.append(farmJob)
+                    if onFinished is not None:
+                        onFinished(farmJob)
+            if running:
+                time.sleep(pollInterval)
+    finally:
+        for farmJob in running:
+            farmJob.kill()
+    return finished
+
+
+#One row per job as comma separated values, job and status first and the other keys in alphabetical order
+def writeResultTable(rows, path):
+    columns = sorted(set([key for row in rows for key in row.keys()]) - set(['job', 'status']))
+    tableFile = open(path, 'w')
+    tableFile.write(','.join(['job', 'status'] + columns) + '\n')
+    for row in rows:
+        tableFile.write(','.join([str(row['job']), str(row['status'])] + ['' if row.get(column) is None else repr(row[column]) for column in columns]) + '\n')
+    tableFile.close()
+
+
+#Solver settings of a job of the mdb, as used by JobScheduler.py outside the kernel
+def jobSettings(jobName):
+    from abaqus import mdb
+    settingsJob = mdb.jobs[jobName]
+    return {'name': jobName, 'inputFile': jobName + '.inp', 'numCpus': settingsJob.numCpus,
+            'memory': settingsJob.memory, 'memoryUnits': str(settingsJob.memoryUnits)}
+
+
+#Write the decks of the given mdb jobs and a manifest of their settings for JobScheduler.py
+def writeJobManifest(jobNames, path='jobs.json'):
+    from abaqus import mdb
+    from abaqusConstants import OFF
+    manifest = []
+    for jobName in jobNames:
+        mdb.jobs[jobName].writeInput(consistencyChecking=OFF)
+        manifest.append(jobSettings(jobName))
+    manifestFile = open(path, 'w')
+    json.dump(manifest, manifestFile, indent=1, sort_keys=True)
+    manifestFile.close()
+    return path
@@ -0,0 +1,256 @@
+#Asynchronous scheduler for solver jobs with CPU and memory budgets and live .sta monitoring
+#Jobs wait in a bounded queue and start as soon as their numCpus and memory fit in what is left of the
+#budgets (a job larger than a whole budget runs on its own). The settings come from the Job() calls of the
+#scripts: numCpus, memory and memoryUnits (PERCENTAGE of the physical memory, MEGA_BYTES or GIGA_BYTES).
+#While a job runs its .sta file is tailed: every completed increment updates the step time, the
+#progress through the total time of the analysis (the sum of the step periods read from the deck),
+#the throughput in increments per second and the estimated time to completion.
+#The solver command is the one of JobFarm.py (ABAQUS_COMMAND), abaqusStub/fakeSolver.py stands in for CI.
+#
+#Run the jobs listed in a manifest written by JobFarm.writeJobManifest(), or every deck in the
+#current directory with the settings below: python JobScheduler.py [jobs.json]
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import multiprocessing
+
+import JobFarm
+
+#Job settings of the five scripts of this repository
+scriptJobSettings = {
+    'CantileverJob': {'numCpus': 1, 'memory': 50, 'memoryUnits': 'PERCENTAGE'},
+    'PlateJob': {'numCpus': 1, 'memory': 90, 'memoryUnits': 'PERCENTAGE'},
+    'ConnectingLugJob': {'numCpus': 1, 'memory': 50, 'memoryUnits': 'PERCENTAGE'},
+    'SwitchContactJob': {'numCpus': 1, 'memory': 90, 'memoryUnits': 'PERCENTAGE'},
+    'OverhoistAnalysisJob': {'numCpus': 1, 'memory': 50, 'memoryUnits': 'PERCENTAGE'},
+}
+
+
+def physicalMemoryMegabytes():
+    try:
+        return os.sysconf('SC_PAGE_SIZE')*os.sysconf('SC_PHYS_PAGES')/2.0**20
+    except (ValueError, OSError, AttributeError):
+        return 16*1024.0
+
+
+def memoryInMegabytes(memory, memoryUnits, physicalMegabytes=None):
+    if memoryUnits == 'PERCENTAGE':
+        return memory/100.0*(physicalMegabytes or physicalMemoryMegabytes())
+    if memoryUnits == 'GIGA_BYTES':
+        return memory*1024.0
+    return float(memory)
+
+
+#Total time of the analysis: the time period of every *Static (or similar) step of the deck, 1 by default
+def analysisTimePeriod(inputFile):
+    total = 0.0
+    procedureLine = False
+    deckFile = open(inputFile)
+    for line in deckFile:
+        if line.startswith('**'):
+            continue
+        if procedureLine:
+            procedureLine = False
+            fields = [field.strip() for field in line.split(',')]
+            if not line.startswith('*') and len(fields) > 1 and fields[1]:
+                total += float(fields[1])
+                continue
+            total += 1.0
+        keyword = line.strip().split(',')[0].upper()
+        if keyword in ('*STATIC', '*DYNAMIC', '*VISCO', '*HEAT TRANSFER', '*COUPLED TEMPERATURE-DISPLACEMENT'):
+            procedureLine = True
+    deckFile.close()
+    return total or 1.0
+
+
+#Increment line of a .sta file: step, increment, total time, step time and increment size, or None.
+#Attempts that were cut back (attempt column like 1U) completed nothing and return None too
+def parseStatusLine(line):
+    fields = line.split()
+    if len(fields) < 9 or not (fields[0].isdigit() and fields[1].isdigit()) or fields[2].endswith('U'):
+        return None
+    try:
+        return int(fields[0]), int(fields[1]), float(fields[6]), float(fields[7]), float(fields[8])
+    except ValueError:
+        return None
+
+
+class ScheduledJob(object):
+
+    def __init__(self, name, numCpus=1, memory=90, memoryUnits='PERCENTAGE', inputFile=None):
+        self.name = name
+        self.inputFile = inputFile or name + '.inp'
+        self.numCpus = numCpus
+        self.memory = memory
+        self.memoryUnits = memoryUnits
+        self.memoryMegabytes = memoryInMegabytes(memory, memoryUnits)
+        self.status = 'QUEUED'
+        self.returnCode = None
+        self.queuedTime = time.time()
+        self.startTime = None
+        self.endTime = None
+        self.step = 0
+        self.increments = 0
+        self.totalTime = 0.0
+        self.timePeriod = 1.0
+
+    @property
+    def elapsed(self):
+        if self.startTime is None:
+            return 0.0
+        return (self.endTime or time.time()) - self.startTime
+
+    @property
+    def progress(self):
+        return min(1.0, self.totalTime/self.timePeriod)
+
+    @property
+    def throughput(self):
+        return self.increments/self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        if self.progress <= 0.0:
+            return None
+        return self.elapsed*(1.0 - self.progress)/self.progress
+
+    def report(self):
+        return {'job': self.name, 'status': self.status, 'numCpus': self.numCpus, 'memoryMegabytes': self.memoryMegabytes,
+                'increments': self.increments, 'progress': self.progress, 'throughput': self.throughput,
+                'queueTime': (self.startTime or time.time()) - self.queuedTime, 'wallTime': self.elapsed}
+
+
+def printProgress(scheduledJob):
+    eta = scheduledJob.eta
+    print('%-24s %-9s step %d inc %4d  %5.1f%%  %6.2f inc/s  ETA %s' % (scheduledJob.name, scheduledJob.status, scheduledJob.step, scheduledJob.increments,
+                                                                     100*scheduledJob.progress, scheduledJob.throughput, '-' if eta is None else '%.1f s' % eta))
+
+
+class JobScheduler(object):
+
+    def __init__(self, maxCpus=None, maxMemoryMegabytes=None, queueSize=64, pollInterval=0.25, workingDirectory='.', onProgress=printProgress):
+        self.maxCpus = maxCpus or multiprocessing.cpu_count()
+        self.maxMemoryMegabytes = maxMemoryMegabytes or physicalMemoryMegabytes()
+        self.queueSize = queueSize
+        self.pollInterval = pollInterval
+        self.workingDirectory = workingDirectory
+        self.onProgress = onProgress
+        self.usedCpus = 0
+        self.usedMemoryMegabytes = 0.0
+        self.running = set()
+
+    def _fits(self, scheduledJob):
+        if not self.running:
+            return True
+        return (self.usedCpus + scheduledJob.numCpus <= self.maxCpus and
+                self.usedMemoryMegabytes + scheduledJob.memoryMegabytes <= self.maxMemoryMegabytes)
+
+    async def _monitor(self, scheduledJob, process):
+        statusPath = os.path.join(self.workingDirectory, scheduledJob.name + '.sta')
+        statusFile = None
+        position = 0
+        while True:
+            finished = process.returncode is not None
+            if statusFile is None and os.path.exists(statusPath):
+                statusFile = open(statusPath)
+            if statusFile is not None:
+                statusFile.seek(position)
+                updated = False
+                while True:
+                    line = statusFile.readline()
+                    if not line.endswith('\n'):
+                        break
+                    position = statusFile.tell()
+                    increment = parseStatusLine(line)
+                    if increment is not None:
+                        scheduledJob.step, incrementNumber, scheduledJob.totalTime = increment[:3]
+                        scheduledJob.increments += 1
+                        updated = True
+                if updated and self.onProgress is not None:
+                    self.onProgress(scheduledJob)
+            if finished:
+                break
+            await asyncio.sleep(self.pollInterval)
+        if statusFile is not None:
+            statusFile.close()
+
+    async def _run(self, scheduledJob, condition):
+        try:
+            inputPath = os.path.join(self.workingDirectory, scheduledJob.inputFile)
+            if os.path.exists(inputPath):
+                scheduledJob.timePeriod = analysisTimePeriod(inputPath)
+            command = JobFarm.abaqusCommand() + ['job=%s' % scheduledJob.name, 'input=%s' % scheduledJob.inputFile,
+                                                'cpus=%d' % scheduledJob.numCpus, 'interactive']
+            logFile = open(os.path.join(self.workingDirectory, scheduledJob.name + '.log'), 'w')
+            process = await asyncio.create_subprocess_exec(*command, cwd=self.workingDirectory, stdout=logFile, stderr=asyncio.subprocess.STDOUT)
+            logFile.close()
+            scheduledJob.startTime = time.time()
+            scheduledJob.status = 'RUNNING'
+            monitor = asyncio.ensure_future(self._monitor(scheduledJob, process))
+            scheduledJob.returnCode = await process.wait()
+            await monitor
+            scheduledJob.status = 'COMPLETED' if scheduledJob.returnCode == 0 else 'ABORTED'
+        except OSError:
+            scheduledJob.status = 'ABORTED'
+        finally:
+            scheduledJob.endTime = time.time()
+            async with condition:
+                self.usedCpus -= scheduledJob.numCpus
+                self.usedMemoryMegabytes -= scheduledJob.memoryMegabytes
+                self.running.discard(scheduledJob)
+                condition.notify_all()
+        if self.onProgress is not None:
+            self.onProgress(scheduledJob)
+
+    async def _dispatch(self, queue, condition, tasks):
+        while True:
+            scheduledJob = await queue.get()
+            if scheduledJob is None:
+                return
+            async with condition:
+                await condition.wait_for(lambda: self._fits(scheduledJob))
+                self.usedCpus += scheduledJob.numCpus
+                self.usedMemoryMegabytes += scheduledJob.memoryMegabytes
+                self.running.add(scheduledJob)
+                scheduledJob.status = 'STARTING'
+            tasks.append(asyncio.ensure_future(self._run(scheduledJob, condition)))
+
+    async def runAll(self, scheduledJobs):
+        queue = asyncio.Queue(maxsize=self.queueSize)
+        condition = asyncio.Condition()
+        tasks = []
+        dispatcher = asyncio.ensure_future(self._dispatch(queue, condition, tasks))
+        for scheduledJob in scheduledJobs:
+            scheduledJob.queuedTime = time.time()
+            await queue.put(scheduledJob)
+        await queue.put(None)
+        await dispatcher
+        await asyncio.gather(*tasks)
+        return [scheduledJob.report() for scheduledJob in scheduledJobs]
+
+
+def loadJobs(manifestPath=None, workingDirectory='.'):
+    if manifestPath is not None:
+        manifestFile = open(manifestPath)
+        manifest = json.load(manifestFile)
+        manifestFile.close()
+    else:
+        manifest = []
+        for inputPath in sorted(glob.glob(os.path.join(workingDirectory, '*.inp'))):
+            settings = dict(scriptJobSettings.get(os.path.basename(inputPath)[:-4], {}))
+            settings['name'] = os.path.basename(inputPath)[:-4]
+            manifest.append(settings)
+    return [ScheduledJob(settings['name'], settings.get('numCpus', 1), settings.get('memory', 90), settings.get('memoryUnits', 'PERCENTAGE'),
+                         settings.get('inputFile')) for settings in manifest]
+
+
+def runScheduler(scheduledJobs, **kwargs):
+    return asyncio.run(JobScheduler(**kwargs).runAll(scheduledJobs))
+
+
+if __name__ == '__main__':
+    schedulerReports = runScheduler(loadJobs(sys.argv[1] if len(sys.argv) > 1 else None))
+    JobFarm.writeResultTable(schedulerReports, 'JobScheduler.csv')
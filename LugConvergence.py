@@ -0,0 +1,79 @@
+#Mesh convergence study of the connecting lug
+#The lug is solved with a coarse seed first, then the global seed and the seed of the loaded hole edges
+#('Bottom Curved Surface 1/2') are refined by refinementRatio per level until the peak Mises stress
+#changes by less than tolerance (relative) between two levels, or maxLevels is reached.
+#Every level reports element and node count, wall time, and a Richardson-extrapolated peak stress:
+#from three levels the observed order p = ln((f1-f2)/(f2-f3))/ln(r) is used when it lies between 0.5 and 4,
+#otherwise, and from two levels, the assumed order of the C3D20R elements (2). Results go to LugConvergence.csv
+#Run inside CAE: abaqus cae noGUI=LugConvergence.py
+#Run without Abaqus: PYTHONPATH=abaqusStub python LugConvergence.py
+import time
+from math import log
+
+from abaqus import*
+from abaqusConstants import*
+
+import ConnectingLug
+import JobFarm
+import PartTemplates
+
+
+#values are ordered coarse to fine, the mesh size ratio between levels is refinementRatio (> 1)
+#Returns the extrapolated value, the order used and whether it is the observed order. An observed order
+#outside minOrder to 2*assumedOrder (the change grew between levels, or barely shrank) is not asymptotic and
+#would divide by nearly zero, the assumed order is used instead
+def richardsonExtrapolation(values, refinementRatio, assumedOrder=2.0, minOrder=0.5):
+    if len(values) < 2:
+        return None, None, None
+    order, observed = assumedOrder, False
+    if len(values) >= 3:
+        coarse, medium, fine = values[-3:]
+        if (coarse-medium) != 0 and (medium-fine)/(coarse-medium) > 0:
+            observedOrder = log((coarse-medium)/(medium-fine))/log(refinementRatio)
+            if minOrder <= observedOrder <= 2*assumedOrder:
+                order, observed = observedOrder, True
+    medium, fine = values[-2:]
+    return fine + (fine-medium)/(refinementRatio**order - 1.0), order, observed
+
+
+#Only the seeds change between levels, so every level after the first copies the partitioned lug of a part template
+def runLugConvergence(coarseSeedSize=0.01, refinementRatio=2.0, holeSeedRatio=0.5, tolerance=0.02, maxLevels=5, prefix='LugConvergence', numCpus=1, modelParameters=None):
+    templates = PartTemplates.PartTemplateCache()
+    levels = []
+    peakStresses = []
+    for level in range(maxLevels):
+        name = '%s_L%d' % (prefix, level)
+        seedSize = coarseSeedSize/refinementRatio**level
+        holeSeedSize = seedSize*holeSeedRatio
+        buildStart = time.time()
+        ConnectingLug.buildConnectingLugModel(modelName=name, seedSize=seedSize, holeSeedSize=holeSeedSize, templates=templates, **(modelParameters or {}))
+        ConnectingLug.createConnectingLugJob(jobName=name, modelName=name, numCpus=numCpus).writeInput(consistencyChecking=OFF)
+        buildTime = time.time() - buildStart
+        farmJob = JobFarm.runJobFarm([JobFarm.FarmJob(name, numCpus=numCpus)], maxConcurrentJobs=1)[0]
+        del mdb.models[name]
+        del mdb.jobs[name]
+        result = {'level': level, 'job': name, 'seedSize': seedSize, 'holeSeedSize': holeSeedSize, 'status': farmJob.status,
+                  'buildTime': buildTime, 'templateSaved': templates.builds[-1]['savedTime'], 'wallTime': buildTime + farmJob.wallTime}
+        levels.append(result)
+        if farmJob.status != 'COMPLETED':
+            break
+        result.update(ConnectingLug.extractConnectingLugResults(name + '.odb'))
+        peakStresses.append(result['peakMises'])
+        result['extrapolatedMises'], result['order'], result['orderObserved'] = richardsonExtrapolation(peakStresses, refinementRatio)
+        if len(peakStresses) >= 2:
+            #A level without stresses (peak Mises 0, an empty S field) cannot be converged
+            result['relativeChange'] = abs(peakStresses[-1]-peakStresses[-2])/abs(peakStresses[-1]) if peakStresses[-1] else float('inf')
+            print('Level %d: %d elements, peak Mises %.6g, change %.3g%%, Richardson %.6g (%s order %.2f), %.1f s' % (level, result['numElements'], result['peakMises'], 100*result['relativeChange'],
+                  result['extrapolatedMises'], 'observed' if result['orderObserved'] else 'assumed', result['order'], result['wallTime']))
+            if result['relativeChange'] < tolerance:
+                result['converged'] = True
+                break
+        else:
+            print('Level %d: %d elements, peak Mises %.6g, %.1f s' % (level, result['numElements'], result['peakMises'], result['wallTime']))
+    templates.invalidate()
+    return levels
+
+
+if __name__ == '__main__':
+    lugLevels = runLugConvergence()
+    JobFarm.writeResultTable(lugLevels, 'LugConvergence.csv')
@@ -0,0 +1,253 @@
+#Surrogate model of the connecting lug: peak Mises stress as a function of hole radius, lug length, thickness and pressure
+#The training set is a Latin hypercube over lugEnvelope, every point solved as a C3D20R run of ConnectingLug.py
+#(decks written in the kernel, solved by JobFarm.py, optionally through a ResultCache) and kept in LugSurrogate.csv.
+#The surrogate is a Gaussian process on log inputs scaled to the envelope and log peak stress, with a linear trend
+#(stress scales as a power of each parameter) and a squared exponential kernel with one length scale per parameter,
+#fitted by maximizing the marginal likelihood. The coefficients are stored in LugSurrogate.json with a format
+#version and the digest of the training set they were fitted to.
+#Queries are batched: predict() returns the peak stress, its one-sigma error, and flags points outside the
+#envelope or with a relative error above maxRelativeError, which need a real solve.
+#Build the training set and fit: abaqus cae noGUI=LugSurrogate.py -- train [points]
+#Refit from LugSurrogate.csv: python LugSurrogate.py fit
+#Query: python LugSurrogate.py query holeRadius lugLength thickness pressure
+#Run without Abaqus: PYTHONPATH=abaqusStub python LugSurrogate.py train 24
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+
+import numpy as np
+import scipy.linalg as linalg
+import scipy.optimize as optimize
+
+import JobFarm
+
+lugParameters = ('holeRadius', 'lugLength', 'thickness', 'pressure')
+#The outer radius of ConnectingLug.py is 0.025, the hole stays well inside it
+lugEnvelope = {
+    'holeRadius': (0.010, 0.020),
+    'lugLength': (0.100, 0.150),
+    'thickness': (0.015, 0.025),
+    'pressure': (1.5E7, 3.5E7),
+}
+surrogateFormatVersion = 1
+
+
+#numPoints points, one in every interval of each parameter range, in a random order per parameter
+def latinHypercube(numPoints, envelope=lugEnvelope, seed=0):
+    random = np.random.RandomState(seed)
+    points = []
+    columns = {}
+    for name in lugParameters:
+        lower, upper = envelope[name]
+        fractions = (random.permutation(numPoints) + random.uniform(size=numPoints))/numPoints
+        columns[name] = lower + fractions*(upper - lower)
+    for index in range(numPoints):
+        points.append(dict([(name, float(columns[name][index])) for name in lugParameters]))
+    return points
+
+
+#Solve the lug at every point, like CantileverSweep.py: build and write all decks, then solve them with the farm
+def buildTrainingSet(points, prefix='LugSurrogate', seedSize=0.0025, maxConcurrentJobs=None, cache=None, workingDirectory='.'):
+    from abaqus import mdb
+    from abaqusConstants import OFF
+    import ConnectingLug
+    rows = []
+    farmJobs = []
+    cacheKeys = {}
+    for index, point in enumerate(points):
+        name = '%s_%03d' % (prefix, index)
+        ConnectingLug.buildConnectingLugModel(modelName=name, seedSize=seedSize, **point)
+        previousDirectory = os.getcwd()
+        os.chdir(workingDirectory)
+        try:
+            ConnectingLug.createConnectingLugJob(jobName=name, modelName=name).writeInput(consistencyChecking=OFF)
+        finally:
+            os.chdir(previousDirectory)
+        del mdb.models[name]
+        del mdb.jobs[name]
+        row = dict(point)
+        row.update({'job': name, 'status': 'PENDING', 'peakMises': None})
+        rows.append(row)
+        if cache is not None:
+            cacheKeys[name] = cache.key(os.path.join(workingDirectory, name + '.inp'))
+            cachedResults = cache.get(cacheKeys[name])
+            if cachedResults is not None:
+                row.update(cachedResults)
+                row['status'] = 'CACHED'
+                continue
+        farmJobs.append(JobFarm.FarmJob(name))
+
+    rowsByJob = dict([(row['job'], row) for row in rows])
+    def collectResults(farmJob):
+        row = rowsByJob[farmJob.name]
+        row['status'] = farmJob.status
+        if farmJob.status == 'COMPLETED':
+            results = ConnectingLug.extractConnectingLugResults(os.path.join(workingDirectory, farmJob.name + '.odb'))
+            row.update(results)
+            if cache is not None:
+                cache.put(cacheKeys[farmJob.name], results)
+    JobFarm.runJobFarm(farmJobs, maxConcurrentJobs=maxConcurrentJobs, workingDirectory=workingDirectory, onFinished=collectResults)
+    return rows
+
+
+#Inputs and peak stresses of the solved rows of a table written by JobFarm.writeResultTable()
+def readTrainingSet(path):
+    tableFile = open(path)
+    inputs = []
+    outputs = []
+    for row in csv.DictReader(tableFile):
+        if row['status'] not in ('COMPLETED', 'CACHED') or not row.get('peakMises'):
+            continue
+        inputs.append([float(row[name]) for name in lugParameters])
+        outputs.append(float(row['peakMises']))
+    tableFile.close()
+    return np.asarray(inputs), np.asarray(outputs)
+
+
+def _kernel(first, second, lengthScales, signalVariance):
+    scaledFirst = first/lengthScales
+    scaledSecond = second/lengthScales
+    distance = (scaledFirst*scaledFirst).sum(axis=1)[:,np.newaxis] + (scaledSecond*scaledSecond).sum(axis=1)[np.newaxis,:] - 2.0*scaledFirst.dot(scaledSecond.T)
+    return signalVariance*np.exp(-0.5*np.maximum(distance, 0.0))
+
+
+def _trendBasis(scaled):
+    return np.hstack((np.ones((len(scaled), 1)), scaled))
+
+
+class LugSurrogate(object):
+
+    def __init__(self, coefficients):
+        if coefficients.get('formatVersion') != surrogateFormatVersion:
+            raise ValueError('Surrogate format version %r, expected %d' % (coefficients.get('formatVersion'), surrogateFormatVersion))
+        self.coefficients = coefficients
+        self.parameters = tuple(coefficients['parameters'])
+        self.lower = np.log(np.asarray(coefficients['lower']))
+        self.upper = np.log(np.asarray(coefficients['upper']))
+        self.trainingInputs = np.asarray(coefficients['trainingInputs'])
+        self.lengthScales = np.asarray(coefficients['lengthScales'])
+        self.signalVariance = coefficients['signalVariance']
+        self.trend = np.asarray(coefficients['trend'])
+        self.weights = np.asarray(coefficients['weights'])
+        self.choleskyFactor = np.asarray(coefficients['choleskyFactor'])
+
+    #Inputs scaled so that the envelope is the unit cube in log space
+    def scale(self, inputs):
+        return (np.log(np.atleast_2d(np.asarray(inputs, dtype=np.float64))) - self.lower)/(self.upper - self.lower)
+
+    #inputs is (queries, parameters) in the order of lugParameters, or a dict of arrays by parameter name
+    def predict(self, inputs, maxRelativeError=0.05, tolerance=1E-9):
+        if isinstance(inputs, dict):
+            inputs = np.column_stack([np.asarray(inputs[name], dtype=np.float64).ravel() for name in self.parameters])
+        scaled = self.scale(inputs)
+        crossCovariance = _kernel(scaled, self.trainingInputs, self.lengthScales, self.signalVariance)
+        logMean = _trendBasis(scaled).dot(self.trend) + crossCovariance.dot(self.weights)
+        solved = linalg.solve_triangular(self.choleskyFactor, crossCovariance.T, lower=True)
+        logVariance = np.maximum(self.signalVariance - (solved*solved).sum(axis=0), 0.0)
+        peakMises = np.exp(logMean)
+        relativeError = np.sqrt(logVariance)
+        outside = np.any((scaled < -tolerance) | (scaled > 1.0 + tolerance), axis=1)
+        return {'peakMises': peakMises, 'error': peakMises*relativeError, 'relativeError': relativeError,
+                'outsideEnvelope': outside, 'needsSolve': outside | (relativeError > maxRelativeError)}
+
+    def save(self, path='LugSurrogate.json'):
+        surrogateFile = open(path, 'w')
+        json.dump(self.coefficients, surrogateFile, indent=1, sort_keys=True)
+        surrogateFile.close()
+        return path
+
+
+def loadSurrogate(path='LugSurrogate.json'):
+    surrogateFile = open(path)
+    coefficients = json.load(surrogateFile)
+    surrogateFile.close()
+    return LugSurrogate(coefficients)
+
+
+def _negativeLogLikelihood(logParameters, scaled, residual):
+    lengthScales = np.exp(logParameters[:-2])
+    signalVariance, noiseVariance = np.exp(logParameters[-2:])
+    covariance = _kernel(scaled, scaled, lengthScales, signalVariance) + (noiseVariance + 1E-10)*np.eye(len(scaled))
+    try:
+        factor = linalg.cho_factor(covariance, lower=True)
+    except linalg.LinAlgError:
+        return 1E20
+    weights = linalg.cho_solve(factor, residual)
+    return 0.5*residual.dot(weights) + np.log(np.diag(factor[0])).sum()
+
+
+#Fit to inputs (points, parameters) and peak stresses; the envelope defaults to lugEnvelope
+def fitSurrogate(inputs, outputs, envelope=lugEnvelope, restarts=4, seed=0):
+    inputs = np.asarray(inputs, dtype=np.float64)
+    outputs = np.asarray(outputs, dtype=np.float64)
+    lower = [envelope[name][0] for name in lugParameters]
+    upper = [envelope[name][1] for name in lugParameters]
+    scaled = (np.log(inputs) - np.log(lower))/(np.log(upper) - np.log(lower))
+    target = np.log(outputs)
+    basis = _trendBasis(scaled)
+    trend = np.linalg.lstsq(basis, target, rcond=None)[0]
+    residual = target - basis.dot(trend)
+    residualVariance = max(residual.var(), 1E-12)
+    random = np.random.RandomState(seed)
+    best = None
+    for restart in range(restarts):
+        start = np.concatenate((np.log(random.uniform(0.3, 1.5, len(lugParameters))), np.log([residualVariance, 1E-2*residualVariance])))
+        bounds = [(np.log(0.05), np.log(20.0))]*len(lugParameters) + [(np.log(1E-8*residualVariance), np.log(1E2*residualVariance))]*2
+        result = optimize.minimize(_negativeLogLikelihood, start, args=(scaled, residual), method='L-BFGS-B', bounds=bounds)
+        if best is None or result.fun < best.fun:
+            best = result
+    lengthScales = np.exp(best.x[:-2])
+    signalVariance, noiseVariance = np.exp(best.x[-2:])
+    covariance = _kernel(scaled, scaled, lengthScales, signalVariance) + (noiseVariance + 1E-10)*np.eye(len(scaled))
+    choleskyFactor = np.linalg.cholesky(covariance)
+    weights = linalg.cho_solve((choleskyFactor, True), residual)
+    digest = hashlib.sha256(np.ascontiguousarray(np.column_stack((inputs, outputs))).tobytes()).hexdigest()
+    return LugSurrogate({
+        'formatVersion': surrogateFormatVersion, 'trainingDigest': digest, 'numTrainingPoints': len(inputs),
+        'parameters': list(lugParameters), 'lower': lower, 'upper': upper,
+        'trainingInputs': scaled.tolist(), 'lengthScales': lengthScales.tolist(), 'signalVariance': float(signalVariance),
+        'noiseVariance': float(noiseVariance), 'trend': trend.tolist(), 'weights': weights.tolist(), 'choleskyFactor': choleskyFactor.tolist(),
+    })
+
+
+#Leave-one-out relative errors of the fitted Gaussian process, from the inverse covariance (no refits)
+def leaveOneOutErrors(surrogate):
+    factor = surrogate.choleskyFactor
+    inverse = linalg.cho_solve((factor, True), np.eye(len(factor)))
+    logError = surrogate.weights/np.diag(inverse)
+    return np.exp(logError) - 1.0
+
+
+#Time batched queries over the envelope, in microseconds per query
+def benchmarkQueries(surrogate, numQueries=10000, repeats=5):
+    queries = np.column_stack([np.exp(np.random.RandomState(1).uniform(lower, upper, numQueries))
+                               for lower, upper in zip(surrogate.lower, surrogate.upper)])
+    times = []
+    for repeat in range(repeats):
+        start = time.time()
+        surrogate.predict(queries)
+        times.append(time.time() - start)
+    return min(times)*1E6/numQueries
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else sys.argv[1:]
+    command = arguments[0] if arguments else 'train'
+    if command == 'train':
+        trainingRows = buildTrainingSet(latinHypercube(int(arguments[1]) if len(arguments) > 1 else 40))
+        JobFarm.writeResultTable(trainingRows, 'LugSurrogate.csv')
+    if command in ('train', 'fit'):
+        trainingInputs, trainingOutputs = readTrainingSet('LugSurrogate.csv')
+        lugSurrogate = fitSurrogate(trainingInputs, trainingOutputs)
+        lugSurrogate.save('LugSurrogate.json')
+        looErrors = leaveOneOutErrors(lugSurrogate)
+        print('Fitted to %d points, leave-one-out error max %.2f%% rms %.2f%%, %.2f us per query' % (
+            len(trainingOutputs), 100*np.abs(looErrors).max(), 100*np.sqrt((looErrors**2).mean()), benchmarkQueries(lugSurrogate)))
+    elif command == 'query':
+        prediction = loadSurrogate('LugSurrogate.json').predict([[float(value) for value in arguments[1:5]]])
+        print('peak Mises %.6g +- %.3g%s' % (prediction['peakMises'][0], prediction['error'][0],
+                                            ', outside the training envelope' if prediction['outsideEnvelope'][0] else
+                                            ', needs a real solve' if prediction['needsSolve'][0] else ''))
@@ -0,0 +1,278 @@
+#Export of the global stiffness and mass matrices of a model, read back as SciPy CSR matrices
+#requestMatrixGeneration() adds a matrix generation step (*Matrix Generate/*Matrix Output) ahead of the analysis
+#steps of a model: the builders of CantileverBeam.py and BendingPlate.py take matrices=True. Abaqus then writes
+#one .mtx file per matrix, JOBNAME_STIF1.mtx, JOBNAME_MASS1.mtx, ...
+#readMtx() streams a .mtx file blockSize bytes at a time into NumPy files (.npy) that back the CSR arrays, so
+#memory stays bounded while reading and the matrices are memory-mapped afterwards. Both layouts are read:
+#    COORDINATE      row, column, value                          (equations numbered from 1)
+#    MATRIX INPUT    node, dof, node, dof, value                  (the (node, dof) of every row are kept as dofs)
+#A file holding one triangle of a symmetric matrix gives the full matrix.
+#generateMatrices() runs the job and reads its matrices; with a ResultCache (see ResultCache.py) the matrices are
+#stored under the key of the input deck, so a model that was exported before does not run the solver again.
+#
+#    CantileverBeam.buildCantileverModel('Cantilever Beam', matrices=True)
+#    CantileverBeam.createCantileverJob('CantileverMatrices', 'Cantilever Beam')
+#    matrices, hit = generateMatrices('CantileverMatrices', ResultCache('resultCache'))
+#    stiffness, mass = matrices['STIF'], matrices['MASS']
+#Convert .mtx files without Abaqus: python MatrixExport.py CantileverMatrices_STIF1.mtx [...]
+import io
+import os
+import sys
+import glob
+import time
+import shutil
+
+import numpy as np
+import scipy.sparse as sparse
+
+defaultBlockSize = 2**24
+#Degrees of freedom of one node in MATRIX INPUT rows are at most this many
+_dofStride = 64
+#Matrices of *Matrix Generate, their keyword parameter and the name of their files
+matrixKeywords = {'stiffness': 'STIFFNESS', 'mass': 'MASS', 'viscous': 'VISCOUS DAMPING', 'structural': 'STRUCTURAL DAMPING'}
+matrixFiles = {'stiffness': 'STIF', 'mass': 'MASS', 'viscous': 'DMPV', 'structural': 'DMPS'}
+_csrArrays = ('indptr', 'indices', 'data')
+
+
+#Insert a matrix generation step before the first step of a model
+#The matrices are those of the initial state, whatever the loads and the nonlinearity of the analysis steps
+def requestMatrixGeneration(modelName, matrices=('stiffness', 'mass'), stepName='Matrix Generation', outputFormat='COORDINATE'):
+    from abaqus import mdb
+    for matrix in matrices:
+        if matrix not in matrixFiles:
+            raise ValueError('Unknown matrix %s, choose from %s' % (matrix, ', '.join(sorted(matrixFiles))))
+    keywordBlock = mdb.models[modelName].keywordBlock
+    keywordBlock.synchVersions(storeNodesAndElements=False)
+    parameters = ', '.join([matrixKeywords[matrix] for matrix in matrices])
+    lines = ['*Step, name="%s"' % stepName,
+             '*Matrix Generate, %s' % parameters,
+             '*Matrix Output, %s, format=%s' % (parameters, outputFormat),
+             '*End Step']
+    for position, block in enumerate(keywordBlock.sieBlocks):
+        if block.split('\n')[0].upper().startswith('*STEP'):
+            keywordBlock.insert(position-1, '\n'.join(lines))
+            return
+    raise ValueError('No step in the keywords of model %s' % modelName)
+
+
+#Rows of numbers of a text file, blockSize bytes at a time, as (rows, columns) arrays; lines starting with * are skipped
+def _numberBlocks(path, blockSize):
+    textFile = open(path, 'rb')
+    remainder = b''
+    while True:
+        block = textFile.read(blockSize)
+        if block:
+            end = block.rfind(b'\n') + 1
+            text = remainder + block[:end]
+            remainder = block[end:]
+        else:
+            text = remainder
+            remainder = b''
+        if text.strip():
+            values = np.loadtxt(io.BytesIO(text), delimiter=',', comments=('*', '%'), ndmin=2)
+            if len(values):
+                yield values
+        if not block:
+            break
+    textFile.close()
+
+
+def _memmap(path, dtype):
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+def _spans(length, chunkSize):
+    for start in range(0, length, chunkSize):
+        yield slice(start, min(start+chunkSize, length))
+
+
+#Read the .mtx file at mtxPath into directory/name.indptr.npy, .indices.npy, .data.npy (and .dofs.npy for the
+#MATRIX INPUT layout) and return it as a memory-mapped CSR matrix with its dofs (None for COORDINATE files)
+def readMtx(mtxPath, directory, name=None, blockSize=defaultBlockSize):
+    name = name or os.path.splitext(os.path.basename(mtxPath))[0]
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    base = os.path.join(directory, name)
+    #First pass: entries appended to flat binary files, equations (or node and dof keys) from 0
+    temporaryFiles = [open(base + suffix, 'wb') for suffix in ('.rows.tmp', '.columns.tmp', '.values.tmp')]
+    numEntries = 0
+    lower = upper = False
+    matrixInput = False
+    for values in _numberBlocks(mtxPath, blockSize):
+        if values.shape[1] == 5:
+            matrixInput = True
+            rows = values[:,0].astype(np.int64)*_dofStride + values[:,1].astype(np.int64) - 1
+            columns = values[:,2].astype(np.int64)*_dofStride + values[:,3].astype(np.int64) - 1
+        elif values.shape[1] == 3:
+            rows = values[:,0].astype(np.int64) - 1
+            columns = values[:,1].astype(np.int64) - 1
+        else:
+            raise ValueError('%s has %d numbers per line, expected 3 (COORDINATE) or 5 (MATRIX INPUT)' % (mtxPath, values.shape[1]))
+        lower = lower or bool((rows > columns).any())
+        upper = upper or bool((rows < columns).any())
+        rows.tofile(temporaryFiles[0])
+        columns.tofile(temporaryFiles[1])
+        values[:,-1].tofile(temporaryFiles[2])
+        numEntries += len(values)
+    for temporaryFile in temporaryFiles:
+        temporaryFile.close()
+    rows, columns, values = [_memmap(base + suffix, dtype) for suffix, dtype in (('.rows.tmp', np.int64), ('.columns.tmp', np.int64), ('.values.tmp', np.float64))]
+    chunkSize = max(1, blockSize//8)
+    #Equations of MATRIX INPUT files: the sorted (node, dof) keys that occur, numbered through a table of all
+    #keys when node labels are dense enough, else by binary search
+    keys = None
+    equationOf = None
+    if matrixInput:
+        maxKey = int(max(rows.max(), columns.max()))
+        if maxKey < 8*numEntries + 2**20:
+            present = np.zeros(maxKey+1, dtype=bool)
+            for span in _spans(numEntries, chunkSize):
+                present[rows[span]] = True
+                present[columns[span]] = True
+            keys = np.flatnonzero(present)
+            equationOf = np.cumsum(present) - 1
+            del present
+        else:
+            keys = np.zeros(0, dtype=np.int64)
+            for span in _spans(numEntries, chunkSize):
+                keys = np.union1d(keys, np.unique(np.concatenate([rows[span], columns[span]])))
+        numEquations = len(keys)
+    else:
+        numEquations = int(max(rows.max(), columns.max())) + 1 if numEntries else 0
+    #One triangle of a symmetric matrix: every entry off the diagonal stands for its transpose as well
+    mirror = lower != upper
+    def entries(span):
+        blockRows, blockColumns = np.asarray(rows[span]), np.asarray(columns[span])
+        if equationOf is not None:
+            blockRows, blockColumns = equationOf[blockRows], equationOf[blockColumns]
+        elif keys is not None:
+            blockRows, blockColumns = np.searchsorted(keys, blockRows), np.searchsorted(keys, blockColumns)
+        blockValues = np.asarray(values[span])
+        if mirror:
+            offDiagonal = blockRows != blockColumns
+            blockRows, blockColumns = np.concatenate([blockRows, blockColumns[offDiagonal]]), np.concatenate([blockColumns, blockRows[offDiagonal]])
+            blockValues = np.concatenate([blockValues, blockValues[offDiagonal]])
+        return blockRows, blockColumns, blockValues
+    #Second pass: entries per row, then every entry scattered to its place in the CSR arrays
+    rowCounts = np.zeros(numEquations, dtype=np.int64)
+    for span in _spans(numEntries, chunkSize):
+        rowCounts += np.bincount(entries(span)[0], minlength=numEquations)
+    numNonzeros = int(rowCounts.sum())
+    indexType = np.int32 if max(numNonzeros, numEquations) < 2**31 - 1 else np.int64
+    indptr = np.lib.format.open_memmap(base + '.indptr.npy', mode='w+', dtype=indexType, shape=(numEquations+1,))
+    indices = np.lib.format.open_memmap(base + '.indices.npy', mode='w+', dtype=indexType, shape=(numNonzeros,))
+    data = np.lib.format.open_memmap(base + '.data.npy', mode='w+', dtype=np.float64, shape=(numNonzeros,))
+    indptr[0] = 0
+    indptr[1:] = np.cumsum(rowCounts)
+    filled = np.asarray(indptr[:-1], dtype=np.int64).copy()
+    for span in _spans(numEntries, chunkSize):
+        blockRows, blockColumns, blockValues = entries(span)
+        order = np.argsort(blockRows, kind='stable')
+        blockRows = blockRows[order]
+        counts = np.bincount(blockRows, minlength=numEquations)
+        rank = np.arange(len(blockRows)) - (np.cumsum(counts) - counts)[blockRows]
+        positions = filled[blockRows] + rank
+        indices[positions] = blockColumns[order]
+        data[positions] = blockValues[order]
+        filled += counts
+    del rows, columns, values
+    for suffix in ('.rows.tmp', '.columns.tmp', '.values.tmp'):
+        os.remove(base + suffix)
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(numEquations, numEquations), copy=False)
+    matrix.sort_indices()
+    repeated = np.nonzero(np.diff(matrix.indices) == 0)[0] + 1
+    if len(repeated) and not np.isin(repeated, matrix.indptr).all():
+        #Entries given more than once are summed, in memory
+        matrix.sum_duplicates()
+    rewritten = {}
+    for arrayName, array in zip(_csrArrays, (indptr, indices, data)):
+        canonical = getattr(matrix, arrayName)
+        if len(canonical) != len(array) or canonical.dtype != array.dtype:
+            rewritten[arrayName] = np.array(canonical)
+        elif not np.shares_memory(canonical, array):
+            array[:] = canonical
+        array.flush()
+    del matrix, indptr, indices, data
+    for arrayName, array in rewritten.items():
+        np.save(base + '.%s.npy' % arrayName, array)
+    if keys is not None:
+        np.save(base + '.dofs.npy', np.stack([keys//_dofStride, keys % _dofStride + 1], axis=1))
+    elif os.path.exists(base + '.dofs.npy'):
+        os.remove(base + '.dofs.npy')
+    return loadMatrix(directory, name)
+
+
+#CSR matrix name of directory backed by its memory-mapped .npy files (read only), and its dofs or None
+def loadMatrix(directory, name):
+    base = os.path.join(directory, name)
+    indptr, indices, data = [np.load(base + '.%s.npy' % arrayName, mmap_mode='r') for arrayName in _csrArrays]
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(len(indptr)-1, len(indptr)-1), copy=False)
+    matrix.has_sorted_indices = True
+    dofs = np.load(base + '.dofs.npy') if os.path.exists(base + '.dofs.npy') else None
+    return matrix, dofs
+
+
+#The .mtx file of one matrix of a job, the last one when several steps generate it
+def mtxPath(jobName, matrix):
+    paths = sorted(glob.glob('%s_%s*.mtx' % (jobName, matrix)), key=lambda path: (len(path), path))
+    if not paths:
+        raise IOError('No %s matrix file %s_%s*.mtx' % (matrix, jobName, matrix))
+    return paths[-1]
+
+
+#Run a job whose model requests matrix generation and return ({'STIF': csr, 'MASS': csr, ...}, hit)
+#dofs of MATRIX INPUT files are returned under 'dofs'. With a cache the matrices are kept in the cache entry of
+#the input deck; without one they are written to directory (JOBNAME_matrices by default)
+def generateMatrices(jobName, cache=None, matrices=('stiffness', 'mass'), directory=None, blockSize=defaultBlockSize):
+    from abaqus import mdb
+    from abaqusConstants import OFF, COMPLETED
+    names = [matrixFiles[matrix] for matrix in matrices]
+    matrixJob = mdb.jobs[jobName]
+    key = None
+    if cache is not None:
+        matrixJob.writeInput(consistencyChecking=OFF)
+        key = cache.key(jobName + '.inp', 'matrices:' + ','.join(names))
+        results = cache.get(key)
+        if results is not None:
+            return _loadMatrices(results['fileStore'], names), True
+        directory = os.path.join(cache.directory, 'incoming', key)
+    directory = directory or jobName + '_matrices'
+    matrixJob.submit(consistencyChecking=OFF)
+    matrixJob.waitForCompletion()
+    if matrixJob.status != COMPLETED:
+        raise RuntimeError('Job %s did not complete (%s), no matrices were written' % (jobName, matrixJob.status))
+    start = time.time()
+    shapes = {}
+    for name in names:
+        shapes[name] = readMtx(mtxPath(jobName, name), directory, name, blockSize)[0].shape
+    if cache is None:
+        return _loadMatrices(directory, names), False
+    stored = cache.put(key, {'matrices': names, 'shapes': shapes, 'readTime': time.time() - start},
+                       files=[os.path.join(directory, fileName) for fileName in sorted(os.listdir(directory))])
+    if not stored:
+        #Larger than the whole cache: the matrices stay in the incoming directory
+        return _loadMatrices(directory, names), False
+    shutil.rmtree(directory, ignore_errors=True)
+    return _loadMatrices(os.path.join(cache.entryDirectory(key), 'files'), names), False
+
+
+def _loadMatrices(directory, names):
+    loaded = {}
+    for name in names:
+        loaded[name], dofs = loadMatrix(directory, name)
+        if dofs is not None:
+            loaded['dofs'] = dofs
+    return loaded
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('Usage: MatrixExport.py JOBNAME_STIF1.mtx [...]')
+    for path in sys.argv[1:]:
+        start = time.time()
+        matrix, dofs = readMtx(path, os.path.splitext(path)[0] + '_csr')
+        asymmetry = abs(matrix - matrix.T).max() if matrix.nnz else 0.0
+        print('%s: %d x %d, %d nonzeros, %s, read in %.3f s, max |A - A^T| %.3e' % (path, matrix.shape[0], matrix.shape[1], matrix.nnz,
+              'MATRIX INPUT with %d nodes' % len(np.unique(dofs[:,0])) if dofs is not None else 'COORDINATE', time.time() - start, asymmetry))
@@ -0,0 +1,245 @@
+#Native natural frequency solver, an Abaqus-free counterpart of the frequency step of the builders (numModes=N)
+#The first numModes eigenpairs of K*phi = omega^2*M*phi are found with shift-invert Lanczos (ARPACK through
+#scipy.sparse.linalg.eigsh with sigma=shift), which factorizes K - shift*M once and converges on the modes
+#nearest the shift; problems of a few hundred DOF are solved densely. Masses follow the Density tables of the
+#scripts and are consistent or lumped (lumped=True, the diagonal scaled to the element mass):
+#    hoistModes()        the truss of OverheadHoist.py, one bar per sketch line (TrussSolver.py)
+#    cantileverModes()   the beam of CantileverBeam.py, StructuredMesh.py bricks: C3D20R (order=2) or C3D8 (order=1),
+#                        cantileverModesLike() in the element order of an output database of the builder
+#    plateModes()        the plate of BendingPlate.py, Mindlin plate elements of PlateSolver.py
+#The Abaqus hoist has seedNumber=2 bars per line, the pinned mid-line nodes have no transverse stiffness and
+#give mechanism modes near zero: compareWithOdb() leaves out Abaqus frequencies below minFrequency.
+#Run 'python ModalSolver.py [numModes] [cantilever=CantileverJob.odb hoist=... plate=...]' for the three models,
+#with the frequencies of the frequency step of the given output databases as a cross-check
+import sys
+import time
+
+import numpy as np
+import scipy.linalg as linalg
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sparselinalg
+
+import TrussSolver
+import PlateSolver
+from FieldMapping import shapeFunctions, elementNodes
+from StructuredMesh import cantileverMesh
+
+#Elements per block of the batched element matrices
+_blockSize = 2048
+#Largest number of free DOF solved with dense matrices
+maxDenseDofs = 500
+#VTK cell type and Gauss orders (stiffness, mass) of the brick elements by mesh order
+_brickElements = {1: (12, 2, 2), 2: (25, 2, 3)}
+
+
+def gaussLattice(order):
+    points, weights = np.polynomial.legendre.leggauss(order)
+    grid = np.stack(np.meshgrid(points, points, points, indexing='ij'), axis=-1).reshape(-1, 3)
+    return grid, np.einsum('i,j,k->ijk', weights, weights, weights).ravel()
+
+
+#Shape functions (points, nodes), physical derivatives (elements, points, 3, nodes) and |J|*weight (elements, points)
+def brickGradients(elementCoordinates, natural, quadratic, order):
+    points, weights = gaussLattice(order)
+    shape, derivatives = shapeFunctions(points, natural, quadratic)
+    jacobian = np.einsum('gka,ekb->egab', derivatives, elementCoordinates)
+    determinant = np.linalg.det(jacobian)
+    if np.any(determinant <= 0):
+        raise ValueError('Brick mesh has distorted or inverted elements')
+    gradients = np.linalg.solve(jacobian, np.broadcast_to(derivatives.transpose(0, 2, 1), jacobian.shape[:2] + (3, len(natural))))
+    return shape, gradients, determinant*weights
+
+
+#Isotropic elasticity in the Abaqus component order 11, 22, 33, 12, 13, 23 with engineering shear strains
+def isotropicElasticity(youngsModulus, poissonsRatio):
+    lame = youngsModulus*poissonsRatio/((1 + poissonsRatio)*(1 - 2*poissonsRatio))
+    shear = youngsModulus/(2*(1 + poissonsRatio))
+    elasticity = np.zeros((6, 6))
+    elasticity[:3,:3] = lame
+    elasticity[np.arange(3), np.arange(3)] += 2*shear
+    elasticity[np.arange(3, 6), np.arange(3, 6)] = shear
+    return elasticity
+
+
+def _assemble(matrices, dofs, numDofs, total):
+    size = dofs.shape[1]
+    rows = np.repeat(dofs, size, axis=1).ravel()
+    columns = np.tile(dofs, (1, size)).ravel()
+    blockMatrix = sparse.coo_matrix((matrices.ravel(), (rows, columns)), shape=(numDofs, numDofs)).tocsr()
+    return blockMatrix if total is None else total + blockMatrix
+
+
+#Global stiffness and mass (CSR) of a brick mesh, nodes (n, 3) and zero-based elements (e, 8 or 20)
+def assembleBricks(nodes, elements, order, youngsModulus, poissonsRatio, density, lumped=False):
+    cellType, stiffnessOrder, massOrder = _brickElements[order]
+    natural, quadratic = elementNodes(cellType)
+    numNodes = len(natural)
+    numDofs = 3*len(nodes)
+    indexType = np.int32 if numDofs < 2**31 else np.int64
+    elasticity = isotropicElasticity(youngsModulus, poissonsRatio)
+    stiffness = mass = None
+    for start in range(0, len(elements), _blockSize):
+        block = elements[start:start+_blockSize]
+        coordinates = nodes[block]
+        shape, gradients, weights = brickGradients(coordinates, natural, quadratic, stiffnessOrder)
+        strain = np.zeros(gradients.shape[:2] + (6, numNodes, 3))
+        for axis in range(3):
+            strain[:,:,axis,:,axis] = gradients[:,:,axis]
+        for component, (first, second) in zip((3, 4, 5), ((0, 1), (0, 2), (1, 2))):
+            strain[:,:,component,:,first] = gradients[:,:,second]
+            strain[:,:,component,:,second] = gradients[:,:,first]
+        strain = strain.reshape(gradients.shape[:2] + (6, 3*numNodes))
+        blockStiffness = np.einsum('egip,ij,egjq,eg->epq', strain, elasticity, strain, weights, optimize=True)
+        shape, gradients, weights = brickGradients(coordinates, natural, quadratic, massOrder)
+        scalar = density*np.einsum('gk,gl,eg->ekl', shape, shape, weights)
+        if lumped:
+            diagonal = np.einsum('ekk->ek', scalar)
+            scalar = (diagonal*(density*weights.sum(axis=1)/diagonal.sum(axis=1))[:,None])[:,:,None]*np.eye(numNodes)
+        blockMass = np.einsum('ekl,ab->ekalb', scalar, np.eye(3)).reshape(len(block), 3*numNodes, 3*numNodes)
+        dofs = (3*block[:,:,None] + np.arange(3)).reshape(len(block), -1).astype(indexType)
+        stiffness = _assemble(blockStiffness, dofs, numDofs, stiffness)
+        mass = _assemble(blockMass, dofs, numDofs, mass)
+    return stiffness, mass
+
+
+#Solve function of a symmetric matrix, factorized once: CHOLMOD when scikit-sparse is installed, else SuperLU
+#with a symmetric ordering (MMD_AT_PLUS_A, the fill is lowest for plates) or its default COLAMD (lower for solids)
+def symmetricFactor(matrix, ordering='MMD_AT_PLUS_A'):
+    if PlateSolver.cholesky is not None:
+        return PlateSolver.cholesky(matrix)
+    if ordering == 'COLAMD':
+        return sparselinalg.splu(matrix).solve
+    return sparselinalg.splu(matrix, permc_spec=ordering, diag_pivot_thresh=0.0, options={'SymmetricMode': True}).solve
+
+
+#Lowest numModes eigenpairs of stiffness*phi = omega^2*mass*phi with the fixed DOF removed
+#Returns eigenvalues omega^2, frequencies in cycles/time and mass-normalized modes (DOF, modes), zero at fixed DOF
+def lowestModes(stiffness, mass, numModes, fixed=(), shift=0.0, ordering='MMD_AT_PLUS_A'):
+    numDofs = stiffness.shape[0]
+    free = np.setdiff1d(np.arange(numDofs), np.asarray(fixed, dtype=np.int64))
+    freeStiffness = stiffness[free][:,free]
+    freeMass = mass[free][:,free]
+    numModes = min(numModes, len(free))
+    start = time.time()
+    if len(free) <= maxDenseDofs or numModes >= len(free) - 1:
+        eigenvalues, vectors = linalg.eigh(freeStiffness.toarray(), freeMass.toarray(), subset_by_index=(0, numModes-1))
+        method = 'dense'
+    else:
+        #K - shift*M is factorized once, every Lanczos iteration is a solve with the factor
+        shifted = (freeStiffness - shift*freeMass).tocsc()
+        inverse = sparselinalg.LinearOperator(shifted.shape, matvec=symmetricFactor(shifted, ordering), dtype=np.float64)
+        eigenvalues, vectors = sparselinalg.eigsh(shifted, k=numModes, M=freeMass.tocsc(), sigma=shift, which='LM', OPinv=inverse)
+        method = 'shift-invert Lanczos'
+    order = np.argsort(eigenvalues)
+    modes = np.zeros((numDofs, numModes))
+    modes[free] = vectors[:,order]
+    eigenvalues = eigenvalues[order]
+    return {'eigenvalues': eigenvalues, 'frequencies': np.sqrt(np.maximum(eigenvalues, 0.0))/(2*np.pi), 'modes': modes,
+            'numDofs': len(free), 'method': method, 'solveTime': time.time() - start}
+
+
+#The hoist of OverheadHoist.py: pinned at (0, 0), rolling at (2, 0)
+def hoistModes(numModes=6, lumped=False, area=TrussSolver.hoistArea, density=TrussSolver.hoistDensity):
+    nodes, members = TrussSolver.trussFromLines(TrussSolver.hoistLines)
+    youngsModulus = TrussSolver.hoistElastic[0][0]
+    stiffness = TrussSolver.assembleStiffness(nodes, members, area, youngsModulus)
+    mass = TrussSolver.assembleMass(nodes, members, area, density, lumped)
+    fixed = TrussSolver.boundaryArrays(nodes, {}, TrussSolver.hoistEncastre, TrussSolver.hoistRolling)[1]
+    modes = lowestModes(stiffness, mass, numModes, fixed)
+    modes['nodes'] = nodes
+    return modes
+
+
+#The beam of CantileverBeam.py (mm, tonne, s): encastre at z = 0
+def cantileverModes(numModes=6, width=25, height=20, length=200, seedSize=10, order=2, lumped=False,
+                    youngsModulus=200E3, poissonsRatio=0.29, density=7.8E-9):
+    mesh = cantileverMesh(width, height, length, seedSize, order)
+    stiffness, mass = assembleBricks(mesh.nodes, mesh.elements.astype(np.int64) - 1, order, youngsModulus, poissonsRatio, density, lumped)
+    fixedNodes = mesh.nodeSets['ZMIN'] - 1
+    fixed = (3*fixedNodes[:,None] + np.arange(3)).ravel()
+    modes = lowestModes(stiffness, mass, numModes, fixed, ordering='COLAMD')
+    modes['nodes'] = mesh.nodes
+    return modes
+
+
+#The plate of BendingPlate.py: encastre at x = 0, rolling (u3 fixed) at x = length; bending modes only
+def plateModes(numModes=6, length=1.0, width=0.4, thickness=0.01, numX=40, numY=16, lumped=False,
+               youngsModulus=200E9, poissonsRatio=0.29, density=7800):
+    coordinates, connectivity = PlateSolver.quadraticQuadMesh(length, width, numX, numY)
+    nodes = coordinates[:,:2]
+    elements = connectivity - 1
+    bending, shear = PlateSolver.sectionStiffness(thickness, youngsModulus, poissonsRatio)
+    stiffness = PlateSolver.assembleStiffness(nodes, elements, bending, shear)
+    mass = PlateSolver.assembleMass(nodes, elements, thickness, density, lumped)
+    tolerance = 1E-9*length
+    encastre = np.nonzero(np.abs(nodes[:,0]) <= tolerance)[0]
+    rolling = np.nonzero(np.abs(nodes[:,0] - length) <= tolerance)[0]
+    fixed = np.concatenate((3*encastre, 3*encastre+1, 3*encastre+2, 3*rolling))
+    modes = lowestModes(stiffness, mass, numModes, fixed)
+    modes['nodes'] = nodes
+    return modes
+
+
+#Add a Lanczos frequency step for the first numModes modes, with U output for the mode shapes, to a model.
+#It goes in right after previousStep, by default ahead of the load step, so the modes are those of the unloaded model
+def requestFrequencyStep(modelName, numModes, previousStep='Initial', stepName='Frequency Step'):
+    from abaqus import mdb
+    from abaqusConstants import LANCZOS
+    model = mdb.models[modelName]
+    model.FrequencyStep(name=stepName, previous=previousStep, description='Natural frequencies', numEigen=numModes, eigensolver=LANCZOS)
+    model.FieldOutputRequest(name='Mode Shapes', createStepName=stepName, variables=('U',))
+
+
+#Natural frequencies of the frequency step of an output database, without the modes below minFrequency
+def odbFrequencies(odbPath, stepName='Frequency Step', minFrequency=1E-3):
+    from odbAccess import openOdb
+    odb = openOdb(path=odbPath, readOnly=True)
+    frequencies = [frame.frequency for frame in odb.steps[stepName].frames if frame.mode > 0]
+    odb.close()
+    return [frequency for frequency in frequencies if frequency >= minFrequency]
+
+
+#Element types of the instances of an output database, from the first element of each instance
+def odbElementTypes(odbPath):
+    from odbAccess import openOdb
+    odb = openOdb(path=odbPath, readOnly=True)
+    elementTypes = sorted(set([str(instance.elements[0].type) for instance in odb.rootAssembly.instances.values() if len(instance.elements)]))
+    odb.close()
+    return elementTypes
+
+
+#The cantilever meshed like an output database of buildCantileverModel(numModes=N), for compareWithOdb(): quadratic
+#bricks for C3D20 elements, linear bricks for C3D8 ones, at the seed of the builder. The native linear brick is the
+#fully integrated C3D8 while the builder meshes reduced integration C3D8R, which is softer in bending: part of the
+#difference on the bending modes is the integration of the element, not the model
+def cantileverModesLike(odbPath, numModes=6, seedSize=10, **parameters):
+    elementTypes = odbElementTypes(odbPath)
+    order = 2 if elementTypes and all([elementType.startswith('C3D20') for elementType in elementTypes]) else 1
+    return cantileverModes(numModes, seedSize=seedSize, order=order, **parameters)
+
+
+#Native against Abaqus frequencies, mode by mode in ascending order
+def compareWithOdb(modes, odbPath, stepName='Frequency Step', minFrequency=1E-3):
+    abaqusFrequencies = odbFrequencies(odbPath, stepName, minFrequency)
+    rows = []
+    for mode, (native, abaqus) in enumerate(zip(modes['frequencies'], abaqusFrequencies)):
+        rows.append({'mode': mode+1, 'native': float(native), 'abaqus': float(abaqus), 'relativeDifference': float((native - abaqus)/abaqus)})
+    return rows
+
+
+if __name__ == '__main__':
+    numModes = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    for title, solve in (('hoist', hoistModes), ('cantilever', cantileverModes), ('plate', plateModes)):
+        for lumped in (False, True):
+            start = time.time()
+            results = solve(numModes, lumped=lumped)
+            print('%-10s %-10s %6d DOF  %-20s %.3f s  f = %s' % (title, 'lumped' if lumped else 'consistent', results['numDofs'], results['method'],
+                  time.time() - start, ' '.join(['%.4g' % frequency for frequency in results['frequencies']])))
+    #The cantilever is meshed with the element order of the output database it is compared with
+    odbSolvers = {'hoist': lambda odbPath: hoistModes(numModes), 'cantilever': lambda odbPath: cantileverModesLike(odbPath, numModes),
+                  'plate': lambda odbPath: plateModes(numModes)}
+    for argument in sys.argv[2:]:
+        title, odbPath = argument.split('=', 1)
+        print('%s against %s' % (title, odbPath))
+        for row in compareWithOdb(odbSolvers[title](odbPath), odbPath):
+            print('    mode %2d  native %.5g  Abaqus %.5g  difference %+.2f%%' % (row['mode'], row['native'], row['abaqus'], 100*row['relativeDifference']))
@@ -0,0 +1,168 @@
+#Build many models, and variants of them, in one kernel session instead of one 'abaqus cae noGUI=' launch per script
+#Every entry of a batch names a builder (one of the five model scripts), the model/job name and the builder
+#parameters. The builder modules are imported on first use, and the builders import the kernel modules they use
+#(sketch, part, mesh, ...) inside the builder function rather than at the top of their file. Models are created
+#under their own name (nothing renames 'Model-1', so any number of models fit in one mdb) and the input deck of
+#every model is written, and solved by JobFarm.py with solve=True.
+#The report splits the wall time into kernel startup, first imports, model building and deck writing, and
+#compares it with one launch per model, which pays the startup every time.
+#Run inside CAE: abaqus cae noGUI=ModelBatch.py -- [batch.json] [solve]
+#Launch CAE and time its startup: python ModelBatch.py launch [batch.json]
+#Run without Abaqus: PYTHONPATH=abaqusStub python ModelBatch.py [batch.json]
+import os
+import sys
+import json
+import time
+import subprocess
+
+import JobFarm
+import PartTemplates
+
+sessionStart = time.time()
+
+#Builder name: module, model builder, job builder
+modelBuilders = {
+    'CantileverBeam': ('CantileverBeam', 'buildCantileverModel', 'createCantileverJob'),
+    'BendingPlate': ('BendingPlate', 'buildBendingPlateModel', 'createBendingPlateJob'),
+    'ConnectingLug': ('ConnectingLug', 'buildConnectingLugModel', 'createConnectingLugJob'),
+    'ElectricalSwitch': ('ElectricalSwitch', 'buildSwitchModel', 'createSwitchJob'),
+    'OverheadHoist': ('OverheadHoist', 'buildOverheadHoistModel', 'createOverheadHoistJob'),
+}
+#Builders that take a PartTemplates.PartTemplateCache: variants of the same geometry copy the partitioned part
+templateBuilders = ('BendingPlate', 'ConnectingLug', 'ElectricalSwitch')
+
+#The five original models under their original job names, and a few variants of each
+defaultBatch = [
+    {'builder': 'CantileverBeam', 'name': 'CantileverJob'},
+    {'builder': 'BendingPlate', 'name': 'PlateJob'},
+    {'builder': 'ConnectingLug', 'name': 'ConnectingLugJob'},
+    {'builder': 'ElectricalSwitch', 'name': 'SwitchContactJob'},
+    {'builder': 'OverheadHoist', 'name': 'OverhoistAnalysisJob'},
+    {'builder': 'CantileverBeam', 'name': 'CantileverWide', 'parameters': {'width': 30}},
+    {'builder': 'CantileverBeam', 'name': 'CantileverFine', 'parameters': {'seedSize': 5}},
+    {'builder': 'BendingPlate', 'name': 'PlateThick', 'parameters': {'thickness': 0.02}},
+    {'builder': 'ConnectingLug', 'name': 'ConnectingLugFineHole', 'parameters': {'holeSeedSize': 0.001}},
+    {'builder': 'ElectricalSwitch', 'name': 'SwitchHalfStroke', 'parameters': {'displacement': -1.5}},
+    {'builder': 'OverheadHoist', 'name': 'OverhoistHeavy', 'parameters': {'force': -2000}},
+]
+
+
+#Wall clock time the process was started at: CAE_LAUNCH_TIME when started by launchModelBatch(),
+#otherwise the process start time of Linux /proc, None when neither is available
+def processStartTime():
+    if os.environ.get('CAE_LAUNCH_TIME'):
+        return float(os.environ['CAE_LAUNCH_TIME'])
+    try:
+        statFile = open('/proc/self/stat')
+        startTicks = float(statFile.read().rsplit(')', 1)[1].split()[19])
+        statFile.close()
+        bootFile = open('/proc/stat')
+        bootTime = [float(line.split()[1]) for line in bootFile if line.startswith('btime')][0]
+        bootFile.close()
+        return bootTime + startTicks/os.sysconf('SC_CLK_TCK')
+    except (IOError, OSError, IndexError, ValueError, AttributeError):
+        return None
+
+
+def readBatch(path):
+    batchFile = open(path)
+    batch = json.load(batchFile)
+    batchFile.close()
+    return batch
+
+
+#Build every entry of the batch in this session and write its deck
+#Entries reuse a name to rebuild it: the earlier model and job of that name are deleted first.
+#keepModels=False drops every model once its deck is written, so long batches do not pile up in the mdb
+#useTemplates=True builds the plate, lug and switch variants from part templates (see PartTemplates.py)
+def runModelBatch(batch=defaultBatch, solve=False, maxConcurrentJobs=None, workingDirectory='.', keepModels=False, useTemplates=True):
+    from abaqus import mdb
+    from abaqusConstants import OFF
+    startup = sessionStart - processStartTime() if processStartTime() is not None else None
+    #The empty default model is dropped once the first model exists, the mdb cannot be left without a model
+    defaultModels = [name for name in mdb.models.keys() if name == 'Model-1']
+    modules = {}
+    rows = []
+    templates = PartTemplates.PartTemplateCache() if useTemplates else None
+    for entry in batch:
+        name = entry['name']
+        moduleName, buildName, jobName = modelBuilders[entry['builder']]
+        row = {'job': name, 'status': 'BUILT', 'builder': entry['builder'], 'importTime': 0.0, 'templateSaved': 0.0}
+        if moduleName not in modules:
+            importStart = time.time()
+            modules[moduleName] = __import__(moduleName)
+            row['importTime'] = time.time() - importStart
+        if name in mdb.jobs.keys():
+            del mdb.jobs[name]
+        if name in mdb.models.keys():
+            del mdb.models[name]
+
+        buildStart = time.time()
+        parameters = dict(entry.get('parameters', {}))
+        if templates is not None and entry['builder'] in templateBuilders:
+            parameters['templates'] = templates
+        getattr(modules[moduleName], buildName)(modelName=name, **parameters)
+        if 'templates' in parameters:
+            row['templateSaved'] = templates.builds[-1]['savedTime']
+        if defaultModels and name != 'Model-1':
+            del mdb.models[defaultModels.pop()]
+        row['buildTime'] = time.time() - buildStart
+
+        deckStart = time.time()
+        batchJob = getattr(modules[moduleName], jobName)(jobName=name, modelName=name, numCpus=entry.get('numCpus', 1))
+        previousDirectory = os.getcwd()
+        os.chdir(workingDirectory)
+        try:
+            batchJob.writeInput(consistencyChecking=OFF)
+        finally:
+            os.chdir(previousDirectory)
+        row['deckTime'] = time.time() - deckStart
+        if not keepModels:
+            del mdb.jobs[name]
+            if len(mdb.models.keys()) > 1:
+                del mdb.models[name]
+        rows.append(row)
+    if templates is not None and not keepModels:
+        templates.invalidate()
+
+    if solve:
+        rowsByJob = dict([(row['job'], row) for row in rows])
+        def collectStatus(farmJob):
+            rowsByJob[farmJob.name]['status'] = farmJob.status
+            rowsByJob[farmJob.name]['wallTime'] = farmJob.wallTime
+        JobFarm.runJobFarm([JobFarm.FarmJob(entry['name'], numCpus=entry.get('numCpus', 1)) for entry in batch],
+                           maxConcurrentJobs=maxConcurrentJobs, workingDirectory=workingDirectory, onFinished=collectStatus)
+    printBatchReport(rows, startup)
+    return rows
+
+
+#A launch per model pays the kernel startup and the first imports of its builder every time
+def printBatchReport(rows, startup):
+    imports = sum([row['importTime'] for row in rows])
+    builds = sum([row['buildTime'] for row in rows])
+    decks = sum([row['deckTime'] for row in rows])
+    builderImports = {}
+    for row in rows:
+        builderImports.setdefault(row['builder'], row['importTime'])
+        print('%-24s %-18s import %7.3f s  build %7.3f s  deck %7.3f s  template saved %7.3f s' % (row['job'], row['builder'], row['importTime'], row['buildTime'], row['deckTime'], row['templateSaved']))
+    print('%d models: imports %.2f s, building %.2f s, decks %.2f s, saved by part templates %.2f s' % (len(rows), imports, builds, decks, sum([row['templateSaved'] for row in rows])))
+    if startup is not None:
+        separateLaunches = len(rows)*startup + sum([builderImports[row['builder']] for row in rows]) + builds + decks
+        print('Kernel startup %.2f s. One session: %.2f s, one launch per model: about %.2f s' % (startup, startup + imports + builds + decks, separateLaunches))
+
+
+#Start 'abaqus cae noGUI=ModelBatch.py' and pass it the launch time, so that the batch can time the kernel startup
+def launchModelBatch(arguments=()):
+    environment = dict(os.environ)
+    environment['CAE_LAUNCH_TIME'] = repr(time.time())
+    command = JobFarm.abaqusCommand() + ['cae', 'noGUI=%s' % os.path.abspath(__file__), '--'] + list(arguments)
+    return subprocess.call(command, env=environment)
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else sys.argv[1:]
+    if arguments[:1] == ['launch']:
+        sys.exit(launchModelBatch(arguments[1:]))
+    batchPaths = [argument for argument in arguments if argument != 'solve']
+    batchRows = runModelBatch(readBatch(batchPaths[0]) if batchPaths else defaultBatch, solve='solve' in arguments)
+    JobFarm.writeResultTable(batchRows, 'ModelBatch.csv')
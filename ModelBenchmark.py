@@ -0,0 +1,363 @@
+#Benchmark of the five models over a ladder of mesh densities, with a history file and regression flags
+#Level n refines the mesh of every model by 2**n: the seed sizes of the cantilever, the lug and the switch
+#are divided by 2**n, the plate seeds and the hoist seedNumber multiplied by it. Two backends:
+#  cae     every model built in the kernel (Abaqus/CAE, or abaqusStub), its deck solved by the solver
+#          (JobFarm.py) and its output database read by OdbExtractor.py. Build and mesh times are the
+#          PhaseTrace.py phases of the builder, element/node counts its mesh counter (or the output database
+#          when the kernel gives none), peak memory the maximum resident size of the solver process
+#  native  the Abaqus-free solvers: the cantilever on StructuredMesh.py bricks (ModalSolver.assembleBricks),
+#          PlateSolver.py, SwitchSolver.py, and a Warren truss of TrussSolver.py 2**n*200 bays long (truss
+#          members are not refined, so the truss ladder lengthens the truss instead). Build time covers
+#          mesh, assembly and loads; TrussSolver and SwitchSolver assemble inside their solve. Every case runs
+#          in a forked process and peak memory is its maximum resident size. The lug has no native solver
+#Every row (backend, model, level) is appended to ModelBenchmark.jsonl with the run time and host.
+#Rows are compared with ModelBenchmark.baseline.json when it exists: a time or memory more than tolerance
+#above the baseline (and more than a minimum, so noise on tiny timings is not flagged) is a regression.
+#Run inside CAE: abaqus cae noGUI=ModelBenchmark.py -- [levels=3] [backends=cae,native] [models=...] [baseline]
+#Run without Abaqus: python ModelBenchmark.py [levels=3] (native), PYTHONPATH=abaqusStub python ModelBenchmark.py
+#'baseline' stores the rows of the run as the new baseline instead of comparing with it
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+
+import numpy as np
+
+import JobFarm
+import PhaseTrace
+from ModelBatch import modelBuilders
+
+#Mesh parameters of every model at level n (refinement 2**n), and the DOF per node of its elements
+benchmarkModels = {
+    'CantileverBeam': (lambda refinement: {'seedSize': 10.0/refinement}, 3),
+    'BendingPlate': (lambda refinement: {'numX': 20*refinement, 'numY': 16*refinement}, 5),
+    'ConnectingLug': (lambda refinement: {'seedSize': 0.0025/refinement}, 3),
+    'ElectricalSwitch': (lambda refinement: {'seedSize': 0.25/refinement}, 6),
+    'OverheadHoist': (lambda refinement: {'seedNumber': 2*refinement}, 2),
+}
+timeMetrics = ('buildTime', 'meshTime', 'solveTime', 'extractionTime')
+historyPath = 'ModelBenchmark.jsonl'
+baselinePath = 'ModelBenchmark.baseline.json'
+
+
+def kernelAvailable():
+    try:
+        import abaqus
+        return True
+    except ImportError:
+        return False
+
+
+def _megabytes(maxrss):
+    #ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return maxrss/(1024.0*1024.0) if sys.platform == 'darwin' else maxrss/1024.0
+
+
+#Solve a deck with the solver command of JobFarm.py, waiting on the process with wait4() for its peak memory
+def solveWithPeakMemory(name, workingDirectory, numCpus=1):
+    farmJob = JobFarm.FarmJob(name, numCpus=numCpus)
+    if not hasattr(os, 'wait4'):
+        JobFarm.runJobFarm([farmJob], maxConcurrentJobs=1, workingDirectory=workingDirectory)
+        return farmJob, None
+    farmJob.start(workingDirectory)
+    pid, status, usage = os.wait4(farmJob.process.pid, 0)
+    farmJob.endTime = time.time()
+    farmJob.returnCode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    farmJob.process.returncode = farmJob.returnCode
+    farmJob.status = 'COMPLETED' if farmJob.returnCode == 0 else 'ABORTED'
+    return farmJob, _megabytes(usage.ru_maxrss)
+
+
+def odbCounts(odbPath):
+    from odbAccess import openOdb
+    odb = openOdb(path=odbPath, readOnly=True)
+    instances = odb.rootAssembly.instances.values()
+    counts = (sum([len(instance.elements) for instance in instances]), sum([len(instance.nodes) for instance in instances]))
+    odb.close()
+    return counts
+
+
+#One model at one level in the kernel: build, write the deck, solve, extract
+def runCaeCase(model, level, workingDirectory):
+    from abaqus import mdb
+    from abaqusConstants import OFF
+    import OdbExtractor
+    parameters, dofsPerNode = benchmarkModels[model]
+    moduleName, buildName, jobName = modelBuilders[model]
+    module = __import__(moduleName)
+    name = 'Bench_%s_L%d' % (model, level)
+    row = {'backend': 'cae', 'model': model, 'level': level, 'job': name, 'parameters': parameters(2**level)}
+    if name in mdb.jobs.keys():
+        del mdb.jobs[name]
+    if name in mdb.models.keys():
+        del mdb.models[name]
+
+    firstEvent = len(PhaseTrace.recordedEvents())
+    buildStart = time.time()
+    getattr(module, buildName)(modelName=name, **row['parameters'])
+    row['buildTime'] = time.time() - buildStart
+    events = PhaseTrace.recordedEvents()[firstEvent:]
+    row['meshTime'] = PhaseTrace.eventTotals(events).get('mesh', {'duration': 0.0})['duration']
+    meshCounters = [event['args'] for event in events if event.get('ph') == 'C' and event['name'] == 'mesh']
+    row['elements'] = meshCounters[-1]['elements'] if meshCounters else 0
+    row['nodes'] = meshCounters[-1]['nodes'] if meshCounters else 0
+
+    previousDirectory = os.getcwd()
+    os.chdir(workingDirectory)
+    try:
+        getattr(module, jobName)(jobName=name, modelName=name).writeInput(consistencyChecking=OFF)
+    finally:
+        os.chdir(previousDirectory)
+    if len(mdb.models.keys()) > 1:
+        del mdb.models[name]
+    del mdb.jobs[name]
+
+    farmJob, row['peakMemory'] = solveWithPeakMemory(name, workingDirectory)
+    row['solveTime'] = farmJob.wallTime
+    row['status'] = farmJob.status
+    if farmJob.status == 'COMPLETED':
+        odbPath = os.path.join(workingDirectory, name + '.odb')
+        storeDirectory = os.path.join(workingDirectory, name + '_fields')
+        extractionStart = time.time()
+        OdbExtractor.extractOdb(odbPath, storeDirectory)
+        row['extractionTime'] = time.time() - extractionStart
+        shutil.rmtree(storeDirectory, ignore_errors=True)
+        if not row['elements']:
+            row['elements'], row['nodes'] = odbCounts(odbPath)
+    row['dofs'] = row['nodes']*dofsPerNode
+    return row
+
+
+#Tributary length of every coordinate value of a structured line of nodes
+def _tributaryLengths(values):
+    points = np.unique(values)
+    halves = np.diff(points)/2.0
+    lengths = np.zeros(len(points))
+    lengths[:-1] += halves
+    lengths[1:] += halves
+    return lengths[np.searchsorted(points, values)]
+
+
+def nativeCantilever(refinement, directory, width=25, height=20, length=200, pressure=0.5, youngsModulus=200E3, poissonsRatio=0.29):
+    from StructuredMesh import cantileverMesh
+    import ModalSolver
+    timings = {}
+    start = time.time()
+    mesh = cantileverMesh(width, height, length, 10.0/refinement, 1)
+    timings['meshTime'] = time.time() - start
+    nodes, elements = mesh.nodes, mesh.elements.astype(np.int64) - 1
+    stiffness = ModalSolver.assembleBricks(nodes, elements, 1, youngsModulus, poissonsRatio, 7.8E-9)[0]
+    #The pressure on YMAX as nodal forces, from the tributary area of every top node
+    top = mesh.nodeSets['YMAX'] - 1
+    load = np.zeros(stiffness.shape[0])
+    load[3*top+1] = -pressure*_tributaryLengths(nodes[top,0])*_tributaryLengths(nodes[top,2])
+    fixedNodes = mesh.nodeSets['ZMIN'] - 1
+    free = np.setdiff1d(np.arange(stiffness.shape[0]), (3*fixedNodes[:,None] + np.arange(3)).ravel())
+    timings['buildTime'] = time.time() - start
+    start = time.time()
+    displacement = np.zeros(stiffness.shape[0])
+    displacement[free] = ModalSolver.symmetricFactor(stiffness[free][:,free].tocsc(), 'COLAMD')(load[free])
+    timings['solveTime'] = time.time() - start
+    return timings, displacement.reshape(-1, 3), len(elements), len(nodes), stiffness.shape[0]
+
+
+def nativePlate(refinement, directory, length=1.0, width=0.4, thickness=0.01, pressure=2E3, youngsModulus=200E9, poissonsRatio=0.29):
+    import PlateSolver
+    timings = {}
+    start = time.time()
+    coordinates, connectivity = PlateSolver.quadraticQuadMesh(length, width, 20*refinement, 16*refinement)
+    timings['meshTime'] = time.time() - start
+    nodes, elements = coordinates[:,:2], connectivity - 1
+    bending, shear = PlateSolver.sectionStiffness(thickness, youngsModulus, poissonsRatio)
+    stiffness = PlateSolver.assembleStiffness(nodes, elements, bending, shear)
+    load = PlateSolver.pressureLoad(nodes, elements, pressure)
+    tolerance = 1E-9*length
+    encastre = np.nonzero(np.abs(nodes[:,0]) <= tolerance)[0]
+    rolling = np.nonzero(np.abs(nodes[:,0] - length) <= tolerance)[0]
+    free = np.setdiff1d(np.arange(stiffness.shape[0]), np.concatenate((3*encastre, 3*encastre+1, 3*encastre+2, 3*rolling)))
+    timings['buildTime'] = time.time() - start
+    start = time.time()
+    displacement = np.zeros(stiffness.shape[0])
+    displacement[free] = PlateSolver.solveSymmetric(stiffness[free][:,free].tocsc(), load[free])
+    timings['solveTime'] = time.time() - start
+    return timings, displacement.reshape(-1, 3), len(elements), len(nodes), stiffness.shape[0]
+
+
+def nativeSwitch(refinement, directory):
+    import SwitchSolver
+    timings = {}
+    start = time.time()
+    mesh = SwitchSolver.switchMesh(0.25/refinement)
+    timings['meshTime'] = timings['buildTime'] = time.time() - start
+    start = time.time()
+    results = SwitchSolver.solveSwitch(seedSize=0.25/refinement)
+    timings['solveTime'] = time.time() - start
+    SwitchSolver.writeForceDisplacement(results['curve'], os.path.join(directory, 'Bench_ElectricalSwitch_curve.csv'))
+    return timings, results['U'], len(mesh['elements']), len(mesh['nodes']), results['numDofs']
+
+
+def nativeHoist(refinement, directory, bays=200):
+    import TrussSolver
+    timings = {}
+    start = time.time()
+    numBays = bays*refinement
+    nodes, members = TrussSolver.warrenTruss(numBays)
+    forces = dict([((float(bay), 0.0), (0.0, -1000.0)) for bay in range(1, numBays)])
+    timings['meshTime'] = timings['buildTime'] = time.time() - start
+    start = time.time()
+    results = TrussSolver.solveTruss(nodes, members, TrussSolver.hoistArea, TrussSolver.hoistElastic, forces, ((0.0, 0.0),), ((float(numBays), 0.0),))
+    timings['solveTime'] = time.time() - start
+    return timings, results['U'], len(members), len(nodes), 2*len(nodes)
+
+
+nativeCases = {
+    'CantileverBeam': nativeCantilever,
+    'BendingPlate': nativePlate,
+    'ElectricalSwitch': nativeSwitch,
+    'OverheadHoist': nativeHoist,
+}
+
+
+#One model at one level with the native solvers; extraction writes the displacements as .npy, like OdbExtractor.py
+def _nativeCase(model, level, workingDirectory):
+    name = 'Bench_%s_L%d' % (model, level)
+    row = {'backend': 'native', 'model': model, 'level': level, 'job': name, 'parameters': {'refinement': 2**level}}
+    try:
+        timings, displacement, row['elements'], row['nodes'], row['dofs'] = nativeCases[model](2**level, workingDirectory)
+    except (RuntimeError, ValueError, MemoryError) as error:
+        row.update({'status': 'ABORTED', 'error': '%s: %s' % (type(error).__name__, error)})
+        return row
+    row.update(timings)
+    extractionStart = time.time()
+    np.save(os.path.join(workingDirectory, name + '_U.npy'), displacement)
+    row['extractionTime'] = time.time() - extractionStart
+    row['status'] = 'COMPLETED'
+    return row
+
+
+#Every case runs in a forked process, so that its peak memory is the maximum resident size of that process
+#(wait4()), native and SuperLU/CHOLMOD allocations included, and no case inherits the heap of the one before
+def runNativeCase(model, level, workingDirectory):
+    if not hasattr(os, 'fork'):
+        row = _nativeCase(model, level, workingDirectory)
+        row['peakMemory'] = None
+        return row
+    readEnd, writeEnd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(readEnd)
+        try:
+            output = json.dumps(_nativeCase(model, level, workingDirectory)).encode('utf-8')
+            while output:
+                output = output[os.write(writeEnd, output):]
+        finally:
+            os._exit(0)
+    os.close(writeEnd)
+    chunks = []
+    chunk = os.read(readEnd, 65536)
+    while chunk:
+        chunks.append(chunk)
+        chunk = os.read(readEnd, 65536)
+    os.close(readEnd)
+    pid, status, usage = os.wait4(pid, 0)
+    if not chunks:
+        return {'backend': 'native', 'model': model, 'level': level, 'job': 'Bench_%s_L%d' % (model, level), 'status': 'ABORTED',
+                'error': 'case process ended with status %d' % status, 'peakMemory': _megabytes(usage.ru_maxrss)}
+    row = json.loads(b''.join(chunks).decode('utf-8'))
+    row['peakMemory'] = _megabytes(usage.ru_maxrss)
+    return row
+
+
+def runBenchmark(models=tuple(sorted(benchmarkModels)), levels=3, backends=None, workingDirectory='ModelBenchmark'):
+    if backends is None:
+        backends = (('cae',) if kernelAvailable() else ()) + ('native',)
+    if not os.path.isdir(workingDirectory):
+        os.makedirs(workingDirectory)
+    if 'cae' in backends:
+        PhaseTrace.enable(os.path.join(workingDirectory, 'ModelBenchmark.trace.json'), countFindAt=False)
+    rows = []
+    for backend in backends:
+        for model in models:
+            if backend == 'native' and model not in nativeCases:
+                print('%-6s %-16s no native solver' % (backend, model))
+                continue
+            for level in range(levels):
+                row = (runCaeCase if backend == 'cae' else runNativeCase)(model, level, workingDirectory)
+                rows.append(row)
+                if row['status'] != 'COMPLETED':
+                    print('%-6s %-16s L%d %s %s' % (backend, model, level, row['status'], row.get('error', '')))
+                    continue
+                print('%-6s %-16s L%d %9d elements %9d DOF  build %8.3f s  mesh %8.3f s  solve %8.3f s  extract %8.3f s  %s MB' % (
+                    backend, model, level, row['elements'], row['dofs'], row['buildTime'], row['meshTime'], row['solveTime'],
+                    row['extractionTime'], '%.1f' % row['peakMemory'] if row.get('peakMemory') is not None else '-'))
+    return rows
+
+
+def appendHistory(rows, path=historyPath):
+    run = time.strftime('%Y-%m-%dT%H:%M:%S')
+    historyFile = open(path, 'a')
+    for row in rows:
+        record = dict(row)
+        record.update({'run': run, 'host': socket.gethostname(), 'python': sys.version.split()[0]})
+        historyFile.write(json.dumps(record, sort_keys=True) + '\n')
+    historyFile.close()
+
+
+def saveBaseline(rows, path=baselinePath):
+    baselineFile = open(path, 'w')
+    json.dump({'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'host': socket.gethostname(), 'rows': rows}, baselineFile, indent=1, sort_keys=True)
+    baselineFile.close()
+
+
+#Rows of the run against the baseline rows of the same backend, model and level. A time is a regression
+#when it grows by more than tolerance and by more than minimumSeconds, peak memory likewise with
+#minimumMegabytes. A different element or DOF count is reported as meshChanged: the timings then do not
+#compare like with like and are not flagged
+def compareWithBaseline(rows, path=baselinePath, tolerance=0.2, minimumSeconds=0.05, minimumMegabytes=16.0):
+    baselineFile = open(path)
+    baseline = dict([((row['backend'], row['model'], row['level']), row) for row in json.load(baselineFile)['rows']])
+    baselineFile.close()
+    comparison = []
+    for row in rows:
+        base = baseline.get((row['backend'], row['model'], row['level']))
+        if base is None:
+            continue
+        result = {'backend': row['backend'], 'model': row['model'], 'level': row['level'], 'regressions': [],
+                  'meshChanged': base.get('elements') != row.get('elements') or base.get('dofs') != row.get('dofs')}
+        limits = [(metric, minimumSeconds) for metric in timeMetrics] + [('peakMemory', minimumMegabytes)]
+        for metric, minimum in limits:
+            before, after = base.get(metric), row.get(metric)
+            if before is None or after is None:
+                continue
+            result[metric] = (before, after)
+            if not result['meshChanged'] and after > before*(1.0 + tolerance) and after - before > minimum:
+                result['regressions'].append(metric)
+        comparison.append(result)
+    return comparison
+
+
+def printComparison(comparison):
+    for result in comparison:
+        changes = ['%s %.3g -> %.3g' % (metric, result[metric][0], result[metric][1]) for metric in timeMetrics + ('peakMemory',) if metric in result]
+        flag = 'REGRESSION ' + ','.join(result['regressions']) if result['regressions'] else ('MESH CHANGED' if result['meshChanged'] else '')
+        print('%-6s %-16s L%d  %s  %s' % (result['backend'], result['model'], result['level'], ', '.join(changes), flag))
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[sys.argv.index('--')+1:] if '--' in sys.argv else sys.argv[1:]
+    options = dict([argument.split('=', 1) for argument in arguments if '=' in argument])
+    benchmarkRows = runBenchmark(models=tuple(options['models'].split(',')) if 'models' in options else tuple(sorted(benchmarkModels)),
+                                 levels=int(options.get('levels', 3)),
+                                 backends=tuple(options['backends'].split(',')) if 'backends' in options else None)
+    appendHistory(benchmarkRows)
+    if 'baseline' in arguments:
+        saveBaseline(benchmarkRows)
+        print('Baseline of %d rows written to %s' % (len(benchmarkRows), baselinePath))
+    elif os.path.exists(baselinePath):
+        benchmarkComparison = compareWithBaseline(benchmarkRows, tolerance=float(options.get('tolerance', 0.2)))
+        printComparison(benchmarkComparison)
+        PhaseTrace.write()
+        sys.exit(1 if [result for result in benchmarkComparison if result['regressions']] else 0)
+    PhaseTrace.write()
@@ -0,0 +1,153 @@
+#Headless extraction of field outputs from an output database into memory-mapped NumPy arrays
+#Steps and frames are walked one at a time and every requested output is read with bulkDataBlocks,
+#so only one frame of one field is ever held in memory. Each (step, output) pair is stored as
+#    <store>/<step>/<output>.npy                 values, shape (frames, values, components)
+#    <store>/<step>/<output>_mises.npy           Mises invariant of tensor outputs, shape (frames, values)
+#    <store>/<step>/<output>_labels.npy          node or element labels of the values
+#    <store>/<step>/<output>_integrationPoints.npy
+#and manifest.json lists steps, frame values, instances and the block layout of every output
+#Run with the Abaqus Python interpreter: abaqus python OdbExtractor.py CantileverJob.odb [S U RF ...]
+#Run without Abaqus: PYTHONPATH=abaqusStub python OdbExtractor.py CantileverJob.odb
+import os
+import re
+import sys
+import json
+
+import numpy as np
+
+#Outputs the scripts put in their 'Required Field Outputs' request
+defaultVariables = ('S', 'E', 'U', 'RF', 'CF')
+
+
+def storeName(name):
+    return re.sub('[^A-Za-z0-9_.-]+', '_', name)
+
+
+def _createArray(path, shape, dtype):
+    return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+
+class FieldStore(object):
+    #Memory-mapped arrays of one output of one step, filled frame by frame
+
+    def __init__(self, directory, variable, numFrames, blocks):
+        self.directory = directory
+        self.variable = variable
+        self.numFrames = numFrames
+        self.layout = []
+        numValues = 0
+        for block in blocks:
+            count = len(block.data)
+            self.layout.append({'instance': block.instance.name if block.instance is not None else None,
+                                'offset': numValues, 'count': count})
+            numValues += count
+        self.numValues = numValues
+        self.numComponents = blocks[0].data.shape[1] if np.ndim(blocks[0].data) > 1 else 1
+        self.componentLabels = [str(label) for label in blocks[0].componentLabels]
+        self.position = str(blocks[0].position)
+        basePath = os.path.join(directory, storeName(variable))
+        self.values = _createArray(basePath + '.npy', (numFrames, numValues, self.numComponents), np.asarray(blocks[0].data).dtype)
+        self.mises = None
+        if blocks[0].mises is not None:
+            self.mises = _createArray(basePath + '_mises.npy', (numFrames, numValues), np.float32)
+        labels = _createArray(basePath + '_labels.npy', (numValues,), np.int32)
+        integrationPoints = None
+        if blocks[0].integrationPoints is not None:
+            integrationPoints = _createArray(basePath + '_integrationPoints.npy', (numValues,), np.int32)
+        for block, entry in zip(blocks, self.layout):
+            span = slice(entry['offset'], entry['offset'] + entry['count'])
+            labels[span] = block.nodeLabels if block.nodeLabels is not None else block.elementLabels
+            if integrationPoints is not None:
+                integrationPoints[span] = block.integrationPoints
+        labels.flush()
+        del labels, integrationPoints
+
+    def write(self, frameIndex, blocks):
+        if sum([len(block.data) for block in blocks]) != self.numValues:
+            raise ValueError('Output %s changes size in frame %d' % (self.variable, frameIndex))
+        for block, entry in zip(blocks, self.layout):
+            span = slice(entry['offset'], entry['offset'] + entry['count'])
+            self.values[frameIndex, span] = np.asarray(block.data).reshape(entry['count'], self.numComponents)
+            if self.mises is not None:
+                self.mises[frameIndex, span] = block.mises
+        #Write the frame to disk so the page cache can drop it
+        self.values.flush()
+        if self.mises is not None:
+            self.mises.flush()
+
+    def close(self):
+        del self.values
+        self.mises = None
+
+    def description(self):
+        return {'position': self.position, 'componentLabels': self.componentLabels, 'numValues': self.numValues,
+                'blocks': self.layout, 'mises': self.mises is not None}
+
+
+def extractOdb(odbPath, storeDirectory=None, variables=defaultVariables, stepNames=None):
+    from odbAccess import openOdb
+    if storeDirectory is None:
+        storeDirectory = os.path.splitext(odbPath)[0] + '_fields'
+    if not os.path.isdir(storeDirectory):
+        os.makedirs(storeDirectory)
+    odb = openOdb(path=odbPath, readOnly=True)
+    manifest = {'odb': os.path.abspath(odbPath), 'variables': list(variables), 'steps': []}
+    try:
+        for stepName in (stepNames or odb.steps.keys()):
+            step = odb.steps[stepName]
+            stepDirectory = os.path.join(storeDirectory, storeName(stepName))
+            if not os.path.isdir(stepDirectory):
+                os.makedirs(stepDirectory)
+            numFrames = len(step.frames)
+            frameValues = []
+            stores = {}
+            for frameIndex in range(numFrames):
+                frame = step.frames[frameIndex]
+                frameValues.append(frame.frameValue)
+                availableVariables = frame.fieldOutputs.keys()
+                for variable in variables:
+                    if variable not in availableVariables:
+                        continue
+                    blocks = frame.fieldOutputs[variable].bulkDataBlocks
+                    if not len(blocks):
+                        continue
+                    if variable not in stores:
+                        stores[variable] = FieldStore(stepDirectory, variable, numFrames, blocks)
+                    stores[variable].write(frameIndex, blocks)
+                    del blocks
+                del frame
+            manifest['steps'].append({'name': stepName, 'directory': storeName(stepName), 'frameValues': frameValues,
+                                      'outputs': dict([(variable, stores[variable].description()) for variable in stores])})
+            for store in stores.values():
+                store.close()
+    finally:
+        odb.close()
+    manifestFile = open(os.path.join(storeDirectory, 'manifest.json'), 'w')
+    json.dump(manifest, manifestFile, indent=1, sort_keys=True)
+    manifestFile.close()
+    return storeDirectory
+
+
+#Open a store written by extractOdb(), arrays are memory-mapped read-only
+#fields[stepName][variable] is the values array, with '_mises', '_labels' and '_integrationPoints' arrays next to it
+def loadFieldStore(storeDirectory):
+    manifestFile = open(os.path.join(storeDirectory, 'manifest.json'))
+    manifest = json.load(manifestFile)
+    manifestFile.close()
+    fields = {}
+    for step in manifest['steps']:
+        stepFields = {}
+        for variable, output in step['outputs'].items():
+            basePath = os.path.join(storeDirectory, step['directory'], storeName(variable))
+            for suffix in ('', '_mises', '_labels', '_integrationPoints'):
+                if os.path.exists(basePath + suffix + '.npy'):
+                    stepFields[variable + suffix] = np.load(basePath + suffix + '.npy', mmap_mode='r')
+        fields[step['name']] = stepFields
+    return manifest, fields
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('Usage: OdbExtractor.py JOB.odb [VARIABLE ...]')
+    extractedStore = extractOdb(sys.argv[1], variables=tuple(sys.argv[2:]) or defaultVariables)
+    print('Field outputs of %s written to %s' % (sys.argv[1], extractedStore))
@@ -0,0 +1,120 @@
+#Cache of pre-processed part templates for partition-heavy models
+#Sketching, extruding, assigning sections and partitioning a part (datum planes and findAt() picks, one feature
+#regeneration per partition) is the slow part of building a lug or a switch, and for the variants of a study
+#(another seed, load or step) it gives the same part every time. A template is a model holding only that part,
+#with its material and section, built once per set of geometric parameters; later builds with the same
+#parameters copy the template model (mdb.Model(objectToCopy=...)) and go on with the assembly, steps, loads
+#and mesh. Changing any geometric parameter, or the code of the template builder, changes the key, and the
+#template of the old parameters is deleted once more than maxVariants parameter sets of one part are held.
+#Templates live in the mdb of the session, as models named 'Template-<n>', and are not saved with the job decks.
+#Every build records the template build time, the copy time and the time saved against a fresh build.
+#
+#    templates = PartTemplateCache()
+#    ConnectingLug.buildConnectingLugModel('Lug-1', seedSize=0.002, templates=templates)
+#    ConnectingLug.buildConnectingLugModel('Lug-2', seedSize=0.001, templates=templates)
+#    templates.printReport()
+import time
+import hashlib
+
+import PhaseTrace
+
+
+#Digest of the bytecode and constants of the template builder, so reloading an edited builder in a running
+#session does not return templates built by the old code
+def builderDigest(buildTemplate):
+    code = buildTemplate.__code__
+    digest = hashlib.sha1()
+    digest.update(code.co_code)
+    digest.update(repr(code.co_consts).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+#Parameters are keyed by repr(), so 0.02 and 0.020000000000000004 are different templates
+def templateKey(templateName, parameters, buildTemplate=None):
+    key = '%s(%s)' % (templateName, ', '.join(['%s=%r' % (name, parameters[name]) for name in sorted(parameters)]))
+    if buildTemplate is not None:
+        key += '@' + builderDigest(buildTemplate)
+    return key
+
+
+class PartTemplateCache(object):
+
+    def __init__(self, maxVariants=1):
+        self.maxVariants = maxVariants
+        self.templates = {}
+        self.builds = []
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._count = 0
+
+    #Model modelName holding the template part of templateName for the given parameters, building the
+    #template with buildTemplate(model, **parameters) first when there is none. A model already named
+    #modelName is replaced
+    def copyModel(self, modelName, templateName, parameters, buildTemplate):
+        from abaqus import mdb
+        from abaqusConstants import STANDARD_EXPLICIT
+        key = templateKey(templateName, parameters, buildTemplate)
+        template = self.templates.get(key)
+        hit = template is not None and template['modelName'] in mdb.models.keys()
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._count += 1
+            template = {'key': key, 'templateName': templateName, 'modelName': 'Template-%d' % self._count, 'uses': 0}
+            buildStart = time.time()
+            templateModel = mdb.Model(name=template['modelName'], modelType=STANDARD_EXPLICIT)
+            buildTemplate(templateModel, **parameters)
+            template['buildTime'] = time.time() - buildStart
+            self.templates[key] = template
+            self._evict(templateName, key)
+
+        PhaseTrace.phase('template')
+        copyStart = time.time()
+        if modelName in mdb.models.keys():
+            del mdb.models[modelName]
+        model = mdb.Model(name=modelName, objectToCopy=mdb.models[template['modelName']])
+        copyTime = time.time() - copyStart
+        template['uses'] += 1
+        template['lastUsed'] = time.time()
+
+        #A miss pays the template build and the copy, a hit saves the build
+        build = {'model': modelName, 'template': templateName, 'key': key, 'hit': hit, 'buildTime': template['buildTime'],
+                 'copyTime': copyTime, 'savedTime': template['buildTime'] - copyTime if hit else -copyTime}
+        self.builds.append(build)
+        PhaseTrace.counter('template', hit=int(hit), savedTime=build['savedTime'])
+        return model
+
+    #Drop the least recently used parameter sets of templateName beyond maxVariants, keeping keepKey
+    def _evict(self, templateName, keepKey):
+        variants = [template for template in self.templates.values() if template['templateName'] == templateName and template['key'] != keepKey]
+        variants.sort(key=lambda template: template.get('lastUsed', 0))
+        while len(variants) >= self.maxVariants:
+            self._delete(variants.pop(0))
+
+    def _delete(self, template):
+        from abaqus import mdb
+        #The mdb cannot be left without a model, the last template stays as a plain model
+        if template['modelName'] in mdb.models.keys() and len(mdb.models.keys()) > 1:
+            del mdb.models[template['modelName']]
+        del self.templates[template['key']]
+        self.invalidations += 1
+
+    #Delete the templates of templateName, or every template
+    def invalidate(self, templateName=None):
+        for template in list(self.templates.values()):
+            if templateName is None or template['templateName'] == templateName:
+                self._delete(template)
+
+    def statistics(self):
+        return {'templates': len(self.templates), 'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations,
+                'savedTime': sum([build['savedTime'] for build in self.builds])}
+
+    def printReport(self):
+        print('%-28s %-16s %5s %10s %10s %10s' % ('Model', 'Template', 'Hit', 'Build [s]', 'Copy [s]', 'Saved [s]'))
+        for build in self.builds:
+            print('%-28s %-16s %5s %10.3f %10.3f %10.3f' % (build['model'], build['template'], 'yes' if build['hit'] else 'no',
+                                                          build['buildTime'], build['copyTime'], build['savedTime']))
+        statistics = self.statistics()
+        print('%d hits, %d misses, %d templates held, %.3f s saved' % (statistics['hits'], statistics['misses'], statistics['templates'], statistics['savedTime']))
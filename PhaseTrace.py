@@ -0,0 +1,188 @@
+#Per-phase timers and counters for the model scripts, written as a Chrome trace (chrome://tracing, Perfetto)
+#Tracing is off unless CAE_TRACE names the trace file, or enable() is called:
+#    CAE_TRACE=ConnectingLug.trace.json abaqus cae noGUI=ConnectingLug.py
+#phase('mesh') ends the current phase of a script and starts the next one, so the phases are marked without
+#re-indenting the scripts, span() times a nested block and counter() records values such as the element and
+#node counts of a mesh. While tracing, a profile hook counts the findAt() calls made to the kernel, and every
+#phase reports the number made during it.
+#When tracing is off phase() and counter() return at once, span() returns a shared do-nothing context and
+#no profile hook is installed.
+#Compare two traces, phases more than 20% slower are flagged: python PhaseTrace.py base.json new.json [0.2]
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+
+_clock = getattr(time, 'perf_counter', time.time)
+_trace = None
+
+
+class _NullSpan(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+
+_nullSpan = _NullSpan()
+
+
+class Trace(object):
+
+    def __init__(self, path):
+        self.path = path
+        self.events = []
+        self.start = _clock()
+        self.pid = os.getpid()
+        self.findAtCalls = 0
+        self.current = None
+        self.name = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python'
+
+    def timestamp(self):
+        return (_clock() - self.start)*1E6
+
+    def begin(self, name, category, args=None):
+        return (name, category, self.timestamp(), self.findAtCalls, args or {})
+
+    def end(self, opened):
+        name, category, start, findAtCalls, args = opened
+        args = dict(args)
+        args['findAt'] = self.findAtCalls - findAtCalls
+        self.events.append({'name': name, 'cat': category, 'ph': 'X', 'ts': start, 'dur': self.timestamp() - start,
+                            'pid': self.pid, 'tid': threading.current_thread().ident, 'args': args})
+
+    def phase(self, name):
+        if self.current is not None:
+            self.end(self.current)
+        self.current = self.begin(name, 'phase') if name is not None else None
+
+    def counter(self, name, values):
+        self.events.append({'name': name, 'ph': 'C', 'ts': self.timestamp(), 'pid': self.pid, 'args': values})
+
+    #Profile hook: kernel methods are C functions in Abaqus/CAE and functions of the abaqus module in the stub
+    def profile(self, frame, event, arg):
+        if event == 'c_call':
+            if getattr(arg, '__name__', None) == 'findAt':
+                self.findAtCalls += 1
+        elif event == 'call' and frame.f_code.co_name == 'findAt' and frame.f_globals.get('__name__') == 'abaqus':
+            self.findAtCalls += 1
+
+    def write(self):
+        self.phase(None)
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': self.name}}]
+        traceFile = open(self.path, 'w')
+        json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms',
+                   'otherData': {'argv': sys.argv, 'findAtCalls': self.findAtCalls}}, traceFile, indent=0)
+        traceFile.close()
+        return self.path
+
+
+class _Span(object):
+
+    def __init__(self, trace, name, args):
+        self.trace = trace
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.opened = self.trace.begin(self.name, 'span', self.args)
+        return self
+
+    def __exit__(self, *exception):
+        self.trace.end(self.opened)
+        return False
+
+
+#countFindAt=False leaves out the profile hook, which slows every Python call of the traced script
+def enable(path, countFindAt=True):
+    global _trace
+    if _trace is None:
+        _trace = Trace(path)
+        if countFindAt:
+            sys.setprofile(_trace.profile)
+        atexit.register(write)
+    return _trace
+
+
+def enabled():
+    return _trace is not None
+
+
+def phase(name):
+    if _trace is None:
+        return
+    _trace.phase(name)
+
+
+def span(name, **args):
+    if _trace is None:
+        return _nullSpan
+    return _Span(_trace, name, args)
+
+
+def counter(name, **values):
+    if _trace is None:
+        return
+    _trace.counter(name, values)
+
+
+#Write the trace, scripts call it at the end because Abaqus/CAE may exit without running atexit handlers
+def write():
+    if _trace is None:
+        return None
+    return _trace.write()
+
+
+#Events recorded so far, in order, so a script can total the phases of one build (see ModelBenchmark.py)
+def recordedEvents():
+    if _trace is None:
+        return []
+    return list(_trace.events)
+
+
+#Total duration in seconds and findAt calls of every phase and span of a trace file
+def phaseTotals(path):
+    traceFile = open(path)
+    events = json.load(traceFile)['traceEvents']
+    traceFile.close()
+    return eventTotals(events)
+
+
+def eventTotals(events):
+    totals = {}
+    for event in events:
+        if event.get('ph') == 'X':
+            total = totals.setdefault(event['name'], {'duration': 0.0, 'findAt': 0})
+            total['duration'] += event['dur']*1E-6
+            total['findAt'] += event.get('args', {}).get('findAt', 0)
+    return totals
+
+
+#Phases of newPath slower than in basePath by more than tolerance (a fraction), or doing more findAt calls
+def compareTraces(basePath, newPath, tolerance=0.2, minimumDuration=0.01):
+    base = phaseTotals(basePath)
+    new = phaseTotals(newPath)
+    rows = []
+    for name in sorted(set(base) | set(new), key=lambda name: -new.get(name, base.get(name))['duration']):
+        before = base.get(name, {'duration': 0.0, 'findAt': 0})
+        after = new.get(name, {'duration': 0.0, 'findAt': 0})
+        slower = after['duration'] > before['duration']*(1.0 + tolerance) and after['duration'] - before['duration'] > minimumDuration
+        rows.append({'phase': name, 'base': before['duration'], 'new': after['duration'], 'baseFindAt': before['findAt'],
+                     'newFindAt': after['findAt'], 'regression': slower or after['findAt'] > before['findAt']})
+    return rows
+
+
+if os.environ.get('CAE_TRACE'):
+    enable(os.environ['CAE_TRACE'])
+
+
+if __name__ == '__main__':
+    comparison = compareTraces(sys.argv[1], sys.argv[2], float(sys.argv[3]) if len(sys.argv) > 3 else 0.2)
+    for row in comparison:
+        print('%-16s %10.3f s %10.3f s %6d %6d findAt  %s' % (row['phase'], row['base'], row['new'], row['baseFindAt'], row['newFindAt'],
+                                                            'REGRESSION' if row['regression'] else ''))
+    sys.exit(1 if [row for row in comparison if row['regression']] else 0)
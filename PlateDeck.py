@@ -0,0 +1,55 @@
+#Bending plate of BendingPlate.py written straight to an input deck, without starting CAE
+#The 1 x 0.4 plate is meshed here as a structured grid of S8R5 elements: BendingPlate.py seeds the four
+#horizontal half edges with 20 elements and the vertical edges with 16, that is 40 x 16 elements
+#Write the deck: python PlateDeck.py           (PlateJob.inp)
+#Write and run it: python PlateDeck.py run     (abaqus job=PlateJob, see JobFarm.py)
+import sys
+
+import numpy as np
+
+from InpDeck import InpModel, InpPart, InpStep
+from StructuredMesh import rectangleMesh
+
+
+#Nodes and S8R5 connectivity of a structured 8-node quadrilateral mesh of a length x width rectangle
+#Nodes lie on a (2nx+1) x (2ny+1) grid without the element centre points, labels start at 1
+def quadraticQuadMesh(length, width, numX, numY):
+    plateMesh = rectangleMesh((length, width), (numX, numY), order=2)
+    return plateMesh.nodes, plateMesh.elements
+
+
+def buildPlateDeck(jobName='PlateJob', length=1.0, width=0.4, thickness=0.01, pressure=2E3, numX=40, numY=16,
+                   youngsModulus=200E9, poissonsRatio=0.29, density=7800):
+    plateModel = InpModel('Bending Plate', jobName)
+    platePart = plateModel.addPart(InpPart('Plate'), 'Plate Instance')
+    coordinates, connectivity = quadraticQuadMesh(length, width, numX, numY)
+    platePart.setNodes(coordinates)
+    elementLabels = platePart.addElements('S8R5', connectivity)
+    platePart.addElementSet('PlateAll', elementLabels)
+    platePart.addShellSection('PlateAll', 'Steel', thickness)
+
+    nodeLabels = np.arange(1, len(coordinates)+1)
+    tolerance = 1E-9*length
+    plateModel.addNodeSet('Encastre Edge', 'Plate', nodeLabels[np.abs(coordinates[:,0]) <= tolerance])
+    plateModel.addNodeSet('Rolling Edge', 'Plate', nodeLabels[np.abs(coordinates[:,0]-length) <= tolerance])
+    #side1Faces of a shell is its positive face
+    plateModel.addSurface('Pressure Surface', 'Plate', {'SPOS': elementLabels})
+
+    plateModel.addMaterial('Steel', (('Density', ((density,),)), ('Elastic', ((youngsModulus, poissonsRatio),))))
+    plateModel.addBoundary('Encastre Edge', 'ENCASTRE')
+    plateModel.addBoundary('Rolling Edge', 3, 3)
+
+    loadStep = plateModel.addStep(InpStep('Load Step', ('*Static', ['1., 1., 1e-05, 1.']), description='Apply pressure in this step', nlgeom=True))
+    loadStep.addSurfacePressure('Pressure Surface', pressure)
+    loadStep.addFieldOutput(nodeVariables=('RF', 'U', 'UT'), elementVariables=('S',))
+    loadStep.addHistoryOutput('PRESELECT')
+    return plateModel
+
+
+if __name__ == '__main__':
+    plateDeckPath = buildPlateDeck().writeInput()
+    print('Wrote %s' % plateDeckPath)
+    if 'run' in sys.argv[1:]:
+        import JobFarm
+        plateFarmJob = JobFarm.runJobFarm(['PlateJob'])[0]
+        print('PlateJob %s in %.1f s' % (plateFarmJob.status, plateFarmJob.wallTime))
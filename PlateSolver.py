@@ -0,0 +1,238 @@
+#Native linear solver for the bending plate of BendingPlate.py, an Abaqus-free screening path
+#The plate is meshed like PlateDeck.py (8-node quadrilaterals, S8R5-equivalent) and modelled with
+#Mindlin-Reissner plate elements: w, UR1 and UR2 at every node, bending integrated with 3x3 Gauss points
+#and transverse shear with 2x2 points, which keeps the thin 0.01 plate free of shear locking.
+#The stiffness of all elements is computed in one batched product over the Gauss points (in blocks of
+#elements, so that meshes of a million DOF fit in memory) and assembled COO->CSR. The system is solved
+#with a CHOLMOD Cholesky factorization when scikit-sparse is installed, with SciPy SuperLU otherwise
+#(SuperLU keeps both triangles: about 4 GB at 4x10^5 DOF, CHOLMOD is needed for 10^6 DOF and beyond).
+#Results follow the output database names: U and UR per node (U1, U2 and UR3 are zero for a plate),
+#RF and RM at the constrained nodes. The deflection is small against the thickness, so the linear
+#solution is compared directly with the geometrically nonlinear PlateJob.
+#Run 'python PlateSolver.py' to solve the plate and time a 10^6 DOF plate,
+#'python PlateSolver.py PlateJob.odb' to compare with the Abaqus results as well
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sparselinalg
+
+try:
+    from sksparse.cholmod import cholesky
+except ImportError:
+    cholesky = None
+
+from PlateDeck import quadraticQuadMesh
+
+#Elements per block of the batched stiffness computation
+_blockSize = 8192
+
+#Natural coordinates of the 8 nodes, in the node order of quadraticQuadMesh()
+_nodeXi = np.array([-1, 1, 1, -1, 0, 1, 0, -1], dtype=np.float64)
+_nodeEta = np.array([-1, -1, 1, 1, -1, 0, 1, 0], dtype=np.float64)
+
+
+def gaussPoints(order):
+    points, weights = np.polynomial.legendre.leggauss(order)
+    xi, eta = np.meshgrid(points, points, indexing='ij')
+    return xi.ravel(), eta.ravel(), np.outer(weights, weights).ravel()
+
+
+#Serendipity shape functions N (points, 8) and their derivatives (points, 2, 8) at natural coordinates
+def shapeFunctions(xi, eta):
+    xi = np.asarray(xi, dtype=np.float64)[:,None]
+    eta = np.asarray(eta, dtype=np.float64)[:,None]
+    corner = _nodeXi*_nodeEta != 0
+    a = 1 + _nodeXi*xi
+    b = 1 + _nodeEta*eta
+    shape = np.where(corner, 0.25*a*b*(_nodeXi*xi + _nodeEta*eta - 1), 0.5*np.where(_nodeXi == 0, (1 - xi*xi)*b, a*(1 - eta*eta)))
+    dXi = np.where(corner, 0.25*_nodeXi*b*(2*_nodeXi*xi + _nodeEta*eta), np.where(_nodeXi == 0, -xi*b, 0.5*_nodeXi*(1 - eta*eta)))
+    dEta = np.where(corner, 0.25*_nodeEta*a*(_nodeXi*xi + 2*_nodeEta*eta), np.where(_nodeXi == 0, 0.5*_nodeEta*(1 - xi*xi), -eta*a))
+    return shape, np.stack((dXi, dEta), axis=1)
+
+
+#Physical derivatives (elements, points, 2, 8) and |J|*weight (elements, points) of a block of elements
+def elementGradients(elementCoordinates, order):
+    xi, eta, weights = gaussPoints(order)
+    shape, derivatives = shapeFunctions(xi, eta)
+    jacobian = np.einsum('gak,ekb->egab', derivatives, elementCoordinates)
+    determinant = jacobian[...,0,0]*jacobian[...,1,1] - jacobian[...,0,1]*jacobian[...,1,0]
+    if np.any(determinant <= 0):
+        raise ValueError('Plate mesh has distorted or inverted elements')
+    inverse = np.stack((np.stack((jacobian[...,1,1], -jacobian[...,0,1]), axis=-1),
+                        np.stack((-jacobian[...,1,0], jacobian[...,0,0]), axis=-1)), axis=-2)/determinant[...,None,None]
+    return shape, np.einsum('egab,gbk->egak', inverse, derivatives), determinant*weights
+
+
+#Bending and shear constitutive matrices of a homogeneous section
+def sectionStiffness(thickness, youngsModulus, poissonsRatio, shearFactor=5.0/6.0):
+    bending = youngsModulus*thickness**3/(12*(1 - poissonsRatio**2))*np.array([[1, poissonsRatio, 0], [poissonsRatio, 1, 0], [0, 0, 0.5*(1 - poissonsRatio)]])
+    shear = shearFactor*youngsModulus/(2*(1 + poissonsRatio))*thickness*np.eye(2)
+    return bending, shear
+
+
+#Sum over the Gauss points of B^T D B |J| w, strain (elements, points, components, 24): the points and
+#components are stacked so that every element is one matrix product
+def integrateStiffness(strain, material, weights):
+    numElements, numPoints, numComponents, numDofs = strain.shape
+    stress = np.matmul(material, strain)*weights[:,:,None,None]
+    return np.matmul(strain.reshape(numElements, -1, numDofs).transpose(0, 2, 1), stress.reshape(numElements, -1, numDofs))
+
+
+#Stiffness matrices (elements, 24, 24) of a block of elements, DOFs (w, UR1, UR2) per node
+#Rotations follow the Abaqus axes: the section rotation about y is UR2 and about x is -UR1
+def elementStiffness(elementCoordinates, bending, shear):
+    numElements = len(elementCoordinates)
+    shape, gradients, weights = elementGradients(elementCoordinates, 3)
+    curvature = np.zeros((numElements, weights.shape[1], 3, 24))
+    curvature[:,:,0,2::3] = gradients[:,:,0]
+    curvature[:,:,1,1::3] = -gradients[:,:,1]
+    curvature[:,:,2,2::3] = gradients[:,:,1]
+    curvature[:,:,2,1::3] = -gradients[:,:,0]
+    stiffness = integrateStiffness(curvature, bending, weights)
+    shape, gradients, weights = elementGradients(elementCoordinates, 2)
+    shearStrain = np.zeros((numElements, weights.shape[1], 2, 24))
+    shearStrain[:,:,0,0::3] = gradients[:,:,0]
+    shearStrain[:,:,0,2::3] = shape
+    shearStrain[:,:,1,0::3] = gradients[:,:,1]
+    shearStrain[:,:,1,1::3] = -shape
+    stiffness += integrateStiffness(shearStrain, shear, weights)
+    return stiffness
+
+
+def elementDofs(elements):
+    return (3*elements[:,:,None] + np.arange(3)).reshape(len(elements), 24)
+
+
+#Global stiffness as CSR, nodes (n, 2) and zero-based elements (e, 8)
+def assembleStiffness(nodes, elements, bending, shear):
+    numDofs = 3*len(nodes)
+    indexType = np.int32 if numDofs < 2**31 else np.int64
+    stiffness = None
+    for start in range(0, len(elements), _blockSize):
+        block = elements[start:start+_blockSize]
+        blockStiffness = elementStiffness(nodes[block], bending, shear)
+        dofs = elementDofs(block).astype(indexType)
+        rows = np.repeat(dofs, 24, axis=1).ravel()
+        columns = np.tile(dofs, (1, 24)).ravel()
+        blockMatrix = sparse.coo_matrix((blockStiffness.ravel(), (rows, columns)), shape=(numDofs, numDofs)).tocsr()
+        stiffness = blockMatrix if stiffness is None else stiffness + blockMatrix
+    return stiffness
+
+
+#Global mass as CSR: rho*t for w and the rotary inertia rho*t^3/12 for UR1 and UR2, consistent or lumped
+#by scaling the diagonal to the element mass, which keeps the corner masses of the 8-node element positive
+def assembleMass(nodes, elements, thickness, density, lumped=False):
+    numDofs = 3*len(nodes)
+    indexType = np.int32 if numDofs < 2**31 else np.int64
+    inertia = np.diag(density*np.array([thickness, thickness**3/12.0, thickness**3/12.0]))
+    mass = None
+    for start in range(0, len(elements), _blockSize):
+        block = elements[start:start+_blockSize]
+        shape, gradients, weights = elementGradients(nodes[block], 3)
+        scalar = np.einsum('gk,gl,eg->ekl', shape, shape, weights)
+        if lumped:
+            diagonal = np.einsum('ekk->ek', scalar)
+            scalar = (diagonal*(weights.sum(axis=1)/diagonal.sum(axis=1))[:,None])[:,:,None]*np.eye(8)
+        blockMass = (scalar[:,:,None,:,None]*inertia[None,None,:,None,:]).reshape(len(block), 24, 24)
+        dofs = elementDofs(block).astype(indexType)
+        rows = np.repeat(dofs, 24, axis=1).ravel()
+        columns = np.tile(dofs, (1, 24)).ravel()
+        blockMatrix = sparse.coo_matrix((blockMass.ravel(), (rows, columns)), shape=(numDofs, numDofs)).tocsr()
+        mass = blockMatrix if mass is None else mass + blockMatrix
+    return mass
+
+
+#Consistent nodal forces of a uniform pressure on the positive face, pressure pushes along -z
+def pressureLoad(nodes, elements, pressure):
+    load = np.zeros(3*len(nodes))
+    for start in range(0, len(elements), _blockSize):
+        block = elements[start:start+_blockSize]
+        shape, gradients, weights = elementGradients(nodes[block], 3)
+        np.add.at(load, 3*block.ravel(), -pressure*np.einsum('gk,eg->ek', shape, weights).ravel())
+    return load
+
+
+#Solution of a symmetric positive definite system
+def solveSymmetric(matrix, rightHandSide):
+    if cholesky is not None:
+        return cholesky(matrix)(rightHandSide)
+    #A symmetric ordering without pivoting keeps the fill of SuperLU low
+    factor = sparselinalg.splu(matrix, permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0.0, options={'SymmetricMode': True})
+    return factor.solve(rightHandSide)
+
+
+def solvePlate(nodes, elements, thickness, elasticTable, pressure, encastre=(), rolling=()):
+    youngsModulus, poissonsRatio = elasticTable[0][:2]
+    bending, shear = sectionStiffness(thickness, youngsModulus, poissonsRatio)
+    stiffness = assembleStiffness(nodes, elements, bending, shear)
+    load = pressureLoad(nodes, elements, pressure)
+    encastre = np.asarray(encastre, dtype=np.int64)
+    fixed = np.unique(np.concatenate((3*encastre, 3*encastre+1, 3*encastre+2, 3*np.asarray(rolling, dtype=np.int64))))
+    free = np.setdiff1d(np.arange(stiffness.shape[0]), fixed)
+    displacement = np.zeros(stiffness.shape[0])
+    displacement[free] = solveSymmetric(stiffness[free][:,free].tocsc(), load[free])
+    reaction = stiffness.dot(displacement) - load
+    reaction[free] = 0.0
+    displacement = displacement.reshape(-1, 3)
+    reaction = reaction.reshape(-1, 3)
+    zero = np.zeros(len(nodes))
+    return {'U': np.column_stack((zero, zero, displacement[:,0])), 'UR': np.column_stack((displacement[:,1:], zero)),
+            'RF': np.column_stack((zero, zero, reaction[:,0])), 'RM': np.column_stack((reaction[:,1:], zero)),
+            'nodes': nodes, 'elements': elements, 'numDofs': stiffness.shape[0]}
+
+
+#The plate of BendingPlate.py: encastre at x = 0, rolling (u3 fixed) at x = length, pressure on side1
+def solveBendingPlate(length=1.0, width=0.4, thickness=0.01, pressure=2E3, numX=40, numY=16, youngsModulus=200E9, poissonsRatio=0.29):
+    coordinates, connectivity = quadraticQuadMesh(length, width, numX, numY)
+    nodes = coordinates[:,:2]
+    tolerance = 1E-9*length
+    encastre = np.nonzero(np.abs(nodes[:,0]) <= tolerance)[0]
+    rolling = np.nonzero(np.abs(nodes[:,0] - length) <= tolerance)[0]
+    return solvePlate(nodes, connectivity - 1, thickness, ((youngsModulus, poissonsRatio),), pressure, encastre, rolling)
+
+
+#Compare native results with the Abaqus output database of the plate, nodes are matched by position
+def compareWithOdb(results, odbPath, stepName='Load Step', tolerance=1E-6):
+    from scipy.spatial import cKDTree
+    from odbAccess import openOdb
+    odb = openOdb(path=odbPath, readOnly=True)
+    frame = odb.steps[stepName].frames[-1]
+    coordinates = {}
+    for instance in odb.rootAssembly.instances.values():
+        for node in instance.nodes:
+            coordinates[(instance.name, node.label)] = node.coordinates[:2]
+    tree = cKDTree(results['nodes'])
+    displacementError = 0.0
+    matched = 0
+    for value in frame.fieldOutputs['U'].values:
+        distance, index = tree.query(coordinates[(value.instance.name, value.nodeLabel)])
+        if distance <= tolerance:
+            displacementError = max(displacementError, abs(value.data[2] - results['U'][index, 2]))
+            matched += 1
+    odb.close()
+    maxDeflection = np.abs(results['U'][:,2]).max()
+    return {'matchedNodes': matched, 'maxDisplacementError': displacementError,
+            'relativeDisplacementError': displacementError/maxDeflection if maxDeflection else 0.0}
+
+
+if __name__ == '__main__':
+    start = time.time()
+    plateResults = solveBendingPlate()
+    print('Bending plate, %d DOF solved in %.3f s' % (plateResults['numDofs'], time.time()-start))
+    print('Max deflection U3 = %.6e' % plateResults['U'][:,2].min())
+    #Propped cantilever beam of the same section under the same line load: w max = q L^4/(185 E I)
+    print('Beam estimate     = %.6e' % (-2E3*0.4/(185*200E9*0.4*0.01**3/12)))
+    if len(sys.argv) > 1:
+        print(compareWithOdb(plateResults, sys.argv[1]))
+
+    coordinates, connectivity = quadraticQuadMesh(1.0, 0.4, 530, 212)
+    bending, shear = sectionStiffness(0.01, 200E9, 0.29)
+    start = time.time()
+    largeStiffness = assembleStiffness(coordinates[:,:2], connectivity - 1, bending, shear)
+    print('Stiffness of %d DOF assembled in %.3f s' % (largeStiffness.shape[0], time.time()-start))
+    #Without CHOLMOD the largest plate solved is the one SuperLU factorizes in about 4 GB
+    start = time.time()
+    largeResults = solveBendingPlate(numX=530, numY=212) if cholesky is not None else solveBendingPlate(numX=320, numY=128)
+    print('Bending plate, %d DOF solved in %.3f s' % (largeResults['numDofs'], time.time()-start))
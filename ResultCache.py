@@ -0,0 +1,183 @@
+#Content-addressed cache of extracted job results
+#The key of a job is the SHA-256 of its input deck, written with mdb.jobs[...].writeInput(). The deck holds the
+#whole model definition (geometry and mesh, material tables, sections, loads, boundary conditions, element
+#codes, steps and output requests), so identical models give identical keys whatever the job and model names.
+#Lines naming the job, the model or the CAE release are left out of the key.
+#An entry stores the results returned by the extract function (results.json) and, optionally, the field
+#outputs in the OdbExtractor.py format and other files of the job (see MatrixExport.py). Entries are evicted least recently used first when the cache
+#grows beyond maxBytes. Hit, miss and eviction counts are kept in the cache index.
+#
+#    cache = ResultCache('resultCache', maxBytes=20*2**30)
+#    results, hit = submitCached('CantileverJob', CantileverBeam.extractCantileverResults, cache)
+#    print(cache.statistics())
+import os
+import json
+import time
+import shutil
+import hashlib
+
+#Changing the layout of an entry or the key definition invalidates every stored entry
+cacheVersion = '1'
+_ignoredPrefixes = ('** Job name:', '** Generated by:', '** stub-model:')
+
+
+def deckKey(inputPath, extra=''):
+    digest = hashlib.sha256()
+    digest.update(('%s\n%s\n' % (cacheVersion, extra)).encode('utf-8'))
+    deckFile = open(inputPath, 'rb')
+    for line in deckFile:
+        if not line.decode('latin-1').startswith(_ignoredPrefixes):
+            digest.update(line.rstrip(b'\r\n'))
+            digest.update(b'\n')
+    deckFile.close()
+    return digest.hexdigest()
+
+
+def directorySize(path):
+    size = 0
+    for root, directories, files in os.walk(path):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+    return size
+
+
+def _writeJson(path, data):
+    temporaryPath = path + '.tmp'
+    dataFile = open(temporaryPath, 'w')
+    json.dump(data, dataFile, indent=1, sort_keys=True)
+    dataFile.close()
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(temporaryPath, path)
+
+
+def _readJson(path, default):
+    if not os.path.exists(path):
+        return default
+    dataFile = open(path)
+    data = json.load(dataFile)
+    dataFile.close()
+    return data
+
+
+class ResultCache(object):
+
+    def __init__(self, directory='resultCache', maxBytes=10*2**30):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._indexPath = os.path.join(directory, 'index.json')
+        self._index = _readJson(self._indexPath, {'entries': {}, 'hits': 0, 'misses': 0, 'evictions': 0, 'rejections': 0})
+
+    def _save(self):
+        _writeJson(self._indexPath, self._index)
+
+    def entryDirectory(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def key(self, inputPath, extra=''):
+        return deckKey(inputPath, extra)
+
+    def __contains__(self, key):
+        return key in self._index['entries']
+
+    #Stored results of key, or None. A hit makes the entry the most recently used
+    def get(self, key):
+        entry = self._index['entries'].get(key)
+        if entry is None or not os.path.isdir(self.entryDirectory(key)):
+            self._index['entries'].pop(key, None)
+            self._index['misses'] += 1
+            self._save()
+            return None
+        entry['lastUsed'] = time.time()
+        entry['hits'] += 1
+        self._index['hits'] += 1
+        self._save()
+        results = _readJson(os.path.join(self.entryDirectory(key), 'results.json'), {})
+        if entry['hasFields']:
+            results['fieldStore'] = os.path.join(self.entryDirectory(key), 'fields')
+        if entry.get('hasFiles'):
+            results['fileStore'] = os.path.join(self.entryDirectory(key), 'files')
+        return results
+
+    #results must be JSON serializable. With odbPath and fieldVariables the field outputs are stored as well,
+    #files lists paths moved into the entry (its 'files' directory, returned as results['fileStore'] by get()).
+    #An entry larger than maxBytes is not stored and its files are left where they are. Returns whether it was stored
+    def put(self, key, results, odbPath=None, fieldVariables=None, files=()):
+        entryDirectory = self.entryDirectory(key)
+        if os.path.isdir(entryDirectory):
+            shutil.rmtree(entryDirectory)
+        os.makedirs(entryDirectory)
+        _writeJson(os.path.join(entryDirectory, 'results.json'), results)
+        hasFields = False
+        if odbPath is not None and fieldVariables:
+            import OdbExtractor
+            OdbExtractor.extractOdb(odbPath, os.path.join(entryDirectory, 'fields'), variables=fieldVariables)
+            hasFields = True
+        size = directorySize(entryDirectory) + sum([os.path.getsize(path) for path in files])
+        if size > self.maxBytes:
+            shutil.rmtree(entryDirectory, ignore_errors=True)
+            self._index['rejections'] = self._index.get('rejections', 0) + 1
+            self._save()
+            return False
+        if files:
+            os.makedirs(os.path.join(entryDirectory, 'files'))
+            for path in files:
+                shutil.move(path, os.path.join(entryDirectory, 'files', os.path.basename(path)))
+        now = time.time()
+        self._index['entries'][key] = {'size': directorySize(entryDirectory), 'created': now, 'lastUsed': now, 'hits': 0, 'hasFields': hasFields,
+                                       'hasFiles': bool(files)}
+        self.evict(keepKey=key)
+        self._save()
+        return True
+
+    #Drop least recently used entries until the cache fits in maxBytes, never keepKey (the entry just stored)
+    def evict(self, keepKey=None):
+        entries = self._index['entries']
+        total = sum([entry['size'] for entry in entries.values()])
+        for key in sorted(entries.keys(), key=lambda key: entries[key]['lastUsed']):
+            if total <= self.maxBytes:
+                break
+            if key == keepKey:
+                continue
+            total -= entries[key]['size']
+            shutil.rmtree(self.entryDirectory(key), ignore_errors=True)
+            del entries[key]
+            self._index['evictions'] += 1
+
+    def clear(self):
+        for key in list(self._index['entries'].keys()):
+            shutil.rmtree(self.entryDirectory(key), ignore_errors=True)
+        self._index = {'entries': {}, 'hits': 0, 'misses': 0, 'evictions': 0, 'rejections': 0}
+        self._save()
+
+    def statistics(self):
+        hits = self._index['hits']
+        misses = self._index['misses']
+        return {'entries': len(self._index['entries']), 'bytes': sum([entry['size'] for entry in self._index['entries'].values()]),
+                'maxBytes': self.maxBytes, 'hits': hits, 'misses': misses, 'evictions': self._index['evictions'], 'rejections': self._index.get('rejections', 0),
+                'hitRate': float(hits)/(hits+misses) if hits+misses else 0.0}
+
+
+#Cached replacement for mdb.jobs[jobName].submit() followed by waitForCompletion() and result extraction
+#extractResults(odbPath) returns the JSON serializable results to store, returns (results, hit)
+def submitCached(jobName, extractResults, cache, fieldVariables=None):
+    from abaqus import mdb
+    from abaqusConstants import OFF, COMPLETED
+    cachedJob = mdb.jobs[jobName]
+    cachedJob.writeInput(consistencyChecking=OFF)
+    key = cache.key(jobName + '.inp')
+    results = cache.get(key)
+    if results is not None:
+        return results, True
+    cachedJob.submit(consistencyChecking=OFF)
+    cachedJob.waitForCompletion()
+    if cachedJob.status != COMPLETED:
+        raise RuntimeError('Job %s did not complete (%s), nothing is cached' % (jobName, cachedJob.status))
+    results = extractResults(jobName + '.odb')
+    stored = cache.put(key, results, jobName + '.odb', fieldVariables)
+    if stored and fieldVariables:
+        results = dict(results)
+        results['fieldStore'] = os.path.join(cache.entryDirectory(key), 'fields')
+    return results, False
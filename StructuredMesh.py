@@ -0,0 +1,169 @@
+#Structured meshes of boxes and rectangles built with NumPy index arithmetic, without CAE's seedPart()/generateMesh()
+#CantileverBeam.py meshes a box with C3D8R and BendingPlate.py a rectangle with S8R5, both structured, so the
+#nodes and the connectivity follow from the seed counts alone. Nodes are a float64 (N,3) array, elements an int32
+#array of node labels (labels start at 1, as in InpDeck.py). Order 1 gives 8-node hexahedra and 4-node
+#quadrilaterals, order 2 the 20-node and 8-node serendipity elements.
+#Nodes are numbered on a grid with x varying slowest, elements the same way, so that element e of the grid
+#(ex, ey, ez) has label 1 + (ex*numY + ey)*numZ + ez
+#Every face of a box (edge of a rectangle) gets a node set and an element face set named XMIN, XMAX, YMIN, ...
+#Benchmark: python StructuredMesh.py [millions of elements]
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+#Node offsets of each element on the node grid, in Abaqus node order.
+#Hexahedra: bottom face (z low) counterclockwise seen from the top, then the top face, then for order 2 the
+#midside nodes of the bottom edges, the top edges and the vertical edges
+_hexOffsets = {
+    1: ((0,0,0), (1,0,0), (1,1,0), (0,1,0), (0,0,1), (1,0,1), (1,1,1), (0,1,1)),
+    2: ((0,0,0), (2,0,0), (2,2,0), (0,2,0), (0,0,2), (2,0,2), (2,2,2), (0,2,2),
+        (1,0,0), (2,1,0), (1,2,0), (0,1,0), (1,0,2), (2,1,2), (1,2,2), (0,1,2),
+        (0,0,1), (2,0,1), (2,2,1), (0,2,1)),
+}
+#Quadrilaterals: corners counterclockwise, then the midside nodes of edges 1-2, 2-3, 3-4 and 4-1
+_quadOffsets = {
+    1: ((0,0), (1,0), (1,1), (0,1)),
+    2: ((0,0), (2,0), (2,2), (0,2), (1,0), (2,1), (1,2), (0,1)),
+}
+#Abaqus face identifiers of the box faces and rectangle edges for the node orders above
+_hexFaces = {'XMIN': 'S6', 'XMAX': 'S4', 'YMIN': 'S3', 'YMAX': 'S5', 'ZMIN': 'S1', 'ZMAX': 'S2'}
+_quadFaces = {'XMIN': 'E4', 'XMAX': 'E2', 'YMIN': 'E1', 'YMAX': 'E3'}
+_elementTypes = {(3, 1): 'C3D8R', (3, 2): 'C3D20R', (2, 1): 'S4R', (2, 2): 'S8R5'}
+
+
+class StructuredMesh(object):
+
+    def __init__(self, nodes, elements, elementType, nodeSets, faceSets):
+        self.nodes = nodes
+        self.elements = elements
+        self.elementType = elementType
+        self.nodeSets = nodeSets
+        self.faceSets = faceSets
+
+    #The element face set of a box face as the faces mapping of InpModel.addSurface()
+    def surface(self, name):
+        faceId, labels = self.faceSets[name]
+        return {faceId: labels}
+
+    def elementSet(self, name):
+        return self.faceSets[name][1]
+
+    def nbytes(self):
+        return self.nodes.nbytes + self.elements.nbytes
+
+
+#Number of elements along each side for an approximate global seed size, the way seedPart() rounds it
+def seedDivisions(sizes, seedSize):
+    return tuple([max(1, int(np.ceil(size/float(seedSize) - 1E-6))) for size in sizes])
+
+
+def _structuredMesh(sizes, divisions, order, origin):
+    dimension = len(divisions)
+    if order not in (1, 2):
+        raise ValueError('order must be 1 or 2, not %r' % (order,))
+    divisions = tuple([int(count) for count in divisions])
+    shape = tuple([order*count + 1 for count in divisions])
+    #Grid points kept as nodes: all of them for order 1, those with at most one odd index for order 2
+    if order == 1:
+        keep = np.ones(shape, dtype=bool)
+    else:
+        odd = np.zeros(shape, dtype=np.int8)
+        for axis in range(dimension):
+            odd += (np.arange(shape[axis]) % 2).astype(np.int8).reshape([-1 if other == axis else 1 for other in range(dimension)])
+        keep = odd <= 1
+        del odd
+    keep = keep.ravel()
+    numNodes = int(keep.sum())
+    labels = np.zeros(keep.size, dtype=np.int32)
+    labels[keep] = np.arange(1, numNodes+1, dtype=np.int32)
+
+    strides = [int(np.prod(shape[axis+1:])) for axis in range(dimension)]
+    gridIndices = np.flatnonzero(keep) if order == 2 else None
+    nodes = np.zeros((numNodes, 3))
+    for axis in range(dimension):
+        divisor = float(shape[axis] - 1)
+        if gridIndices is None:
+            index = np.arange(shape[axis]).reshape([-1 if other == axis else 1 for other in range(dimension)])
+            nodes[:,axis] = np.broadcast_to(index, shape).ravel()*sizes[axis]/divisor + origin[axis]
+        else:
+            nodes[:,axis] = (gridIndices//strides[axis]) % shape[axis]*sizes[axis]/divisor + origin[axis]
+    del gridIndices
+
+    #Grid index of the first node of every element, then one gather per local node
+    base = np.zeros(divisions, dtype=np.int64)
+    for axis in range(dimension):
+        base += (order*strides[axis]*np.arange(divisions[axis])).reshape([-1 if other == axis else 1 for other in range(dimension)])
+    base = base.ravel()
+    offsets = (_hexOffsets if dimension == 3 else _quadOffsets)[order]
+    elements = np.empty((base.size, len(offsets)), dtype=np.int32)
+    for column, offset in enumerate(offsets):
+        elements[:,column] = labels[base + int(np.dot(offset, strides))]
+    del base
+
+    #Faces of the box (edges of the rectangle): the node grid and the element grid sliced at either end of an axis
+    labels = labels.reshape(shape)
+    elementLabels = np.arange(1, elements.shape[0]+1, dtype=np.int32).reshape(divisions)
+    faceIds = _hexFaces if dimension == 3 else _quadFaces
+    nodeSets = {}
+    faceSets = {}
+    for axis in range(dimension):
+        for end, suffix in ((0, 'MIN'), (-1, 'MAX')):
+            name = 'XYZ'[axis] + suffix
+            faceNodes = np.take(labels, end, axis=axis).ravel()
+            nodeSets[name] = np.sort(faceNodes[faceNodes > 0])
+            faceSets[name] = (faceIds[name], np.take(elementLabels, end, axis=axis).ravel().copy())
+    return StructuredMesh(nodes, elements, _elementTypes[(dimension, order)], nodeSets, faceSets)
+
+
+#sizes = (length along x, along y, along z), divisions = elements along each
+def boxMesh(sizes, divisions, order=1, origin=(0.0, 0.0, 0.0)):
+    return _structuredMesh(tuple(sizes), tuple(divisions), order, tuple(origin))
+
+
+#Rectangle in the xy plane at z=0, sizes = (length along x, along y)
+def rectangleMesh(sizes, divisions, order=1, origin=(0.0, 0.0)):
+    return _structuredMesh(tuple(sizes), tuple(divisions), order, tuple(origin))
+
+
+#Mesh of buildCantileverModel(): x across the width, y across the height, extruded along z.
+#The pressure acts on YMAX and ZMIN is fixed
+def cantileverMesh(width=25, height=20, length=200, seedSize=10, order=1):
+    return boxMesh((width, height, length), seedDivisions((width, height, length), seedSize), order)
+
+
+def benchmarkMesher(millions=1.0, repeats=3):
+    rows = []
+    for kind, order in (('box', 1), ('box', 2), ('rectangle', 1), ('rectangle', 2)):
+        if kind == 'box':
+            side = int(round((millions*1E6/10.0)**(1.0/3)))
+            divisions = (side, side, 10*side)
+        else:
+            side = int(round((millions*1E6/4.0)**0.5))
+            divisions = (2*side, 2*side)
+        times = []
+        for repeat in range(repeats):
+            start = time.time()
+            mesh = _structuredMesh((1.0,)*len(divisions), divisions, order, (0.0,)*len(divisions))
+            times.append(time.time() - start)
+            del mesh
+        #Peak memory in a separate run, tracing slows the mesher down
+        numElements = int(np.prod(divisions))
+        tracemalloc.start()
+        mesh = _structuredMesh((1.0,)*len(divisions), divisions, order, (0.0,)*len(divisions))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append({'elementType': mesh.elementType, 'elements': numElements, 'nodes': len(mesh.nodes),
+                     'seconds': min(times), 'secondsPerMillion': min(times)*1E6/numElements,
+                     'megabytesPerMillion': mesh.nbytes()/float(numElements), 'peakMegabytesPerMillion': peak/float(numElements)})
+        del mesh
+    return rows
+
+
+if __name__ == '__main__':
+    millions = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    print('%-8s %10s %10s %8s %10s %12s %12s' % ('type', 'elements', 'nodes', 's', 's/1M', 'MB/1M', 'peak MB/1M'))
+    for row in benchmarkMesher(millions):
+        print('%-8s %10d %10d %8.3f %10.3f %12.1f %12.1f' % (row['elementType'], row['elements'], row['nodes'], row['seconds'],
+                                                           row['secondsPerMillion'], row['megabytesPerMillion'], row['peakMegabytesPerMillion']))
@@ -0,0 +1,102 @@
+#Load-path continuation of the electrical switch contact analysis
+#Instead of solving the whole contact history again for every displacement level, the 'Displacement BC'
+#u2 is pushed further in a chain of static steps, each starting from the converged state of the previous one:
+#  - runSwitchContinuation() solves the -3 'Load Step' and one 'Continuation Step n' per extra level in a
+#    single job, with restart data written at the end of every step
+#  - extendSwitchByRestart() continues a finished job from its last step with a restart job
+#    (type=RESTART), so levels can be added later without repeating anything already solved
+#The force-displacement curve is the summed RF2 against the mean U2 of the 'Displacement Set' nodes
+#in every frame of every step, written to SwitchContinuation.csv
+#Run inside CAE: abaqus cae noGUI=SwitchContinuation.py
+#Run without Abaqus: PYTHONPATH=abaqusStub python SwitchContinuation.py
+from abaqus import*
+from abaqusConstants import*
+
+import ElectricalSwitch
+
+#Prescribed u2 of the switch after each continuation step, the first step of the model goes to -3
+switchDisplacementLevels = tuple([-3.0 - 0.25*level for level in range(1, 20)])
+
+
+def requestRestart(switchModel, stepName):
+    switchModel.steps[stepName].Restart(frequency=0, numberIntervals=1, overlay=ON, timeMarks=OFF)
+
+
+#Append one static step per displacement level after previousStep, the BC keeps its value between levels
+def addContinuationSteps(modelName, displacementLevels, previousStep='Load Step', firstIndex=1, bcName='Displacement BC'):
+    switchModel = mdb.models[modelName]
+    stepNames = []
+    for offset, displacement in enumerate(displacementLevels):
+        stepName = 'Continuation Step %d' % (firstIndex + offset)
+        switchModel.StaticStep(name=stepName, previous=previousStep, description='Push u2 to %g' % displacement, nlgeom=ON)
+        switchModel.boundaryConditions[bcName].setValuesInStep(stepName=stepName, u2=displacement)
+        requestRestart(switchModel, stepName)
+        stepNames.append(stepName)
+        previousStep = stepName
+    return stepNames
+
+
+def runSwitchContinuation(displacementLevels=switchDisplacementLevels, jobName='SwitchContinuationJob', modelName='Switch Continuation', numCpus=1):
+    ElectricalSwitch.buildSwitchModel(modelName=modelName)
+    requestRestart(mdb.models[modelName], 'Load Step')
+    stepNames = ['Load Step'] + addContinuationSteps(modelName, displacementLevels)
+    ElectricalSwitch.createSwitchJob(jobName=jobName, modelName=modelName, numCpus=numCpus)
+    mdb.jobs[jobName].submit(consistencyChecking=OFF)
+    mdb.jobs[jobName].waitForCompletion()
+    return stepNames
+
+
+#Number of the next 'Continuation Step n' of a model, 1 when it has none
+def nextContinuationIndex(modelName):
+    indices = [0]
+    for stepName in mdb.models[modelName].steps.keys():
+        if stepName.startswith('Continuation Step '):
+            indices.append(int(stepName.split()[-1]))
+    return max(indices) + 1
+
+
+#Continue job baseJobName, whose model is baseModelName and whose last step is lastStepName, to more levels.
+#baseJobName must have written restart data at lastStepName (requestRestart(), as runSwitchContinuation() does):
+#SwitchContactJob of ElectricalSwitch.py requests none and cannot be continued.
+#The new steps are numbered on from the continuation steps the base model already holds, unless firstIndex is given
+def extendSwitchByRestart(baseJobName, baseModelName, lastStepName, displacementLevels, jobName, firstIndex=None, numCpus=1):
+    if firstIndex is None:
+        firstIndex = nextContinuationIndex(baseModelName)
+    mdb.Model(name=jobName, objectToCopy=mdb.models[baseModelName])
+    mdb.models[jobName].setValues(restartJob=baseJobName, restartStep=lastStepName)
+    stepNames = addContinuationSteps(jobName, displacementLevels, previousStep=lastStepName, firstIndex=firstIndex)
+    ElectricalSwitch.createSwitchJob(jobName=jobName, modelName=jobName, numCpus=numCpus)
+    mdb.jobs[jobName].setValues(type=RESTART)
+    mdb.jobs[jobName].submit(consistencyChecking=OFF)
+    mdb.jobs[jobName].waitForCompletion()
+    return stepNames
+
+
+#Force-displacement points of every frame: step, step time, mean U2 and summed RF2 of the displaced edge
+def extractForceDisplacement(odbPath, setName='DISPLACEMENT SET', stepNames=None):
+    from odbAccess import openOdb
+    switch_odb_object = openOdb(path=odbPath, readOnly=True)
+    displacement_set = switch_odb_object.rootAssembly.nodeSets[setName]
+    curve = []
+    for stepName in (stepNames or switch_odb_object.steps.keys()):
+        for frame in switch_odb_object.steps[stepName].frames:
+            u2 = [value.data[1] for value in frame.fieldOutputs['U'].getSubset(region=displacement_set).values]
+            rf2 = [value.data[1] for value in frame.fieldOutputs['RF'].getSubset(region=displacement_set).values]
+            curve.append((stepName, frame.frameId, frame.frameValue, sum(u2)/len(u2) if u2 else 0.0, sum(rf2)))
+    switch_odb_object.close()
+    return curve
+
+
+def writeForceDisplacement(curve, path='SwitchContinuation.csv'):
+    curveFile = open(path, 'w')
+    curveFile.write('step,frame,stepTime,u2,rf2\n')
+    for stepName, frameId, stepTime, u2, rf2 in curve:
+        curveFile.write('%s,%d,%r,%r,%r\n' % (stepName, frameId, stepTime, u2, rf2))
+    curveFile.close()
+
+
+if __name__ == '__main__':
+    runSwitchContinuation()
+    switchCurve = extractForceDisplacement('SwitchContinuationJob.odb')
+    writeForceDisplacement(switchCurve, 'SwitchContinuation.csv')
+    print('%d force-displacement points from one analysis' % len(switchCurve))
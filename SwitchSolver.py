@@ -0,0 +1,342 @@
+#Native nonlinear solver for the electrical switch of ElectricalSwitch.py, a quick look at the switch profile
+#without an Abaqus job. The switch is a 2-deep extrusion of a plane profile, so the profile is solved as a plane
+#frame: corotational Euler-Bernoulli beams (u1, u2 and ur3 per node) with the section of the 0.15 shell over the
+#full depth, and the plate modulus E/(1-nu^2) of an extruded shell bending about its width.
+#Contact is the frictionless hard contact of the CAE model ('Slave Surface', the flat tip of the upper arm, on
+#'Master Surface', the base up to the x = 10 partition) enforced with a penalty: node-to-segment gaps measured
+#between shell mid-surfaces less the thickness (thickness=ON), and a contact force penaltyScale times the axial
+#stiffness of a segment per unit penetration. The contact search hashes the master segments into square cells
+#(a spatial hash: cell coordinates hashed into a table of buckets about twice the number of entries) and looks up
+#the bucket of every slave node, so it costs time linear in the number of segments; it runs again at every
+#Newton iteration, so slave nodes may slide from one segment to another within an increment.
+#The 'Displacement BC' u2 of the apex is applied in equal increments, each solved by Newton-Raphson on the
+#sparse tangent stiffness, cut back by half when an increment does not converge.
+#The force-displacement curve has the layout of SwitchContinuation.py: u2 and RF2 of the apex per increment.
+#Run 'python SwitchSolver.py' for the curve of the -3 analysis and the contact search timings,
+#'python SwitchSolver.py SwitchContactJob.odb' to compare with the Abaqus curve as well
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sparselinalg
+
+#The switch profile of ElectricalSwitch.py: the upper arm and the base, the base with the x = 10 partition
+upperArm = ((2.0,2.0), (4.0,2.0), (6.0,4.0), (10.0,2.0), (20.0,2.0))
+baseLine = ((0.0,0.0), (10.0,0.0), (20.0,0.0))
+switchElastic = (210E3, 0.3)
+switchThickness = 0.15
+switchDepth = 2.0
+
+#Multipliers of the spatial hash, the large primes of the usual 2D/3D hash
+_hashPrimes = (73856093, 19349663)
+
+
+#Nodes and two-node elements along a polyline, every straight piece divided into elements no longer than seedSize
+def meshPolyline(points, seedSize, firstNode=0):
+    points = np.asarray(points, dtype=np.float64)
+    nodes = [points[:1]]
+    for start, end in zip(points[:-1], points[1:]):
+        count = max(1, int(np.ceil(np.hypot(*(end-start))/seedSize - 1E-9)))
+        fractions = np.arange(1, count+1)[:,None]/float(count)
+        nodes.append(start + fractions*(end-start))
+    nodes = np.concatenate(nodes)
+    numbers = np.arange(firstNode, firstNode+len(nodes))
+    return nodes, np.column_stack((numbers[:-1], numbers[1:]))
+
+
+#Nodes (x, y), elements, and the node and element sets of the switch: encastre nodes at x = 20, the apex where
+#u2 is prescribed, the slave nodes on the flat tip of the upper arm and the master elements of the base
+def switchMesh(seedSize=0.25, tolerance=1E-9):
+    upperNodes, upperElements = meshPolyline(upperArm, seedSize)
+    baseNodes, baseElements = meshPolyline(baseLine, seedSize, firstNode=len(upperNodes))
+    nodes = np.concatenate((upperNodes, baseNodes))
+    elements = np.concatenate((upperElements, baseElements))
+    def nodesAt(x=None, y=None):
+        mask = np.ones(len(nodes), dtype=bool)
+        if x is not None:
+            mask &= np.abs(nodes[:,0] - x) <= tolerance
+        if y is not None:
+            mask &= np.abs(nodes[:,1] - y) <= tolerance
+        return np.nonzero(mask)[0]
+    upper = np.arange(len(upperNodes))
+    slave = upper[(np.abs(upperNodes[:,1] - 2.0) <= tolerance) & (upperNodes[:,0] <= 4.0 + tolerance)]
+    baseMidpoints = 0.5*(nodes[baseElements[:,0]] + nodes[baseElements[:,1]])
+    master = np.arange(len(upperElements), len(elements))[baseMidpoints[:,0] <= 10.0]
+    return {'nodes': nodes, 'elements': elements, 'encastre': nodesAt(x=20.0), 'apex': nodesAt(x=6.0, y=4.0)[0],
+            'slave': slave, 'master': master}
+
+
+#Internal force vector and tangent stiffness of corotational 2D beams for the displacements u (u1, u2, ur3 per node)
+#The element rotates rigidly with the chord between its nodes; in the rotated frame it is the linear beam with
+#axial force N and end moments M1, M2, and the tangent adds the geometric terms of the rotating chord
+def beamForces(nodes, elements, displacement, axialStiffness, bendingStiffness):
+    displacement = displacement.reshape(-1, 3)
+    initial = nodes[elements[:,1]] - nodes[elements[:,0]]
+    current = initial + displacement[elements[:,1],:2] - displacement[elements[:,0],:2]
+    initialLength = np.hypot(initial[:,0], initial[:,1])
+    length = np.hypot(current[:,0], current[:,1])
+    cosine, sine = current[:,0]/length, current[:,1]/length
+    cosine0, sine0 = initial[:,0]/initialLength, initial[:,1]/initialLength
+    #Rotation of the chord, taken from the relative rotation so that it never wraps around pi
+    chordRotation = np.arctan2(cosine0*sine - sine0*cosine, cosine0*cosine + sine0*sine)
+    theta1 = displacement[elements[:,0],2] - chordRotation
+    theta2 = displacement[elements[:,1],2] - chordRotation
+
+    axial = axialStiffness*(length - initialLength)/initialLength
+    moment1 = bendingStiffness/initialLength*(4*theta1 + 2*theta2)
+    moment2 = bendingStiffness/initialLength*(2*theta1 + 4*theta2)
+
+    zero, one = np.zeros(len(elements)), np.ones(len(elements))
+    r = np.stack((-cosine, -sine, zero, cosine, sine, zero), axis=1)
+    z = np.stack((sine, -cosine, zero, -sine, cosine, zero), axis=1)
+    b = np.stack((r, -z/length[:,None] + np.stack((zero, zero, one, zero, zero, zero), axis=1),
+                  -z/length[:,None] + np.stack((zero, zero, zero, zero, zero, one), axis=1)), axis=1)
+    local = np.zeros((len(elements), 3, 3))
+    local[:,0,0] = axialStiffness/initialLength
+    local[:,1,1] = local[:,2,2] = 4*bendingStiffness/initialLength
+    local[:,1,2] = local[:,2,1] = 2*bendingStiffness/initialLength
+    elementForces = np.einsum('eij,ei->ej', b, np.column_stack((axial, moment1, moment2)))
+    elementStiffness = np.matmul(np.matmul(b.transpose(0, 2, 1), local), b)
+    elementStiffness += (axial/length)[:,None,None]*z[:,:,None]*z[:,None,:]
+    elementStiffness += ((moment1 + moment2)/length**2)[:,None,None]*(r[:,:,None]*z[:,None,:] + z[:,:,None]*r[:,None,:])
+
+    dofs = (3*elements[:,:,None] + np.arange(3)).reshape(-1, 6)
+    numDofs = displacement.size
+    forces = np.bincount(dofs.ravel(), weights=elementForces.ravel(), minlength=numDofs)
+    rows = np.repeat(dofs, 6, axis=1).ravel()
+    columns = np.tile(dofs, (1, 6)).ravel()
+    stiffness = sparse.coo_matrix((elementStiffness.ravel(), (rows, columns)), shape=(numDofs, numDofs)).tocsr()
+    return forces, stiffness
+
+
+#Candidate (point, segment) pairs of a spatial hash: every segment goes into the buckets of the cells its box,
+#grown by radius, overlaps, and every point is paired with the segments of its own bucket. Hash collisions only
+#add candidates that the distance test rejects. Time and memory grow linearly with segments and points
+def hashCandidates(points, segmentStarts, segmentEnds, cellSize, radius):
+    lower = np.floor((np.minimum(segmentStarts, segmentEnds) - radius)/cellSize).astype(np.int64)
+    upper = np.floor((np.maximum(segmentStarts, segmentEnds) + radius)/cellSize).astype(np.int64)
+    spans = upper - lower + 1
+    cellCounts = spans[:,0]*spans[:,1]
+    entrySegments = np.repeat(np.arange(len(segmentStarts)), cellCounts)
+    local = np.arange(len(entrySegments)) - np.repeat(np.cumsum(cellCounts) - cellCounts, cellCounts)
+    entryCells = lower[entrySegments] + np.column_stack((local % spans[entrySegments,0], local // spans[entrySegments,0]))
+
+    tableSize = 1 << int(max(len(entrySegments), 1)*2 - 1).bit_length()
+    def bucket(cells):
+        return ((cells[:,0]*_hashPrimes[0]) ^ (cells[:,1]*_hashPrimes[1])) & (tableSize - 1)
+    entryBuckets = bucket(entryCells)
+    bucketCounts = np.bincount(entryBuckets, minlength=tableSize)
+    bucketStarts = np.cumsum(bucketCounts) - bucketCounts
+    #Entries in bucket order, bucket b holds bucketSegments[bucketStarts[b]:bucketStarts[b]+bucketCounts[b]]
+    order = np.argsort(entryBuckets, kind='stable')
+    bucketSegments = entrySegments[order]
+
+    pointBuckets = bucket(np.floor(points/cellSize).astype(np.int64))
+    pointCounts = bucketCounts[pointBuckets]
+    candidatePoints = np.repeat(np.arange(len(points)), pointCounts)
+    rank = np.arange(len(candidatePoints)) - np.repeat(np.cumsum(pointCounts) - pointCounts, pointCounts)
+    candidateSegments = bucketSegments[bucketStarts[pointBuckets][candidatePoints] + rank]
+    return candidatePoints, candidateSegments
+
+
+#Closest segment of every point within radius: point index, segment index, local coordinate (0..1 along the
+#segment) and signed distance along the left normal of the segment, for the points that found one
+def contactSearch(points, segmentStarts, segmentEnds, cellSize, radius):
+    candidatePoints, candidateSegments = hashCandidates(points, segmentStarts, segmentEnds, cellSize, radius)
+    if len(candidatePoints) == 0:
+        empty = np.zeros(0)
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), empty, empty
+    start = segmentStarts[candidateSegments]
+    tangent = segmentEnds[candidateSegments] - start
+    offset = points[candidatePoints] - start
+    xi = np.clip(np.einsum('ij,ij->i', offset, tangent)/np.einsum('ij,ij->i', tangent, tangent), 0.0, 1.0)
+    distance = np.hypot(*(offset - xi[:,None]*tangent).T)
+    #Candidates are grouped by point, the closest of each group is the first at the minimum distance
+    groupStarts = np.flatnonzero(np.r_[True, candidatePoints[1:] != candidatePoints[:-1]])
+    closest = distance == np.repeat(np.minimum.reduceat(distance, groupStarts), np.diff(np.r_[groupStarts, len(distance)]))
+    unused, first = np.unique(candidatePoints[closest], return_index=True)
+    selected = np.flatnonzero(closest)[first]
+    selected = selected[distance[selected] <= radius]
+    tangent = tangent[selected]
+    normal = np.column_stack((-tangent[:,1], tangent[:,0]))/np.hypot(tangent[:,0], tangent[:,1])[:,None]
+    gap = np.einsum('ij,ij->i', offset[selected] - xi[selected,None]*tangent, normal)
+    return candidatePoints[selected], candidateSegments[selected], xi[selected], gap
+
+
+#Penalty forces and tangent of node-to-segment contact in the current configuration, for the slave nodes that
+#penetrate the master segments (gap less than thickness). Returns the forces, the tangent and the contact count.
+#Cells are at least as large as the longest master segment, so a badly diverged iteration cannot fill the hash
+def penaltyContact(nodes, displacement, slave, masterElements, thickness, penalty, cellSize, radius):
+    current = nodes + displacement.reshape(-1, 3)[:,:2]
+    segmentLengths = np.hypot(*(current[masterElements[:,1]] - current[masterElements[:,0]]).T)
+    cellSize = max(cellSize, segmentLengths.max())
+    points, segments, xi, distance = contactSearch(current[slave], current[masterElements[:,0]], current[masterElements[:,1]], cellSize, radius)
+    gap = distance - thickness
+    #xi is clamped to the segment, a slave node right above a master node is in contact with one of its two segments.
+    #Contact starts a small clearance above the surface, otherwise a node that only grazes the surface switches in
+    #and out of contact from one iteration to the next. The force follows gap over the whole active set, so the
+    #tangent stays consistent; inside the clearance it is a pull of at most 1E-6*penalty*thickness
+    active = gap < 1E-6*thickness
+    points, segments, xi, gap = points[active], segments[active], xi[active], gap[active]
+    numDofs = displacement.size
+    if len(gap) == 0:
+        return np.zeros(numDofs), sparse.csr_matrix((numDofs, numDofs)), 0
+    tangent = current[masterElements[segments,1]] - current[masterElements[segments,0]]
+    normal = np.column_stack((-tangent[:,1], tangent[:,0]))/np.hypot(tangent[:,0], tangent[:,1])[:,None]
+    #Gradient of the gap with respect to u1, u2 of the slave node and of the two segment nodes
+    weights = np.column_stack((np.ones(len(xi)), xi - 1.0, -xi))
+    gradient = (weights[:,:,None]*normal[:,None,:]).reshape(-1, 6)
+    contactNodes = np.column_stack((slave[points], masterElements[segments]))
+    dofs = (3*contactNodes[:,:,None] + np.arange(2)).reshape(-1, 6)
+    forces = np.bincount(dofs.ravel(), weights=(penalty*gap[:,None]*gradient).ravel(), minlength=numDofs)
+    values = penalty*gradient[:,:,None]*gradient[:,None,:]
+    stiffness = sparse.coo_matrix((values.ravel(), (np.repeat(dofs, 6, axis=1).ravel(), np.tile(dofs, (1, 6)).ravel())),
+                                  shape=(numDofs, numDofs)).tocsr()
+    return forces, stiffness, len(gap)
+
+
+#Displacement-controlled Newton-Raphson of the switch: u2 of the apex goes to displacement in numIncrements
+#equal increments, halved when an increment does not converge in maxIterations.
+#Returns the curve (increment, step time, u2, RF2, contact nodes, iterations) and the final displacements
+def solveSwitch(displacement=-3.0, numIncrements=30, seedSize=0.25, elasticTable=(switchElastic,), thickness=switchThickness,
+                depth=switchDepth, penaltyScale=10.0, tolerance=1E-6, maxIterations=16, minIncrement=1E-5):
+    youngsModulus, poissonsRatio = elasticTable[0][:2]
+    plateModulus = youngsModulus/(1.0 - poissonsRatio**2)
+    axialStiffness = plateModulus*thickness*depth
+    bendingStiffness = plateModulus*thickness**3/12.0*depth
+    mesh = switchMesh(seedSize)
+    nodes, elements = mesh['nodes'], mesh['elements']
+    masterElements = elements[mesh['master']]
+    penalty = penaltyScale*axialStiffness/seedSize
+    cellSize = 2.0*seedSize
+    radius = seedSize + thickness
+
+    numDofs = 3*len(nodes)
+    prescribed = 3*mesh['apex'] + 1
+    fixed = np.concatenate(((3*mesh['encastre'][:,None] + np.arange(3)).ravel(), [prescribed]))
+    free = np.setdiff1d(np.arange(numDofs), fixed)
+    u = np.zeros(numDofs)
+    curve = [{'increment': 0, 'stepTime': 0.0, 'u2': 0.0, 'rf2': 0.0, 'contactNodes': 0, 'iterations': 0}]
+    statistics = {'iterations': 0, 'cutbacks': 0, 'searches': 0, 'searchTime': 0.0, 'solveTime': 0.0}
+
+    def residual(u):
+        searchStart = time.time()
+        contactForces, contactStiffness, numContacts = penaltyContact(nodes, u, mesh['slave'], masterElements, thickness,
+                                                                     penalty, cellSize, radius)
+        statistics['searchTime'] += time.time() - searchStart
+        statistics['searches'] += 1
+        forces, stiffness = beamForces(nodes, elements, u, axialStiffness, bendingStiffness)
+        return forces + contactForces, stiffness + contactStiffness, numContacts
+
+    def solveFree(stiffness, rightHandSide):
+        solveStart = time.time()
+        solution = sparselinalg.spsolve(stiffness[free][:,free].tocsc(), rightHandSide)
+        statistics['solveTime'] += time.time() - solveStart
+        return solution
+
+    forces, stiffness, numContacts = residual(u)
+    stepTime, increment = 0.0, 1.0/numIncrements
+    while stepTime < 1.0 - 1E-12:
+        increment = min(increment, 1.0 - stepTime)
+        #The predictor moves the free DOFs with the tangent of the last converged state, so the first
+        #iteration does not start from an apex displaced alone
+        trial = u.copy()
+        trial[prescribed] = (stepTime + increment)*displacement
+        step = trial - u
+        trial[free] += solveFree(stiffness, -forces[free] - stiffness.dot(step)[free])
+        trialForces, trialStiffness, numContacts = residual(trial)
+        converged = False
+        for iteration in range(1, maxIterations+1):
+            correction = solveFree(trialStiffness, -trialForces[free])
+            trial[free] += correction
+            statistics['iterations'] += 1
+            if not np.all(np.isfinite(trial)):
+                break
+            trialForces, trialStiffness, numContacts = residual(trial)
+            forceScale = max(np.abs(trialForces[fixed]).max(), tolerance)
+            if np.abs(trialForces[free]).max() <= tolerance*forceScale and np.abs(correction).max() <= tolerance*max(np.abs(trial).max(), 1.0):
+                converged = True
+                break
+        if not converged:
+            statistics['cutbacks'] += 1
+            increment /= 2.0
+            if increment < minIncrement:
+                raise RuntimeError('Switch increment at step time %g cut back below %g' % (stepTime, minIncrement))
+            continue
+        u, forces, stiffness = trial, trialForces, trialStiffness
+        stepTime += increment
+        curve.append({'increment': len(curve), 'stepTime': stepTime, 'u2': float(u[prescribed]), 'rf2': float(forces[prescribed]),
+                      'contactNodes': numContacts, 'iterations': iteration})
+        #A quick increment may grow again, as in Abaqus
+        if iteration <= 4:
+            increment = min(1.5*increment, 1.0/numIncrements)
+    return {'curve': curve, 'U': u.reshape(-1, 3), 'nodes': nodes, 'elements': elements, 'numDofs': numDofs, 'statistics': statistics}
+
+
+#Same layout as SwitchContinuation.writeForceDisplacement()
+def writeForceDisplacement(curve, path='SwitchSolver.csv', stepName='Native'):
+    curveFile = open(path, 'w')
+    curveFile.write('step,frame,stepTime,u2,rf2\n')
+    for point in curve:
+        curveFile.write('%s,%d,%r,%r,%r\n' % (stepName, point['increment'], point['stepTime'], point['u2'], point['rf2']))
+    curveFile.close()
+
+
+#Wall time of contactSearch() on straight master lines of numSegments segments with as many slave points
+#above them, the time per segment stays flat when the search is linear
+def contactSearchScaling(segmentCounts=(10**3, 10**4, 10**5, 10**6), repeats=3, seed=0):
+    generator = np.random.RandomState(seed)
+    rows = []
+    for numSegments in segmentCounts:
+        x = np.arange(numSegments+1, dtype=np.float64)
+        line = np.column_stack((x, 0.05*np.sin(0.1*x)))
+        points = np.column_stack((generator.uniform(0, numSegments, numSegments), generator.uniform(-0.2, 0.2, numSegments)))
+        best = None
+        for repeat in range(repeats):
+            start = time.time()
+            found = contactSearch(points, line[:-1], line[1:], 2.0, 1.0)
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        rows.append({'segments': numSegments, 'seconds': best, 'nanosecondsPerSegment': 1E9*best/numSegments, 'contacts': len(found[0])})
+    return rows
+
+
+#Force-displacement of the Abaqus switch (summed RF2 against mean U2 of the displaced edge, as in
+#SwitchContinuation.extractForceDisplacement()) against the native curve interpolated at the same u2
+def compareWithOdb(curve, odbPath, stepName='Load Step', setName='DISPLACEMENT SET'):
+    from odbAccess import openOdb
+    odb = openOdb(path=odbPath, readOnly=True)
+    displacementSet = odb.rootAssembly.nodeSets[setName]
+    odbPoints = []
+    for frame in odb.steps[stepName].frames:
+        u2 = [value.data[1] for value in frame.fieldOutputs['U'].getSubset(region=displacementSet).values]
+        rf2 = [value.data[1] for value in frame.fieldOutputs['RF'].getSubset(region=displacementSet).values]
+        if u2:
+            odbPoints.append((sum(u2)/len(u2), sum(rf2)))
+    odb.close()
+    nativeU2 = np.array([point['u2'] for point in curve])
+    nativeRF2 = np.array([point['rf2'] for point in curve])
+    order = np.argsort(nativeU2)
+    odbPoints = np.array(odbPoints).reshape(-1, 2)
+    interpolated = np.interp(odbPoints[:,0], nativeU2[order], nativeRF2[order])
+    difference = np.abs(interpolated - odbPoints[:,1])
+    scale = np.abs(odbPoints[:,1]).max() if len(odbPoints) else 0.0
+    return {'frames': len(odbPoints), 'maxForceDifference': float(difference.max()) if len(difference) else 0.0,
+            'relativeForceDifference': float(difference.max()/scale) if scale else 0.0}
+
+
+if __name__ == '__main__':
+    start = time.time()
+    switchResults = solveSwitch()
+    statistics = switchResults['statistics']
+    print('Switch, %d DOF, %d increments, %d iterations, %d cutbacks in %.3f s (contact search %.3f s, solves %.3f s)' % (
+        switchResults['numDofs'], len(switchResults['curve'])-1, statistics['iterations'], statistics['cutbacks'], time.time()-start,
+        statistics['searchTime'], statistics['solveTime']))
+    for point in switchResults['curve']:
+        print('%3d  u2 %8.4f  RF2 %12.6g  contact nodes %d' % (point['increment'], point['u2'], point['rf2'], point['contactNodes']))
+    writeForceDisplacement(switchResults['curve'], 'SwitchSolver.csv')
+    if len(sys.argv) > 1:
+        print(compareWithOdb(switchResults['curve'], sys.argv[1]))
+    for row in contactSearchScaling():
+        print('Contact search, %8d segments: %.4f s, %.0f ns per segment' % (row['segments'], row['seconds'], row['nanosecondsPerSegment']))
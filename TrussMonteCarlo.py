@@ -0,0 +1,140 @@
+#Monte Carlo reliability studies of the overhead hoist with TrussSolver.py, thousands of samples per call
+#Each sample varies the member area (1.963E-5), the Young's modulus (200E9) and the load at vertex (1,0,0) (-1000).
+#The stiffness of a sample is K = sum of EA/L*v*v^T over the members, so the solve is chosen by how EA varies:
+#    EA the same for every sample (load variations only)   one factorization, all load vectors solved at once
+#    EA of a sample proportional to EA of the first one      the same factorization, displacements scaled by the ratio
+#    (one area and one modulus per sample)
+#    EA of the members varying independently                 stacked dense stiffness matrices and a batched solve,
+#                                                            chunked to bound memory
+#Results are distributions of member stress S and of the midspan deflection (U2 at vertex (1,0,0))
+#Run 'python TrussMonteCarlo.py [samples]' for the three kinds of study, with throughput in samples per second
+import sys
+import time
+
+import numpy as np
+import scipy.sparse.linalg as sparselinalg
+
+from TrussSolver import (hoistLines, hoistArea, hoistElastic, hoistEncastre, hoistRolling, trussFromLines, findNodes,
+                         memberGeometry, memberDofs, assembleStiffness, boundaryArrays, solveTruss)
+
+hoistLoadPoint = (1, 0)
+hoistLoad = -1000.0
+#Stacked dense matrices are used up to this many free degrees of freedom, larger trusses factorize every sample
+maxStackedDofs = 200
+
+
+#Normally distributed samples of area, modulus and load given their coefficients of variation
+#perMemberArea=True draws an area for every member of every sample instead of one area per sample
+def sampleHoist(numSamples, areaCov=0.05, modulusCov=0.03, loadCov=0.1, perMemberArea=False, seed=0):
+    random = np.random.RandomState(seed)
+    numMembers = len(hoistLines)
+    areaShape = (numSamples, numMembers) if perMemberArea else (numSamples,)
+    return {'area': hoistArea*(1.0 + areaCov*random.standard_normal(areaShape)),
+            'youngsModulus': hoistElastic[0][0]*(1.0 + modulusCov*random.standard_normal(numSamples)),
+            'load': hoistLoad*(1.0 + loadCov*random.standard_normal(numSamples))}
+
+
+#Displacements of all samples: loads is (samples, dofs), axialStiffness (samples,) or (samples, members) holds EA
+def solveSamples(nodes, members, axialStiffness, loads, fixed, chunkSize=None):
+    numSamples = loads.shape[0]
+    numDofs = 2*len(nodes)
+    free = np.setdiff1d(np.arange(numDofs), fixed)
+    axialStiffness = np.broadcast_to(np.asarray(axialStiffness, dtype=np.float64).reshape(numSamples, -1), (numSamples, len(members)))
+    ratio = axialStiffness/axialStiffness[:1]
+    displacement = np.zeros((numSamples, numDofs))
+    if np.allclose(ratio, ratio[:,:1], rtol=1E-12, atol=0.0):
+        #One factorization of the stiffness of the first sample, the others are multiples of it
+        stiffness = assembleStiffness(nodes, members, axialStiffness[0], 1.0)
+        factor = sparselinalg.splu(stiffness[free][:,free].tocsc())
+        displacement[:,free] = factor.solve(np.ascontiguousarray(loads[:,free].T)).T/ratio[:,:1]
+        method = 'single factorization' if np.all(ratio == 1.0) else 'scaled factorization'
+        return displacement, method
+    if len(free) > maxStackedDofs:
+        for sample in range(numSamples):
+            stiffness = assembleStiffness(nodes, members, axialStiffness[sample], 1.0)
+            displacement[sample, free] = sparselinalg.spsolve(stiffness[free][:,free].tocsc(), loads[sample, free])
+        return displacement, 'factorization per sample'
+    #Unit member matrices v*v^T/L on the free dofs, the stiffness of a sample is their EA weighted sum
+    vector, length = memberGeometry(nodes, members)
+    freeIndex = -np.ones(numDofs, dtype=np.int64)
+    freeIndex[free] = np.arange(len(free))
+    dofs = freeIndex[memberDofs(members)]
+    unitMatrices = np.zeros((len(members), len(free), len(free)))
+    for row in range(4):
+        for column in range(4):
+            keep = (dofs[:,row] >= 0) & (dofs[:,column] >= 0)
+            np.add.at(unitMatrices, (np.nonzero(keep)[0], dofs[keep,row], dofs[keep,column]), vector[keep,row]*vector[keep,column]/length[keep])
+    if chunkSize is None:
+        chunkSize = max(1, (32*2**20)//(8*len(free)**2))
+    freeLoads = loads[:,free]
+    for start in range(0, numSamples, chunkSize):
+        span = slice(start, min(start+chunkSize, numSamples))
+        stiffness = np.tensordot(axialStiffness[span], unitMatrices, axes=(1, 0))
+        displacement[span, free] = np.linalg.solve(stiffness, freeLoads[span,:,np.newaxis])[:,:,0]
+    return displacement, 'stacked solve'
+
+
+#Member stresses of all samples, youngsModulus is (samples,) or (samples, members)
+def sampleStresses(nodes, members, displacement, youngsModulus):
+    vector, length = memberGeometry(nodes, members)
+    elongation = np.einsum('mk,smk->sm', vector, displacement[:, memberDofs(members)])
+    youngsModulus = np.asarray(youngsModulus, dtype=np.float64)
+    if youngsModulus.ndim == 1:
+        youngsModulus = youngsModulus[:,np.newaxis]
+    return youngsModulus*elongation/length
+
+
+#Solve every sample of sampleHoist() and return the stress and deflection distributions
+def runHoistMonteCarlo(samples, chunkSize=None):
+    nodes, members = trussFromLines(hoistLines)
+    numSamples = len(samples['load'])
+    unitLoad, fixed = boundaryArrays(nodes, {hoistLoadPoint: (0, 1)}, hoistEncastre, hoistRolling)
+    loads = np.asarray(samples['load'], dtype=np.float64)[:,np.newaxis]*unitLoad[np.newaxis,:]
+    area = np.asarray(samples['area'], dtype=np.float64)
+    youngsModulus = np.asarray(samples['youngsModulus'], dtype=np.float64)
+    axialStiffness = (area if area.ndim == 2 else area[:,np.newaxis])*youngsModulus[:,np.newaxis]
+    start = time.time()
+    displacement, method = solveSamples(nodes, members, axialStiffness, loads, fixed, chunkSize)
+    stress = sampleStresses(nodes, members, displacement, youngsModulus)
+    wallTime = time.time() - start
+    midspan = findNodes(nodes, [hoistLoadPoint])[0]
+    return {'S': stress, 'midspanDeflection': displacement[:, 2*midspan+1], 'U': displacement.reshape(numSamples, -1, 2),
+            'nodes': nodes, 'members': members, 'method': method, 'wallTime': wallTime,
+            'samplesPerSecond': numSamples/max(wallTime, 1E-12)}
+
+
+#Mean, standard deviation and percentiles along the sample axis
+def distribution(values, percentiles=(1, 5, 50, 95, 99)):
+    values = np.asarray(values)
+    summary = {'mean': values.mean(axis=0), 'std': values.std(axis=0), 'min': values.min(axis=0), 'max': values.max(axis=0)}
+    for percentile, value in zip(percentiles, np.percentile(values, percentiles, axis=0)):
+        summary['p%02d' % percentile] = value
+    return summary
+
+
+#The first sample solved on its own with TrussSolver.solveTruss()
+def checkFirstSample(samples, results):
+    nodes, members = results['nodes'], results['members']
+    area = np.asarray(samples['area'])[0]
+    single = solveTruss(nodes, members, area, ((samples['youngsModulus'][0], 0.3),), {hoistLoadPoint: (0, samples['load'][0])},
+                        hoistEncastre, hoistRolling)
+    return max(np.abs(single['S'] - results['S'][0]).max()/np.abs(single['S']).max(),
+               np.abs(single['U'] - results['U'][0]).max()/np.abs(single['U']).max())
+
+
+if __name__ == '__main__':
+    numSamples = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    studies = (
+        ('load only', sampleHoist(numSamples, areaCov=0.0, modulusCov=0.0)),
+        ('area and modulus per sample', sampleHoist(numSamples)),
+        ('area per member', sampleHoist(numSamples, perMemberArea=True)),
+    )
+    for title, hoistSamples in studies:
+        hoistResults = runHoistMonteCarlo(hoistSamples)
+        deflection = distribution(hoistResults['midspanDeflection'])
+        stress = distribution(np.abs(hoistResults['S']).max(axis=1))
+        print('%s: %d samples, %s, %.3f s, %.0f samples/s, first sample relative error %.1e' % (
+            title, numSamples, hoistResults['method'], hoistResults['wallTime'], hoistResults['samplesPerSecond'],
+            checkFirstSample(hoistSamples, hoistResults)))
+        print('    midspan deflection mean %.4e std %.4e p01 %.4e p99 %.4e' % (deflection['mean'], deflection['std'], deflection['p01'], deflection['p99']))
+        print('    peak member |S|    mean %.4e std %.4e p01 %.4e p99 %.4e' % (stress['mean'], stress['std'], stress['p01'], stress['p99']))
@@ -0,0 +1,196 @@
+#Native linear solver for pin-jointed 2D trusses, an Abaqus-free screening path for OverheadHoist.py
+#The truss is given the way OverheadHoist.py builds it: sketch lines, a TrussSection area, an Elastic table,
+#ConcentratedForce values at vertices, an Encastre vertex and rolling (u2 fixed) vertices
+#The global stiffness is assembled in one vectorized COO->CSR step and solved with SciPy
+#Results follow the output database names: U and RF per node, S (axial stress S11) per member
+#Run 'python TrussSolver.py' to solve the hoist and time a 100k member truss
+import time
+
+import numpy as np
+import scipy.sparse as sparse
+import scipy.sparse.linalg as sparselinalg
+
+#The overhead hoist of OverheadHoist.py
+hoistLines = (
+    ((0,0), (1,0)),
+    ((1,0), (2,0)),
+    ((0,0), (0.5,0.866)),
+    ((0.5,0.866), (1.5,0.866)),
+    ((1.5,0.866), (2,0)),
+    ((0.5,0.866), (1,0)),
+    ((1,0), (1.5,0.866)),
+)
+hoistArea = 1.963E-5
+hoistElastic = ((200E9,0.3), )
+hoistDensity = 7800
+hoistForces = {(1,0): (0,-1000)}
+hoistEncastre = ((0,0),)
+hoistRolling = ((2,0),)
+
+
+#Merge line end points into nodes, points closer than tolerance are the same node
+def trussFromLines(lines, tolerance=1E-6):
+    points = np.asarray(lines, dtype=np.float64).reshape(-1, 2)
+    keys = np.round(points/tolerance).astype(np.int64)
+    uniqueKeys, firstIndex, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    nodes = points[firstIndex]
+    members = inverse.reshape(-1, 2).astype(np.int64)
+    return nodes, members
+
+
+#Index of the node at each of the given points
+def findNodes(nodes, points, tolerance=1E-6):
+    points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+    distance = np.linalg.norm(nodes[None,:,:] - points[:,None,:], axis=2) if len(points)*len(nodes) <= 10**7 else None
+    if distance is None:
+        from scipy.spatial import cKDTree
+        distance, index = cKDTree(nodes).query(points)
+    else:
+        index = distance.argmin(axis=1)
+        distance = distance[np.arange(len(points)), index]
+    if np.any(distance > tolerance):
+        raise ValueError('No truss node at %s' % points[distance > tolerance].tolist())
+    return index
+
+
+#Unit vector [-c, -s, c, s] and length of every member
+def memberGeometry(nodes, members):
+    delta = nodes[members[:,1]] - nodes[members[:,0]]
+    length = np.sqrt((delta*delta).sum(axis=1))
+    if np.any(length <= 0):
+        raise ValueError('Truss has members of zero length')
+    direction = delta/length[:,None]
+    return np.hstack((-direction, direction)), length
+
+
+def memberDofs(members):
+    return np.column_stack((2*members[:,0], 2*members[:,0]+1, 2*members[:,1], 2*members[:,1]+1))
+
+
+#Global stiffness as CSR, every member stiffness EA/L*v*v^T is built in one batched outer product
+def assembleStiffness(nodes, members, area, youngsModulus):
+    vector, length = memberGeometry(nodes, members)
+    axialStiffness = np.broadcast_to(np.asarray(area*youngsModulus, dtype=np.float64), length.shape)/length
+    memberStiffness = axialStiffness[:,None,None]*vector[:,:,None]*vector[:,None,:]
+    dofs = memberDofs(members)
+    rows = np.repeat(dofs, 4, axis=1).ravel()
+    columns = np.tile(dofs, (1, 4)).ravel()
+    numDofs = 2*len(nodes)
+    return sparse.coo_matrix((memberStiffness.ravel(), (rows, columns)), shape=(numDofs, numDofs)).tocsr()
+
+
+#Global mass as CSR, consistent rho*A*L/6*[[2, 1], [1, 2]] per direction or lumped rho*A*L/2 at each end
+def assembleMass(nodes, members, area, density, lumped=False):
+    vector, length = memberGeometry(nodes, members)
+    memberMass = np.broadcast_to(np.asarray(area*density, dtype=np.float64), length.shape)*length
+    pattern = np.eye(2)/2.0 if lumped else np.array([[2.0, 1.0], [1.0, 2.0]])/6.0
+    memberMatrices = memberMass[:,None,None]*np.kron(pattern, np.eye(2))[None,:,:]
+    dofs = memberDofs(members)
+    rows = np.repeat(dofs, 4, axis=1).ravel()
+    columns = np.tile(dofs, (1, 4)).ravel()
+    numDofs = 2*len(nodes)
+    return sparse.coo_matrix((memberMatrices.ravel(), (rows, columns)), shape=(numDofs, numDofs)).tocsr()
+
+
+#forces maps a node point to (cf1, cf2), encastre and rolling are sequences of node points
+def boundaryArrays(nodes, forces, encastre, rolling):
+    load = np.zeros(2*len(nodes))
+    if forces:
+        points = list(forces.keys())
+        index = findNodes(nodes, points)
+        load[2*index] += [forces[point][0] for point in points]
+        load[2*index+1] += [forces[point][1] for point in points]
+    fixed = []
+    if len(encastre):
+        index = findNodes(nodes, encastre)
+        fixed += list(2*index) + list(2*index+1)
+    if len(rolling):
+        fixed += list(2*findNodes(nodes, rolling)+1)
+    return load, np.unique(np.asarray(fixed, dtype=np.int64))
+
+
+def solveTruss(nodes, members, area, elasticTable, forces, encastre=(), rolling=()):
+    youngsModulus = elasticTable[0][0]
+    stiffness = assembleStiffness(nodes, members, area, youngsModulus)
+    load, fixed = boundaryArrays(nodes, forces, encastre, rolling)
+    free = np.setdiff1d(np.arange(stiffness.shape[0]), fixed)
+    displacement = np.zeros(stiffness.shape[0])
+    displacement[free] = sparselinalg.spsolve(stiffness[free][:,free].tocsc(), load[free])
+    reaction = stiffness.dot(displacement) - load
+    reaction[free] = 0.0
+    vector, length = memberGeometry(nodes, members)
+    elongation = (vector*displacement[memberDofs(members)]).sum(axis=1)
+    stress = youngsModulus*elongation/length
+    return {'U': displacement.reshape(-1, 2), 'RF': reaction.reshape(-1, 2), 'S': stress,
+            'axialForce': stress*area, 'nodes': nodes, 'members': members}
+
+
+def solveHoist():
+    nodes, members = trussFromLines(hoistLines)
+    return solveTruss(nodes, members, hoistArea, hoistElastic, hoistForces, hoistEncastre, hoistRolling)
+
+
+#Warren truss like the hoist with numBays bays along the bottom chord, pinned at the left end and rolling at the right end
+def warrenTruss(numBays, bayLength=1.0, height=0.866):
+    bottom = np.column_stack((np.arange(numBays+1)*bayLength, np.zeros(numBays+1)))
+    top = np.column_stack(((np.arange(numBays)+0.5)*bayLength, np.full(numBays, height)))
+    nodes = np.vstack((bottom, top))
+    bay = np.arange(numBays)
+    topIndex = numBays+1+bay
+    members = np.vstack((
+        np.column_stack((bay, bay+1)),
+        np.column_stack((topIndex[:-1], topIndex[1:])),
+        np.column_stack((bay, topIndex)),
+        np.column_stack((topIndex, bay+1)),
+    ))
+    return nodes, members
+
+
+#Compare native results with the Abaqus output database of the same truss
+#Abaqus nodes are matched to native nodes by position, Abaqus elements to the member they lie on
+def compareWithOdb(results, odbPath, stepName='Loading Step'):
+    from odbAccess import openOdb
+    odb = openOdb(path=odbPath, readOnly=True)
+    frame = odb.steps[stepName].frames[-1]
+    nodes = results['nodes']
+    coordinates = {}
+    for instance in odb.rootAssembly.instances.values():
+        for node in instance.nodes:
+            coordinates[(instance.name, node.label)] = node.coordinates[:2]
+    displacementError = 0.0
+    for value in frame.fieldOutputs['U'].values:
+        point = np.asarray(coordinates[(value.instance.name, value.nodeLabel)])
+        distance = np.linalg.norm(nodes - point, axis=1)
+        if distance.min() <= 1E-6:
+            displacementError = max(displacementError, np.abs(np.asarray(value.data[:2]) - results['U'][distance.argmin()]).max())
+    start = nodes[results['members'][:,0]]
+    end = nodes[results['members'][:,1]]
+    stressError = 0.0
+    for instance in odb.rootAssembly.instances.values():
+        centroids = {}
+        for element in instance.elements:
+            centroids[element.label] = np.mean([coordinates[(instance.name, label)] for label in element.connectivity], axis=0)
+        for value in frame.fieldOutputs['S'].values:
+            if value.elementLabel not in centroids:
+                continue
+            point = centroids[value.elementLabel]
+            along = np.clip(((point-start)*(end-start)).sum(axis=1)/((end-start)**2).sum(axis=1), 0.0, 1.0)
+            distance = np.linalg.norm(start + along[:,None]*(end-start) - point, axis=1)
+            stress = value.data[0] if isinstance(value.data, tuple) else value.data
+            stressError = max(stressError, abs(stress - results['S'][distance.argmin()]))
+    odb.close()
+    return {'maxDisplacementError': displacementError, 'maxStressError': stressError}
+
+
+if __name__ == '__main__':
+    hoistResults = solveHoist()
+    for index, node in enumerate(hoistResults['nodes']):
+        print('Node (%g, %g): U = (%.6e, %.6e) RF = (%.6e, %.6e)' % (tuple(node) + tuple(hoistResults['U'][index]) + tuple(hoistResults['RF'][index])))
+    for index, member in enumerate(hoistResults['members']):
+        print('Member %d-%d: S = %.6e' % (member[0], member[1], hoistResults['S'][index]))
+
+    largeNodes, largeMembers = warrenTruss(25000)
+    largeForces = dict([((x, 0.0), (0.0, -1000.0)) for x in range(1, 25000)])
+    start = time.time()
+    largeResults = solveTruss(largeNodes, largeMembers, hoistArea, hoistElastic, largeForces, ((0.0, 0.0),), ((25000.0, 0.0),))
+    print('Warren truss with %d members solved in %.3f s' % (len(largeMembers), time.time()-start))
@@ -0,0 +1,284 @@
+#Headless export of an output database to VTK files, for ParaView or VisIt on machines without a display
+#Every frame becomes one binary .vtu file (UnstructuredGrid, raw appended data) holding the mesh of all instances,
+#the nodal outputs (U, RF) as point data and the element outputs (S) as cell data, and a .pvd file lists the frames
+#as a time series. Field arrays are scattered into place with NumPy and written from their buffers with tofile().
+#Element outputs are averaged over the integration points of each element, one array per section point of
+#shells (S_SNEG, S_SPOS), with the largest Mises value of the element next to them (S_Mises), the value the
+#extract functions of the scripts report.
+#Frames can be split between processes or render nodes: worker i of n writes frames i, i+n, i+2n, ...
+#and worker 0 also writes the .pvd of all frames.
+#Run with the Abaqus Python interpreter: abaqus python VtuExporter.py ConnectingLugJob.odb [S U RF] [--worker 0/4 | --workers 4]
+#Run without Abaqus: PYTHONPATH=abaqusStub python VtuExporter.py ConnectingLugJob.odb
+import os
+import sys
+import subprocess
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from OdbExtractor import storeName
+
+defaultVariables = ('S', 'U', 'RF')
+
+#VTK cell type by number of nodes: the Abaqus node order of these elements is also the VTK order
+_solidCells = {4: 10, 6: 13, 8: 12, 10: 24, 15: 26, 20: 25}
+_surfaceCells = {3: 5, 4: 9, 6: 22, 8: 23}
+_lineCells = {2: 3, 3: 21}
+_vtkTypes = {'float32': 'Float32', 'float64': 'Float64', 'int32': 'Int32', 'int64': 'Int64', 'uint8': 'UInt8'}
+#VTK reads a 6 component array as a symmetric tensor XX, YY, ZZ, XY, YZ, XZ
+_symmetricTensorOrder = [0, 1, 2, 3, 5, 4]
+
+
+def vtkCellType(elementType, numNodes):
+    family = elementType.upper()
+    if family.startswith(('C3D', 'DC3D', 'SC', 'COH3D')):
+        cells = _solidCells
+    elif family.startswith(('T2D', 'T3D', 'B2', 'B3', 'PIPE', 'SPRING', 'CONN')):
+        cells = _lineCells
+    else:
+        cells = _surfaceCells
+    if numNodes not in cells:
+        raise ValueError('No VTK cell for %d-node %s elements' % (numNodes, elementType))
+    return cells[numNodes]
+
+
+#Label to index lookup of one instance, -1 for labels not in the instance
+def _labelIndex(labels, first):
+    labels = np.asarray(labels, dtype=np.int64)
+    lookup = -np.ones(labels.max()+1 if len(labels) else 1, dtype=np.int64)
+    lookup[labels] = np.arange(first, first+len(labels))
+    return lookup
+
+
+class OdbMesh(object):
+    #Nodes and elements of all instances as one unstructured grid, read once per export
+
+    def __init__(self, odb):
+        points = []
+        connectivity = []
+        counts = []
+        cellTypes = []
+        self.nodeIndex = {}
+        self.elementIndex = {}
+        numPoints = 0
+        numCells = 0
+        for instance in odb.rootAssembly.instances.values():
+            nodeLabels = [node.label for node in instance.nodes]
+            if not nodeLabels:
+                continue
+            coordinates = np.zeros((len(nodeLabels), 3))
+            nodeCoordinates = np.array([node.coordinates for node in instance.nodes], dtype=np.float64)
+            coordinates[:,:nodeCoordinates.shape[1]] = nodeCoordinates
+            points.append(coordinates)
+            self.nodeIndex[instance.name] = _labelIndex(nodeLabels, numPoints)
+            elementLabels = []
+            instanceConnectivity = []
+            for element in instance.elements:
+                elementLabels.append(element.label)
+                instanceConnectivity.extend(element.connectivity)
+                counts.append(len(element.connectivity))
+                cellTypes.append(vtkCellType(str(element.type), len(element.connectivity)))
+            if elementLabels:
+                connectivity.append(self.nodeIndex[instance.name][np.asarray(instanceConnectivity, dtype=np.int64)])
+                self.elementIndex[instance.name] = _labelIndex(elementLabels, numCells)
+            numPoints += len(nodeLabels)
+            numCells += len(elementLabels)
+        self.points = np.concatenate(points) if points else np.zeros((0, 3))
+        self.connectivity = np.concatenate(connectivity).astype(np.int64) if connectivity else np.zeros(0, dtype=np.int64)
+        self.offsets = np.cumsum(np.asarray(counts, dtype=np.int64))
+        self.cellTypes = np.asarray(cellTypes, dtype=np.uint8)
+        self.numPoints = numPoints
+        self.numCells = numCells
+
+
+#Point or cell arrays of one field output of a frame: {name: (values, componentNames)}
+#Array name suffix of a section point: SNEG, SPOS or SP<number>, None for blocks without section points
+def sectionPointName(sectionPoint):
+    if sectionPoint is None:
+        return None
+    description = str(sectionPoint.description).split(',')[0].strip().upper()
+    return description if description in ('SNEG', 'SPOS', 'SMID') else 'SP%d' % sectionPoint.number
+
+
+def frameArrays(fieldOutput, mesh):
+    blocks = [block for block in fieldOutput.bulkDataBlocks if block.instance is not None]
+    if not blocks:
+        return None, {}
+    position = str(blocks[0].position)
+    componentLabels = [str(label) for label in blocks[0].componentLabels]
+    numComponents = np.asarray(blocks[0].data).reshape(len(blocks[0].data), -1).shape[1]
+    name = fieldOutput.name
+    if position == 'NODAL':
+        values = np.empty((mesh.numPoints, max(numComponents, 3) if numComponents in (2, 3) else numComponents), dtype=np.float32)
+        values.fill(np.nan)
+        for block in blocks:
+            indices = mesh.nodeIndex[block.instance.name][block.nodeLabels]
+            values[indices,:numComponents] = np.asarray(block.data).reshape(len(indices), numComponents)
+        if numComponents == 2:
+            values[:,2] = 0.0
+            componentLabels = componentLabels + ['']
+        return 'point', {name: (values, componentLabels)}
+    if position not in ('INTEGRATION_POINT', 'CENTROID', 'WHOLE_ELEMENT'):
+        return None, {}
+    #Shell outputs come in one block per section point. Averaging them would leave only the membrane part of
+    #a bent shell, so every section point gets its own array (S_SNEG, S_SPOS); solid blocks have none
+    sectionNames = []
+    sums = {}
+    counts = {}
+    mises = np.empty(mesh.numCells, dtype=np.float32)
+    mises.fill(np.nan)
+    hasMises = blocks[0].mises is not None
+    for block in blocks:
+        sectionName = sectionPointName(block.sectionPoint)
+        if sectionName not in sums:
+            sectionNames.append(sectionName)
+            sums[sectionName] = np.zeros((mesh.numCells, numComponents))
+            counts[sectionName] = np.zeros(mesh.numCells)
+        indices = mesh.elementIndex[block.instance.name][block.elementLabels]
+        data = np.asarray(block.data).reshape(len(indices), numComponents)
+        for component in range(numComponents):
+            sums[sectionName][:,component] += np.bincount(indices, weights=data[:,component], minlength=mesh.numCells)
+        counts[sectionName] += np.bincount(indices, minlength=mesh.numCells)
+        if hasMises:
+            blockMises = np.empty(mesh.numCells, dtype=np.float32)
+            blockMises.fill(-np.inf)
+            np.maximum.at(blockMises, indices, np.asarray(block.mises, dtype=np.float32))
+            mises = np.fmax(mises, np.where(np.isinf(blockMises), np.nan, blockMises))
+    if numComponents == 6:
+        componentLabels = [componentLabels[component] for component in _symmetricTensorOrder]
+    arrays = {}
+    for sectionName in sectionNames:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = (sums[sectionName]/counts[sectionName][:,np.newaxis]).astype(np.float32)
+        if numComponents == 6:
+            values = values[:,_symmetricTensorOrder]
+        arrays[name if sectionName is None else '%s_%s' % (name, sectionName)] = (values, componentLabels)
+    if hasMises:
+        arrays[name + '_Mises'] = (mises, [])
+    return 'cell', arrays
+
+
+def _dataArrayTag(name, values, componentNames, offset):
+    components = values.shape[1] if values.ndim > 1 else 1
+    attributes = ' type="%s" Name=%s' % (_vtkTypes[values.dtype.name], quoteattr(name))
+    if components > 1:
+        attributes += ' NumberOfComponents="%d"' % components
+    for index, componentName in enumerate(componentNames):
+        if componentName:
+            attributes += ' ComponentName%d=%s' % (index, quoteattr(componentName))
+    return '<DataArray%s format="appended" offset="%d"/>' % (attributes, offset)
+
+
+#One VTU file: the XML header lists every array with its offset, then the arrays follow as raw bytes,
+#each preceded by its size as a UInt64
+def writeVtu(path, mesh, pointArrays, cellArrays):
+    sections = [('PointData', sorted(pointArrays.items())), ('CellData', sorted(cellArrays.items())),
+                ('Points', [('Points', (mesh.points, []))]),
+                ('Cells', [('connectivity', (mesh.connectivity, [])), ('offsets', (mesh.offsets, [])), ('types', (mesh.cellTypes, []))])]
+    header = ['<?xml version="1.0"?>',
+              '<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">',
+              '<UnstructuredGrid>',
+              '<Piece NumberOfPoints="%d" NumberOfCells="%d">' % (mesh.numPoints, mesh.numCells)]
+    offset = 0
+    arrays = []
+    for section, sectionArrays in sections:
+        header.append('<%s>' % section)
+        for name, (values, componentNames) in sectionArrays:
+            values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+            header.append(_dataArrayTag(name, values, componentNames, offset))
+            arrays.append(values)
+            offset += 8 + values.nbytes
+        header.append('</%s>' % section)
+    header.extend(['</Piece>', '</UnstructuredGrid>', '<AppendedData encoding="raw">'])
+    vtuFile = open(path, 'wb')
+    vtuFile.write(('\n'.join(header) + '\n_').encode('ascii'))
+    for values in arrays:
+        vtuFile.write(np.array([values.nbytes], dtype='<u8').tobytes())
+        values.tofile(vtuFile)
+    vtuFile.write('\n</AppendedData>\n</VTKFile>\n'.encode('ascii'))
+    vtuFile.close()
+    return path
+
+
+#Time series of VTU files, entries are (time, file name relative to the .pvd)
+def writePvd(path, entries):
+    lines = ['<?xml version="1.0"?>', '<VTKFile type="Collection" version="1.0" byte_order="LittleEndian">', '<Collection>']
+    for time, fileName in entries:
+        lines.append('<DataSet timestep="%r" group="" part="0" file=%s/>' % (float(time), quoteattr(fileName)))
+    lines.extend(['</Collection>', '</VTKFile>'])
+    pvdFile = open(path, 'w')
+    pvdFile.write('\n'.join(lines) + '\n')
+    pvdFile.close()
+    return path
+
+
+#Write the frames of the given steps (all by default) as <directory>/<job>_<step>_<frame>.vtu and <job>.pvd
+#The time of a frame is its total time: the step time plus the duration of the earlier steps
+def exportOdb(odbPath, directory=None, variables=defaultVariables, stepNames=None, worker=0, numWorkers=1):
+    from odbAccess import openOdb
+    jobName = os.path.splitext(os.path.basename(odbPath))[0]
+    if directory is None:
+        directory = os.path.splitext(odbPath)[0] + '_vtu'
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    odb = openOdb(path=odbPath, readOnly=True)
+    written = []
+    entries = []
+    try:
+        mesh = OdbMesh(odb)
+        stepStart = 0.0
+        frameNumber = 0
+        for stepName in (stepNames or odb.steps.keys()):
+            step = odb.steps[stepName]
+            stepStart = getattr(step, 'totalTime', stepStart)
+            lastFrameValue = 0.0
+            for frameIndex in range(len(step.frames)):
+                fileName = '%s_%s_%04d.vtu' % (storeName(jobName), storeName(stepName), frameIndex)
+                if frameNumber % numWorkers == worker:
+                    frame = step.frames[frameIndex]
+                    lastFrameValue = frame.frameValue
+                    pointArrays = {}
+                    cellArrays = {}
+                    availableVariables = frame.fieldOutputs.keys()
+                    for variable in variables:
+                        if variable in availableVariables:
+                            kind, arrays = frameArrays(frame.fieldOutputs[variable], mesh)
+                            (pointArrays if kind == 'point' else cellArrays).update(arrays)
+                    written.append(writeVtu(os.path.join(directory, fileName), mesh, pointArrays, cellArrays))
+                    del frame
+                else:
+                    lastFrameValue = step.frames[frameIndex].frameValue
+                entries.append((stepStart + lastFrameValue, fileName))
+                frameNumber += 1
+            stepStart += lastFrameValue
+    finally:
+        odb.close()
+    if worker == 0:
+        written.append(writePvd(os.path.join(directory, storeName(jobName) + '.pvd'), entries))
+    return written
+
+
+#Export with numWorkers processes of this interpreter, each writing every numWorkers-th frame
+def exportOdbParallel(odbPath, numWorkers, variables=defaultVariables):
+    processes = [subprocess.Popen([sys.executable, os.path.abspath(__file__), odbPath] + list(variables) + ['--worker', '%d/%d' % (worker, numWorkers)])
+                 for worker in range(numWorkers)]
+    return [process.wait() for process in processes]
+
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    if not arguments:
+        sys.exit('Usage: VtuExporter.py JOB.odb [VARIABLE ...] [--worker I/N | --workers N]')
+    worker, numWorkers, processes = 0, 1, None
+    if '--worker' in arguments:
+        index = arguments.index('--worker')
+        worker, numWorkers = [int(value) for value in arguments[index+1].split('/')]
+        del arguments[index:index+2]
+    if '--workers' in arguments:
+        index = arguments.index('--workers')
+        processes = int(arguments[index+1])
+        del arguments[index:index+2]
+    if processes:
+        sys.exit(max(exportOdbParallel(arguments[0], processes, tuple(arguments[1:]) or defaultVariables)))
+    exportedFiles = exportOdb(arguments[0], variables=tuple(arguments[1:]) or defaultVariables, worker=worker, numWorkers=numWorkers)
+    print('Wrote %d files for %s' % (len(exportedFiles), arguments[0]))
@@ -0,0 +1,393 @@
+#Stand-in for the abaqus module of the Abaqus/CAE kernel
+#Put this directory first on sys.path (PYTHONPATH=abaqusStub) to run the model scripts and drivers without a license
+#Every kernel call made on a model is recorded in model.journal, writeInput() dumps that journal as the input deck
+#and submit() runs the fake solver in fakeSolver.py, which simulates the job runtime and writes a stand-in .odb
+import os
+import sys
+import copy
+import json
+import shlex
+import subprocess
+from math import sqrt, pi, sin, cos, tan, atan, atan2, exp, log
+
+from abaqusConstants import *
+import odbAccess
+
+_stubDirectory = os.path.dirname(os.path.abspath(__file__))
+
+#Jobs launched by this stub, or by anything reading ABAQUS_COMMAND, go to the fake solver unless told otherwise
+os.environ.setdefault('ABAQUS_COMMAND', '"%s" "%s"' % (sys.executable, os.path.join(_stubDirectory, 'fakeSolver.py')))
+
+
+def formatValue(value):
+    if isinstance(value, KernelObject):
+        return value._path
+    if isinstance(value, SymbolicConstant):
+        return value.name
+    if isinstance(value, tuple):
+        return '(%s%s)' % (', '.join([formatValue(item) for item in value]), ',' if len(value) == 1 else '')
+    if isinstance(value, list):
+        return '[%s]' % ', '.join([formatValue(item) for item in value])
+    if isinstance(value, dict):
+        return '{%s}' % ', '.join(['%s: %s' % (formatValue(key), formatValue(value[key])) for key in sorted(value)])
+    return repr(value)
+
+
+def formatArguments(args, kwargs):
+    arguments = [formatValue(value) for value in args]
+    arguments += ['%s=%s' % (key, formatValue(kwargs[key])) for key in sorted(kwargs)]
+    return ', '.join(arguments)
+
+
+class Repository(dict):
+    #Repositories keep insertion order and return keys as a list, like the kernel repositories do
+
+    def __init__(self):
+        dict.__init__(self)
+        self._order = []
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._order.append(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._order.remove(key)
+
+    def __iter__(self):
+        return iter(list(self._order))
+
+    def keys(self):
+        return list(self._order)
+
+    def values(self):
+        return [self[key] for key in self._order]
+
+    def items(self):
+        return [(key, self[key]) for key in self._order]
+
+    def changeKey(self, fromName, toName):
+        value = self[fromName]
+        self._order[self._order.index(fromName)] = toName
+        dict.__delitem__(self, fromName)
+        dict.__setitem__(self, toName, value)
+        if isinstance(value, KernelObject):
+            value._renamed(toName)
+
+
+class KernelObject(object):
+    #Any attribute is another kernel object and any call is recorded in the journal of the owning model
+
+    def __init__(self, path, model=None):
+        self._path = path
+        self._model = model
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return KernelObject('%s.%s' % (self._path, name), self._model)
+
+    def __call__(self, *args, **kwargs):
+        call = '%s(%s)' % (self._path, formatArguments(args, kwargs))
+        self._record(call)
+        return KernelObject(call, self._model)
+
+    def __repr__(self):
+        return self._path
+
+    def _record(self, call):
+        if self._model is not None:
+            self._model.journal.append(call)
+
+    def _renamed(self, name):
+        pass
+
+    def _create(self, repository, repositoryName, method, args, kwargs, objectClass=None):
+        name = kwargs.get('name', args[0] if args else None)
+        path = '%s.%s[%r]' % (self._path, repositoryName, name)
+        self._record('%s.%s(%s)' % (self._path, method, formatArguments(args, kwargs)))
+        newObject = (objectClass or KernelObject)(path, self._model)
+        repository[name] = newObject
+        return newObject
+
+
+class GeometrySequence(KernelObject):
+    #cells, faces, edges and vertices of a part or an instance
+
+    def __len__(self):
+        return 0
+
+    def findAt(self, *args, **kwargs):
+        return KernelObject.__getattr__(self, 'findAt')(*args, **kwargs)
+
+
+class DatumRepository(Repository):
+    #Datums are keyed by feature id, unknown ids resolve to a placeholder datum
+
+    def __init__(self, part):
+        Repository.__init__(self)
+        self._part = part
+
+    def __getitem__(self, key):
+        if key not in self:
+            return KernelObject('%s.datums[%r]' % (self._part._path, key), self._part._model)
+        return dict.__getitem__(self, key)
+
+
+class Part(KernelObject):
+
+    def __init__(self, path, model):
+        KernelObject.__init__(self, path, model)
+        self.datums = DatumRepository(self)
+        self._featureId = 0
+        for name in ('cells', 'faces', 'edges', 'vertices', 'nodes', 'elements'):
+            setattr(self, name, GeometrySequence('%s.%s' % (path, name), model))
+
+    def __getattr__(self, name):
+        method = KernelObject.__getattr__(self, name)
+        if name.startswith('Base'):
+            #The sketch and the base feature both take a feature id
+            self._featureId += 2
+        elif name.startswith('Datum'):
+            def createDatum(*args, **kwargs):
+                self._featureId += 1
+                datum = method(*args, **kwargs)
+                self.datums[self._featureId] = datum
+                return datum
+            return createDatum
+        elif name.startswith('Partition'):
+            self._featureId += 1
+        return method
+
+
+class Assembly(KernelObject):
+
+    def __init__(self, path, model):
+        KernelObject.__init__(self, path, model)
+        self.instances = Repository()
+        self.surfaces = Repository()
+        self.sets = Repository()
+
+    def Instance(self, *args, **kwargs):
+        instance = self._create(self.instances, 'instances', 'Instance', args, kwargs, Instance)
+        instance.partName = kwargs['part']._path if 'part' in kwargs else None
+        return instance
+
+    def Surface(self, *args, **kwargs):
+        return self._create(self.surfaces, 'surfaces', 'Surface', args, kwargs)
+
+    def Set(self, *args, **kwargs):
+        return self._create(self.sets, 'sets', 'Set', args, kwargs)
+
+
+class Instance(KernelObject):
+
+    def __init__(self, path, model):
+        KernelObject.__init__(self, path, model)
+        for name in ('cells', 'faces', 'edges', 'vertices', 'nodes', 'elements'):
+            setattr(self, name, GeometrySequence('%s.%s' % (path, name), model))
+
+
+#Model methods that create a named object, with the repository the object is stored in
+_modelRepositories = (
+    ('ConstrainedSketch', 'sketches'),
+    ('Part', 'parts'),
+    ('Material', 'materials'),
+    ('Section', 'sections'),
+    ('Step', 'steps'),
+    ('FieldOutputRequest', 'fieldOutputRequests'),
+    ('HistoryOutputRequest', 'historyOutputRequests'),
+    ('BC', 'boundaryConditions'),
+    ('Pressure', 'loads'),
+    ('Force', 'loads'),
+    ('Moment', 'loads'),
+    ('ContactProperty', 'interactionProperties'),
+    ('Contact', 'interactions'),
+    ('Amplitude', 'amplitudes'),
+)
+
+
+class KeywordBlock(object):
+    #Keyword editing of a model: sieBlocks holds the heading and a *Step/*End Step pair per step, inserted
+    #blocks are recorded in the journal and written to the input deck after it
+
+    def __init__(self, model):
+        self._model = model
+        self.edits = []
+        self.sieBlocks = []
+
+    def synchVersions(self, storeNodesAndElements=True):
+        self.sieBlocks = ['*Heading']
+        for name in self._model.steps.keys():
+            if name != 'Initial':
+                self.sieBlocks += ['*Step, name=%s' % name, '*End Step']
+        for position, text in self.edits:
+            self.sieBlocks.insert(position+1, text)
+
+    def insert(self, position, text):
+        self._model.journal.append('model.keywordBlock.insert(%s)' % formatArguments((position, text), {}))
+        self.edits.append((position, text))
+        self.sieBlocks.insert(position+1, text)
+
+
+class Model(KernelObject):
+
+    def __init__(self, name):
+        #Journal paths are relative to the model so that two identical models journal identically
+        KernelObject.__init__(self, 'model', None)
+        self._model = self
+        self.name = name
+        self.journal = []
+        for repositoryName in set([repositoryName for method, repositoryName in _modelRepositories]):
+            setattr(self, repositoryName, Repository())
+        self.steps['Initial'] = KernelObject("model.steps['Initial']", self)
+        self.fieldOutputRequests['F-Output-1'] = KernelObject("model.fieldOutputRequests['F-Output-1']", self)
+        self.historyOutputRequests['H-Output-1'] = KernelObject("model.historyOutputRequests['H-Output-1']", self)
+        self.rootAssembly = Assembly('model.rootAssembly', self)
+        self.keywordBlock = KeywordBlock(self)
+
+    def __getattr__(self, name):
+        for method, repositoryName in _modelRepositories:
+            if method in name:
+                repository = getattr(self, repositoryName)
+                objectClass = Part if name == 'Part' else None
+                def create(*args, **kwargs):
+                    return self._create(repository, repositoryName, name, args, kwargs, objectClass)
+                return create
+        return KernelObject.__getattr__(self, name)
+
+    def _renamed(self, name):
+        self.name = name
+
+
+class Job(object):
+
+    def __init__(self, name, model, **kwargs):
+        self.name = name
+        self.model = model
+        self.numCpus = 1
+        self.memory = 90
+        self.memoryUnits = PERCENTAGE
+        self._process = None
+        self._status = None
+        self.setValues(**kwargs)
+
+    def setValues(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def writeInput(self, consistencyChecking=OFF):
+        model = mdb.models[self.model]
+        header = {
+            'model': self.model,
+            'steps': [name for name in model.steps.keys() if name != 'Initial'],
+            'instances': model.rootAssembly.instances.keys(),
+        }
+        inputFile = open(self.name + '.inp', 'w')
+        inputFile.write('*Heading\n')
+        inputFile.write('** Job name: %s Model name: %s\n' % (self.name, self.model))
+        inputFile.write('** stub-model: %s\n' % json.dumps(header, sort_keys=True))
+        for call in model.journal:
+            inputFile.write('** %s\n' % call)
+        for position, text in model.keywordBlock.edits:
+            inputFile.write(text.rstrip('\n') + '\n')
+        inputFile.close()
+
+    def submit(self, consistencyChecking=OFF, datacheckJob=False, continueJob=False):
+        self.writeInput(consistencyChecking)
+        command = shlex.split(os.environ['ABAQUS_COMMAND'])
+        command += ['job=%s' % self.name, 'input=%s.inp' % self.name, 'cpus=%d' % self.numCpus, 'interactive']
+        logFile = open(self.name + '.log', 'w')
+        self._process = subprocess.Popen(command, stdout=logFile, stderr=subprocess.STDOUT)
+        logFile.close()
+        self._status = SUBMITTED
+
+    def waitForCompletion(self):
+        if self._process is not None:
+            self._process.wait()
+        return self.status
+
+    def kill(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+            self._status = TERMINATED
+
+    @property
+    def status(self):
+        if self._process is not None and self._status in (SUBMITTED, RUNNING):
+            returnCode = self._process.poll()
+            if returnCode is None:
+                self._status = RUNNING
+            else:
+                self._status = COMPLETED if returnCode == 0 else ABORTED
+        return self._status
+
+
+#Copy of a kernel object for a copied model, with its geometry sequences, datums and repositories journaling
+#into the copy. Parts must not share datums with the original, later datums would number from both
+def _copyKernelObject(kernelObject, model):
+    copiedObject = copy.copy(kernelObject)
+    copiedObject._model = model
+    for name, value in list(vars(kernelObject).items()):
+        if name.startswith('_'):
+            continue
+        if isinstance(value, DatumRepository):
+            datums = DatumRepository(copiedObject)
+            for key in value.keys():
+                datums[key] = _copyKernelObject(dict.__getitem__(value, key), model)
+            setattr(copiedObject, name, datums)
+        elif isinstance(value, Repository):
+            repository = Repository()
+            for key in value.keys():
+                repository[key] = _copyKernelObject(value[key], model)
+            setattr(copiedObject, name, repository)
+        elif isinstance(value, KernelObject):
+            setattr(copiedObject, name, _copyKernelObject(value, model))
+    return copiedObject
+
+
+class Mdb(object):
+
+    def __init__(self):
+        self.models = Repository()
+        self.jobs = Repository()
+        self.Model(name='Model-1')
+
+    def Model(self, name, objectToCopy=None, **kwargs):
+        self.models[name] = Model(name)
+        if objectToCopy is not None:
+            #The copy starts from the journal and the named objects of the original model
+            copiedModel = self.models[name]
+            copiedModel.journal = list(objectToCopy.journal)
+            for method, repositoryName in _modelRepositories:
+                for key, value in getattr(objectToCopy, repositoryName).items():
+                    getattr(copiedModel, repositoryName)[key] = _copyKernelObject(value, copiedModel)
+            copiedModel.rootAssembly = _copyKernelObject(objectToCopy.rootAssembly, copiedModel)
+            copiedModel.keywordBlock.edits = list(objectToCopy.keywordBlock.edits)
+        return self.models[name]
+
+    def Job(self, name, model, **kwargs):
+        self.jobs[name] = Job(name, model, **kwargs)
+        return self.jobs[name]
+
+
+class Session(object):
+
+    def __init__(self):
+        self.viewports = Repository()
+        self.odbs = Repository()
+        self.Viewport(name='Viewport: 1')
+
+    def Viewport(self, name, **kwargs):
+        self.viewports[name] = KernelObject('session.viewports[%r]' % name)
+        return self.viewports[name]
+
+    def openOdb(self, name, readOnly=True, **kwargs):
+        self.odbs[name] = odbAccess.openOdb(path=name, readOnly=readOnly)
+        return self.odbs[name]
+
+
+mdb = Mdb()
+session = Session()
@@ -0,0 +1,63 @@
+#Stand-in for the abaqusConstants module of the Abaqus kernel
+#Only the symbolic constants used by the scripts of this repository are defined
+#A SymbolicConstant compares equal to another constant of the same name, which is all the scripts rely on
+
+class SymbolicConstant(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+    def __eq__(self, other):
+        return isinstance(other, SymbolicConstant) and other.name == self.name
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.name)
+
+
+class BooleanConstant(SymbolicConstant):
+
+    def __init__(self, name, value):
+        SymbolicConstant.__init__(self, name)
+        self.value = value
+
+    def __bool__(self):
+        return self.value
+
+    __nonzero__ = __bool__
+
+
+ON = BooleanConstant('ON', True)
+OFF = BooleanConstant('OFF', False)
+
+_constantNames = (
+    #Modelling space and part types
+    'STANDARD_EXPLICIT', 'THREE_D', 'TWO_D_PLANAR', 'AXISYMMETRIC', 'DEFORMABLE_BODY',
+    #Sections, loads and boundary conditions
+    'UNIFORM', 'MIDDLE_SURFACE', 'UNSET', 'SET', 'PRESELECT',
+    'XYPLANE', 'XZPLANE', 'YZPLANE',
+    #Element library and element controls
+    'STANDARD', 'EXPLICIT', 'AVERAGE_STRAIN', 'DEFAULT',
+    'C3D8R', 'C3D8', 'C3D20R', 'C3D20', 'S8R5', 'S8R', 'S4R', 'T2D2', 'T3D2',
+    'QUAD', 'HEX', 'STRUCTURED', 'SWEEP', 'FINER',
+    #Steps
+    'LANCZOS', 'SUBSPACE', 'AMS',
+    #Interactions
+    'FRICTIONLESS', 'HARD', 'LINEAR', 'PENALTY', 'FINITE', 'NONE', 'OMIT',
+    #Jobs
+    'ANALYSIS', 'RESTART', 'SINGLE', 'DOUBLE', 'DOMAIN', 'PERCENTAGE', 'MEGA_BYTES', 'GIGA_BYTES', 'ODB',
+    'SUBMITTED', 'RUNNING', 'COMPLETED', 'ABORTED', 'TERMINATED',
+    #Visualization and output database
+    'UNDEFORMED', 'DEFORMED', 'CONTOURS_ON_DEF', 'CONTOURS_ON_UNDEF',
+    'NODAL', 'INTEGRATION_POINT', 'ELEMENT_NODAL', 'CENTROID', 'WHOLE_ELEMENT',
+    'SCALAR', 'VECTOR', 'TENSOR_3D_FULL', 'TENSOR_3D_PLANAR', 'TENSOR_2D_PLANAR', 'TENSOR_3D_SURFACE',
+    'MISES',
+)
+
+for _name in _constantNames:
+    globals()[_name] = SymbolicConstant(_name)
@@ -0,0 +1,345 @@
+#Stand-in for the abaqus solver command
+#Usage mirrors the real launcher: python fakeSolver.py job=NAME input=NAME.inp cpus=N interactive
+#The run takes ABAQUS_STUB_RUNTIME seconds (default 0.2) split over ABAQUS_STUB_INCREMENTS increments (default 4),
+#the .sta file is appended as increments complete and a stand-in .odb is written at the end.
+#*Node Print/*El Print and *Node File/*El File requests of the deck write the same values to the .dat and
+#the binary .fil file, in the layout of Abaqus/Standard.
+#*Matrix Output writes the stiffness and mass matrices of the synthetic mesh to JOBNAME_STIF1.mtx and
+#JOBNAME_MASS1.mtx (lower triangle, COORDINATE or MATRIX INPUT format).
+#Frequency steps (FrequencyStep in the model journal) write a base state frame and one frame per mode.
+#Steps run in the order given by their previous= argument, as in Abaqus, not in the order they were created.
+#Field values are synthetic but deterministic: two input decks with the same model journal give the same results.
+import os
+import re
+import sys
+import json
+import time
+import struct
+import hashlib
+
+
+def parseArguments(arguments):
+    options = {}
+    for argument in arguments:
+        if '=' in argument:
+            key, value = argument.split('=', 1)
+            options[key] = value
+        else:
+            options[argument] = True
+    return options
+
+
+def readInput(inputPath):
+    inputFile = open(inputPath)
+    lines = inputFile.readlines()
+    inputFile.close()
+    header = {'steps': [], 'instances': []}
+    keywords = {'steps': [], 'instances': []}
+    stepCalls = []
+    digest = hashlib.sha1()
+    for line in lines:
+        if line.startswith('** stub-model:'):
+            header.update(json.loads(line[len('** stub-model:'):]))
+        elif not line.startswith('** Job name:'):
+            digest.update(line.encode('utf-8'))
+        #Decks written without the stub kernel, such as the ones of InpDeck.py
+        if line.upper().startswith('*STEP,') or line.upper().startswith('*INSTANCE,'):
+            name = keywordParameter(line, 'name')
+            if name is not None:
+                keywords['steps' if line.upper().startswith('*STEP,') else 'instances'].append(name)
+        match = re.match(r"\*\* model\.\w*Step\((.*)\)$", line.strip())
+        if match:
+            name = re.search(r"name='([^']*)'", match.group(1))
+            previous = re.search(r"previous='([^']*)'", match.group(1))
+            if name is not None:
+                stepCalls.append((name.group(1), previous.group(1) if previous else None))
+        match = re.match(r"\*\* model\.FrequencyStep\((.*)\)$", line.strip())
+        if match:
+            numEigen = re.search(r"numEigen=(\d+)", match.group(1))
+            header.setdefault('frequencySteps', {})[re.search(r"name='([^']*)'", match.group(1)).group(1)] = int(numEigen.group(1)) if numEigen else 10
+    header['steps'] = stepOrder(header['steps'], stepCalls)
+    #Steps added by keyword editing (see MatrixExport.py) write no frames
+    for name in ('steps', 'instances'):
+        header[name] = header[name] or keywords[name]
+    header['steps'] = header['steps'] or ['Step-1']
+    header['instances'] = header['instances'] or ['PART-1-1']
+    return header, digest.hexdigest()
+
+
+#Steps in analysis order: the kernel lists them in creation order, a step goes right after its previous step
+def stepOrder(stepNames, stepCalls):
+    order = []
+    for name, previous in stepCalls:
+        if name in order:
+            continue
+        if previous in order:
+            order.insert(order.index(previous) + 1, name)
+        elif previous == 'Initial':
+            order.insert(0, name)
+        else:
+            order.append(name)
+    return [name for name in order if name in stepNames] + [name for name in stepNames if name not in order]
+
+
+#Variables of the *Node Print, *El Print, *Node File and *El File requests of the deck
+def outputRequests(inputPath):
+    requests = {}
+    keyword = None
+    inputFile = open(inputPath)
+    for line in inputFile:
+        if line.startswith('**'):
+            continue
+        if line.startswith('*'):
+            keyword = line.strip().split(',')[0].upper()
+            if keyword in ('*NODE PRINT', '*EL PRINT', '*NODE FILE', '*EL FILE'):
+                requests.setdefault(keyword, [])
+            elif keyword == '*MATRIX OUTPUT':
+                items = [item.strip().upper() for item in line.strip().split(',')[1:]]
+                requests[keyword] = [item for item in items if '=' not in item]
+                requests['*MATRIX OUTPUT FORMAT'] = (keywordParameter(line, 'format') or 'MATRIX INPUT').upper()
+        elif keyword in requests:
+            requests[keyword] += [item.strip().upper() for item in line.split(',') if item.strip()]
+    inputFile.close()
+    return requests
+
+
+def keywordParameter(line, parameter):
+    for item in line.strip().split(',')[1:]:
+        if '=' in item:
+            key, value = item.split('=', 1)
+            if key.strip().lower() == parameter:
+                return value.strip().strip('"')
+    return None
+
+
+def syntheticMesh(nodesPerSide=4):
+    nodes = []
+    elements = []
+    spacing = 1.0/(nodesPerSide-1)
+    for k in range(nodesPerSide):
+        for j in range(nodesPerSide):
+            for i in range(nodesPerSide):
+                nodes.append([len(nodes)+1, i*spacing, j*spacing, k*spacing])
+    def nodeLabel(i, j, k):
+        return 1 + i + nodesPerSide*(j + nodesPerSide*k)
+    for k in range(nodesPerSide-1):
+        for j in range(nodesPerSide-1):
+            for i in range(nodesPerSide-1):
+                connectivity = [nodeLabel(i, j, k), nodeLabel(i+1, j, k), nodeLabel(i+1, j+1, k), nodeLabel(i, j+1, k),
+                                nodeLabel(i, j, k+1), nodeLabel(i+1, j, k+1), nodeLabel(i+1, j+1, k+1), nodeLabel(i, j+1, k+1)]
+                elements.append([len(elements)+1, 'C3D8R'] + connectivity)
+    return nodes, elements
+
+
+def syntheticFields(nodes, elements, instanceName, amplitude, loadFraction):
+    nodeLabels = [node[0] for node in nodes]
+    elementLabels = [element[0] for element in elements]
+    centroids = []
+    for element in elements:
+        corners = [nodes[label-1] for label in element[2:]]
+        centroids.append([sum([corner[axis] for corner in corners])/len(corners) for axis in (1, 2, 3)])
+    scale = amplitude*loadFraction
+    displacement = [[0.1*scale*x*z, -scale*z*z, 0.05*scale*y] for label, x, y, z in nodes]
+    reaction = [[0.0, scale*(z == 0.0), 0.0] for label, x, y, z in nodes]
+    stress = [[scale*(1.0-z)*(y-0.5)*100.0, 0.1*scale*x, 0.1*scale*y, 5.0*scale*(1.0-z), 0.0, 0.0] for x, y, z in centroids]
+    strain = [[value/200E3 for value in row] for row in stress]
+    def field(fieldType, position, componentLabels, labels, data):
+        return {'type': fieldType, 'position': position, 'componentLabels': componentLabels,
+                'instance': instanceName, 'labels': labels, 'data': data}
+    return {
+        'U': field('VECTOR', 'NODAL', ['U1', 'U2', 'U3'], nodeLabels, displacement),
+        'RF': field('VECTOR', 'NODAL', ['RF1', 'RF2', 'RF3'], nodeLabels, reaction),
+        'CF': field('VECTOR', 'NODAL', ['CF1', 'CF2', 'CF3'], nodeLabels, [[0.0, 0.0, 0.0] for label in nodeLabels]),
+        'S': field('TENSOR_3D_FULL', 'INTEGRATION_POINT', ['S11', 'S22', 'S33', 'S12', 'S13', 'S23'], elementLabels, stress),
+        'E': field('TENSOR_3D_FULL', 'INTEGRATION_POINT', ['E11', 'E22', 'E33', 'E12', 'E13', 'E23'], elementLabels, strain),
+    }
+
+
+#Printed tables of the requested variables, one node and one element table per increment
+def writeDat(jobName, steps, requests):
+    datFile = open(jobName + '.dat', 'w')
+    datFile.write('\n   Abaqus/Standard stand-in\n\n')
+    for stepNumber, step in enumerate(steps):
+        datFile.write('\n\n                              S T E P %7d     S T A T I C   A N A L Y S I S\n\n' % (stepNumber+1))
+        for increment, frame in enumerate(step['frames'][1:]):
+            stepTime = frame['frameValue']
+            fraction = 1.0/(len(step['frames'])-1)
+            datFile.write('\n\n                                        INCREMENT %5d SUMMARY\n\n\n' % (increment+1))
+            datFile.write(' TIME INCREMENT COMPLETED  %9.3e,  FRACTION OF STEP COMPLETED  %9.3e\n' % (fraction, stepTime))
+            datFile.write(' STEP TIME COMPLETED       %9.3e,  TOTAL TIME COMPLETED        %9.3e\n\n' % (stepTime, stepNumber+stepTime))
+            for keyword, title, header in (('*EL PRINT', 'E L E M E N T   O U T P U T', ' THE FOLLOWING TABLE IS PRINTED AT THE INTEGRATION POINTS FOR ELEMENT TYPE C3D8R AND ELEMENT SET ASSEMBLY__PICKEDSET1'),
+                                           ('*NODE PRINT', 'N O D E   O U T P U T', ' THE FOLLOWING TABLE IS PRINTED FOR NODES BELONGING TO NODE SET ASSEMBLY__PICKEDSET2')):
+                fields = [frame['fieldOutputs'][name] for name in requests.get(keyword, []) if name in frame['fieldOutputs']]
+                if not fields:
+                    continue
+                columns = [label for field in fields for label in field['componentLabels']]
+                datFile.write('\n\n                                   %s\n\n\n%s\n\n' % (title, header))
+                if keyword == '*EL PRINT':
+                    datFile.write(' ELEMENT  PT FOOT-  ' + ''.join(['%-12s' % label for label in columns]) + '\n                NOTE\n\n')
+                else:
+                    datFile.write('    NODE FOOT-  ' + ''.join(['%-12s' % label for label in columns]) + '\n         NOTE\n\n')
+                rows = [[value for field in fields for value in field['data'][index]] for index in range(len(fields[0]['labels']))]
+                for label, values in zip(fields[0]['labels'], rows):
+                    prefix = '%10d %3d      ' % (label, 1) if keyword == '*EL PRINT' else '%8d      ' % label
+                    datFile.write(prefix + ''.join([' %11.4E' % value for value in values]) + '\n')
+                datFile.write('\n MAXIMUM         ' + ''.join([' %11.4E' % max(column) for column in zip(*rows)]) + '\n')
+                datFile.write(' MINIMUM         ' + ''.join([' %11.4E' % min(column) for column in zip(*rows)]) + '\n\n')
+        datFile.write('\n\n          THE ANALYSIS HAS BEEN COMPLETED\n')
+    datFile.close()
+
+
+#Binary results file: records of 8-byte words [length, key, data...] in blocks of 512 words,
+#each block between the 4-byte record markers of Fortran unformatted files
+def filRecord(key, words):
+    record = struct.pack('<qq', len(words)+2, key)
+    for kind, value in words:
+        record += struct.pack('<q', value) if kind == 'i' else struct.pack('<d', value) if kind == 'd' else struct.pack('8s', value.encode('ascii').ljust(8))
+    return record
+
+
+def writeFil(jobName, steps, elements, requests):
+    filKeys = {'U': 101, 'RF': 104, 'CF': 106, 'S': 11, 'E': 21}
+    records = [filRecord(1921, [('a', '6.14-1'), ('a', 'stub'), ('a', ''), ('a', ''), ('i', len(elements)), ('i', 64), ('i', 512)])]
+    for element in elements:
+        records.append(filRecord(1900, [('i', element[0]), ('a', element[1])] + [('i', label) for label in element[2:]]))
+    for stepNumber, step in enumerate(steps):
+        previousTime = 0.0
+        for increment, frame in enumerate(step['frames'][1:]):
+            stepTime = frame['frameValue']
+            records.append(filRecord(2000, [('d', stepNumber+stepTime), ('d', stepTime), ('d', 0.0), ('d', 0.0), ('i', 1), ('i', stepNumber+1),
+                                            ('i', increment+1), ('i', 0), ('d', 1.0), ('d', 0.0), ('d', stepTime-previousTime)] + [('a', '')]*10))
+            previousTime = stepTime
+            fieldOutputs = frame['fieldOutputs']
+            elementNames = [name for name in requests.get('*EL FILE', []) if name in fieldOutputs]
+            if elementNames:
+                for index, label in enumerate(fieldOutputs[elementNames[0]]['labels']):
+                    records.append(filRecord(1, [('i', label), ('i', 1), ('i', 0), ('i', 0), ('a', ''), ('i', 3), ('i', 3), ('i', 0), ('i', 0)]))
+                    for name in elementNames:
+                        records.append(filRecord(filKeys[name], [('d', value) for value in fieldOutputs[name]['data'][index]]))
+            for name in requests.get('*NODE FILE', []):
+                if name in fieldOutputs and name in filKeys:
+                    for label, values in zip(fieldOutputs[name]['labels'], fieldOutputs[name]['data']):
+                        records.append(filRecord(filKeys[name], [('i', label)] + [('d', value) for value in values]))
+            records.append(filRecord(2001, [('i', 0)]))
+    payload = b''.join(records)
+    payload += b'\0'*(-len(payload) % 4096)
+    filFile = open(jobName + '.fil', 'wb')
+    marker = struct.pack('<i', 4096)
+    for start in range(0, len(payload), 4096):
+        filFile.write(marker + payload[start:start+4096] + marker)
+    filFile.close()
+
+
+#Stiffness of a Laplacian on the element edges for each of the three directions, the z=0 nodes held by springs,
+#and a lumped mass; both are symmetric positive definite
+def writeMatrices(jobName, nodes, elements, amplitude, requests):
+    numNodes = len(nodes)
+    stiffness = {}
+    for element in elements:
+        corners = element[2:]
+        for a in corners:
+            for b in corners:
+                if a >= b:
+                    stiffness[(a, b)] = stiffness.get((a, b), 0.0) + amplitude*1000.0*((8.0 if a == b else 0.0) - 1.0)
+    for label, x, y, z in nodes:
+        if z == 0.0:
+            stiffness[(label, label)] += amplitude*1000.0
+    mass = {}
+    for label in range(1, numNodes+1):
+        mass[(label, label)] = 0.0
+    for element in elements:
+        for label in element[2:]:
+            mass[(label, label)] += 7.8E-9/8.0
+    coordinate = requests.get('*MATRIX OUTPUT FORMAT', 'MATRIX INPUT') == 'COORDINATE'
+    for name, suffix, entries in (('STIFFNESS', 'STIF', stiffness), ('MASS', 'MASS', mass)):
+        if name not in requests.get('*MATRIX OUTPUT', []):
+            continue
+        mtxFile = open('%s_%s1.mtx' % (jobName, suffix), 'w')
+        for (a, b), value in sorted(entries.items()):
+            for dof in (1, 2, 3):
+                if coordinate:
+                    mtxFile.write('%d,%d, %.16E\n' % (3*(a-1)+dof, 3*(b-1)+dof, value))
+                else:
+                    mtxFile.write('%d,%d, %d,%d, %.16E\n' % (a, dof, b, dof, value))
+        mtxFile.close()
+
+
+#Frequencies amplitude*100*n^2 Hz, the mode shapes are the synthetic displacements
+def frequencyStep(stepName, numEigen, nodes, elements, instanceName, amplitude):
+    frames = [{'frameValue': 0.0, 'description': 'Increment      0: Base State', 'mode': 0, 'frequency': 0.0,
+               'fieldOutputs': syntheticFields(nodes, elements, instanceName, amplitude, 0.0)}]
+    for mode in range(1, numEigen+1):
+        frequency = amplitude*100.0*mode*mode
+        eigenvalue = (2*3.141592653589793*frequency)**2
+        frames.append({'frameValue': frequency, 'mode': mode, 'frequency': frequency,
+                       'description': 'Mode %10d: Value = %12.5E Freq = %12.5E (cycles/time)' % (mode, eigenvalue, frequency),
+                       'fieldOutputs': syntheticFields(nodes, elements, instanceName, amplitude, 1.0/mode)})
+    return {'name': stepName, 'procedure': '*FREQUENCY', 'frames': frames}
+
+
+def writeStatusLine(statusFile, line):
+    statusFile.write(line + '\n')
+    statusFile.flush()
+
+
+def run(jobName, inputPath):
+    runtime = float(os.environ.get('ABAQUS_STUB_RUNTIME', '0.2'))
+    numIncrements = int(os.environ.get('ABAQUS_STUB_INCREMENTS', '4'))
+    if not os.path.exists(inputPath) and os.path.exists(inputPath + '.inp'):
+        inputPath = inputPath + '.inp'
+    header, digest = readInput(inputPath)
+    amplitude = 1.0 + (int(digest[:8], 16) % 1000)/1000.0
+    if os.environ.get('ABAQUS_STUB_FAIL') == jobName:
+        sys.stderr.write('Abaqus/Standard Analysis exited with errors\n')
+        return 1
+
+    lockFile = open(jobName + '.lck', 'w')
+    lockFile.close()
+    statusFile = open(jobName + '.sta', 'w')
+    writeStatusLine(statusFile, ' SUMMARY OF JOB INFORMATION:')
+    writeStatusLine(statusFile, ' STEP  INC ATT SEVERE EQUIL TOTAL  TOTAL      STEP       INC OF       DOF    IF')
+    writeStatusLine(statusFile, '               DISCON ITERS ITERS  TIME/    TIME/LPF    TIME/LPF    MONITOR RIKS')
+    writeStatusLine(statusFile, '               ITERS               FREQ')
+
+    nodes, elements = syntheticMesh()
+    instanceName = header['instances'][0].upper() if header['instances'] else 'PART-1-1'
+    steps = []
+    for stepNumber, stepName in enumerate(header['steps']):
+        if stepName in header.get('frequencySteps', {}):
+            steps.append(frequencyStep(stepName, header['frequencySteps'][stepName], nodes, elements, instanceName, amplitude))
+            writeStatusLine(statusFile, '%4d     1   1     0     1     1  %9.3e  %9.3e  %9.3e' % (stepNumber+1, stepNumber+1.0, 1.0, 1.0))
+            continue
+        frames = [{'frameValue': 0.0, 'description': 'Increment      0: Step Time =    0.000',
+                   'fieldOutputs': syntheticFields(nodes, elements, instanceName, amplitude, 0.0)}]
+        for increment in range(1, numIncrements+1):
+            time.sleep(runtime/(numIncrements*len(header['steps'])))
+            stepTime = float(increment)/numIncrements
+            writeStatusLine(statusFile, '%4d %5d   1     0     1     1  %9.3e  %9.3e  %9.3e' % (stepNumber+1, increment, stepNumber+stepTime, stepTime, 1.0/numIncrements))
+            frames.append({'frameValue': stepTime, 'description': 'Increment %6d: Step Time = %9.3e' % (increment, stepTime),
+                           'fieldOutputs': syntheticFields(nodes, elements, instanceName, amplitude, stepTime)})
+        steps.append({'name': stepName, 'procedure': '*STATIC', 'frames': frames})
+
+    odbFile = open(jobName + '.odb', 'w')
+    json.dump({'format': 'abaqusStub-odb', 'name': jobName, 'instances': {instanceName: {'nodes': nodes, 'elements': elements}},
+               'steps': steps}, odbFile)
+    odbFile.close()
+    requests = outputRequests(inputPath)
+    #The printed tables and the results file hold the static steps
+    steps = [step for step in steps if step['procedure'] == '*STATIC']
+    if '*NODE PRINT' in requests or '*EL PRINT' in requests:
+        writeDat(jobName, steps, requests)
+    if '*NODE FILE' in requests or '*EL FILE' in requests:
+        writeFil(jobName, steps, elements, requests)
+    if '*MATRIX OUTPUT' in requests:
+        writeMatrices(jobName, nodes, elements, amplitude, requests)
+    writeStatusLine(statusFile, ' THE ANALYSIS HAS COMPLETED SUCCESSFULLY')
+    statusFile.close()
+    sys.stdout.write('Abaqus JOB %s COMPLETED\n' % jobName)
+    os.remove(jobName + '.lck')
+    return 0
+
+
+if __name__ == '__main__':
+    options = parseArguments(sys.argv[1:])
+    jobName = options['job']
+    sys.exit(run(jobName, options.get('input', jobName + '.inp')))
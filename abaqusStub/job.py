@@ -0,0 +1,2 @@
+#Stand-in for the job module of the Abaqus/CAE kernel
+#The scripts only import it, the methods it registers are provided by the stub kernel objects in abaqus.py
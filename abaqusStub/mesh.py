@@ -0,0 +1,6 @@
+#Stand-in for the mesh module of the Abaqus/CAE kernel
+from abaqus import KernelObject, formatArguments
+
+
+def ElemType(*args, **kwargs):
+    return KernelObject('mesh.ElemType(%s)' % formatArguments(args, kwargs))
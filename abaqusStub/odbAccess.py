@@ -0,0 +1,227 @@
+#Stand-in for the odbAccess module
+#The fake solver writes its output database as JSON, openOdb() turns it into the usual Odb object tree:
+#odb.rootAssembly.instances[...].nodes/elements and odb.steps[...].frames[...].fieldOutputs[...].values/bulkDataBlocks
+#Odb(path, description) also accepts a description built in memory, to stand in for large databases
+import json
+from math import sqrt
+
+import abaqusConstants
+
+
+def _constant(name):
+    return getattr(abaqusConstants, name)
+
+
+def misesOf(data):
+    #Components are ordered S11, S22, S33, S12, S13, S23 as in the output database
+    s11, s22, s33 = data[0], data[1], data[2]
+    s12 = data[3] if len(data) > 3 else 0.0
+    s13 = data[4] if len(data) > 4 else 0.0
+    s23 = data[5] if len(data) > 5 else 0.0
+    return sqrt(0.5*((s11-s22)**2 + (s22-s33)**2 + (s33-s11)**2) + 3.0*(s12**2 + s13**2 + s23**2))
+
+
+class OdbError(Exception):
+    pass
+
+
+class OdbRepository(dict):
+
+    def __init__(self, items=()):
+        dict.__init__(self)
+        self._order = []
+        for key, value in items:
+            self[key] = value
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._order.append(key)
+        dict.__setitem__(self, key, value)
+
+    def __iter__(self):
+        return iter(list(self._order))
+
+    def keys(self):
+        return list(self._order)
+
+    def values(self):
+        return [self[key] for key in self._order]
+
+    def items(self):
+        return [(key, self[key]) for key in self._order]
+
+
+class OdbMeshNode(object):
+
+    def __init__(self, label, coordinates, instanceName):
+        self.label = label
+        self.coordinates = tuple(coordinates)
+        self.instanceName = instanceName
+
+
+class OdbMeshElement(object):
+
+    def __init__(self, label, elementType, connectivity, instanceName):
+        self.label = label
+        self.type = elementType
+        self.connectivity = tuple(connectivity)
+        self.instanceName = instanceName
+
+
+class OdbInstance(object):
+
+    def __init__(self, name, description):
+        self.name = name
+        self.nodes = [OdbMeshNode(row[0], row[1:], name) for row in description['nodes']]
+        self.elements = [OdbMeshElement(row[0], row[1], row[2:], name) for row in description['elements']]
+
+
+class OdbSet(object):
+
+    def __init__(self, name, instances):
+        self.name = name
+        self.nodes = [instance.nodes for instance in instances.values()]
+        self.elements = [instance.elements for instance in instances.values()]
+
+
+class OdbSetRepository(OdbRepository):
+    #The stand-in database keeps no sets, any set name resolves to the whole mesh
+
+    def __init__(self, instances):
+        OdbRepository.__init__(self)
+        self._instances = instances
+
+    def __getitem__(self, key):
+        if not dict.__contains__(self, key):
+            return OdbSet(key, self._instances)
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        return True
+
+
+class OdbAssembly(object):
+
+    def __init__(self, instances):
+        self.instances = instances
+        self.nodeSets = OdbSetRepository(instances)
+        self.elementSets = OdbSetRepository(instances)
+
+
+class FieldValue(object):
+
+    def __init__(self, fieldOutput, label, data):
+        self.instance = fieldOutput.instance
+        self.position = fieldOutput.position
+        self.data = tuple(data) if len(data) > 1 else data[0]
+        if fieldOutput.position == _constant('NODAL'):
+            self.nodeLabel = label
+            self.elementLabel = None
+        else:
+            self.nodeLabel = None
+            self.elementLabel = label
+        self.mises = misesOf(data) if fieldOutput.type == _constant('TENSOR_3D_FULL') else None
+        self.magnitude = sqrt(sum([value*value for value in data])) if fieldOutput.type == _constant('VECTOR') else None
+
+
+class FieldBulkData(object):
+    #One block of a bulkDataBlocks sequence: all values of one instance as arrays
+
+    def __init__(self, fieldOutput, labels, data):
+        import numpy
+        self.instance = fieldOutput.instance
+        self.position = fieldOutput.position
+        self.type = fieldOutput.type
+        self.componentLabels = fieldOutput.componentLabels
+        self.sectionPoint = None
+        self.data = numpy.asarray(data, dtype=numpy.float32).reshape(len(labels), -1)
+        labels = numpy.asarray(labels, dtype=numpy.int32)
+        if fieldOutput.position == _constant('NODAL'):
+            self.nodeLabels = labels
+            self.elementLabels = None
+            self.integrationPoints = None
+        else:
+            self.nodeLabels = None
+            self.elementLabels = labels
+            self.integrationPoints = numpy.ones(len(labels), dtype=numpy.int32)
+        if fieldOutput.type == _constant('TENSOR_3D_FULL'):
+            self.mises = numpy.asarray([misesOf(row) for row in self.data.tolist()], dtype=numpy.float32)
+        else:
+            self.mises = None
+
+
+class FieldOutput(object):
+
+    def __init__(self, name, description, instances):
+        self.name = name
+        self.description = description.get('description', name)
+        self.type = _constant(description['type'])
+        self.position = _constant(description['position'])
+        self.componentLabels = tuple(description['componentLabels'])
+        self.validInvariants = (_constant('MISES'),) if self.type == _constant('TENSOR_3D_FULL') else ()
+        self.instance = instances[description['instance']]
+        self._labels = description['labels']
+        self._data = description['data']
+        self._values = None
+
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = [FieldValue(self, label, data) for label, data in zip(self._labels, self._data)]
+        return self._values
+
+    @property
+    def bulkDataBlocks(self):
+        return [FieldBulkData(self, self._labels, self._data)]
+
+    def getSubset(self, position=None, region=None):
+        if position is not None and position != self.position:
+            raise OdbError('Field %s is not available at position %s' % (self.name, position))
+        return self
+
+
+class OdbFrame(object):
+
+    def __init__(self, frameId, description, instances):
+        self.frameId = frameId
+        self.frameValue = description['frameValue']
+        self.description = description.get('description', '')
+        self.incrementNumber = frameId
+        #Modes of frequency steps, 0 and 0.0 elsewhere
+        self.mode = description.get('mode', 0)
+        self.frequency = description.get('frequency', 0.0)
+        self.fieldOutputs = OdbRepository([(name, FieldOutput(name, fieldDescription, instances))
+                                           for name, fieldDescription in sorted(description['fieldOutputs'].items())])
+
+
+class OdbStep(object):
+
+    def __init__(self, description, instances):
+        self.name = description['name']
+        self.procedure = description.get('procedure', '*STATIC')
+        self.frames = [OdbFrame(frameId, frameDescription, instances) for frameId, frameDescription in enumerate(description['frames'])]
+
+
+class Odb(object):
+
+    def __init__(self, path, description):
+        self.path = path
+        self.name = description.get('name', path)
+        instances = OdbRepository([(name, OdbInstance(name, instanceDescription))
+                                   for name, instanceDescription in sorted(description['instances'].items())])
+        self.rootAssembly = OdbAssembly(instances)
+        self.steps = OdbRepository([(stepDescription['name'], OdbStep(stepDescription, instances))
+                                    for stepDescription in description['steps']])
+
+    def close(self):
+        pass
+
+
+def openOdb(path, readOnly=True, **kwargs):
+    try:
+        odbFile = open(path)
+        description = json.load(odbFile)
+        odbFile.close()
+    except (IOError, ValueError):
+        raise OdbError('Cannot open output database %s' % path)
+    return Odb(path, description)
@@ -0,0 +1,6 @@
+#Stand-in for the regionToolset module of the Abaqus/CAE kernel
+from abaqus import KernelObject, formatArguments
+
+
+def Region(*args, **kwargs):
+    return KernelObject('regionToolset.Region(%s)' % formatArguments(args, kwargs))